@@ -1,14 +1,50 @@
 import customtkinter as ctk
-from tkinter import messagebox, Text, END
-from PIL import Image
+import tkinter
+from tkinter import messagebox, END
+import datetime
 import os
-import datetime # Import datetime here
-from database import DatabaseManager # Import the DatabaseManager
+import threading
+import time
+from async_db import AsyncDatabase
+from widgets import PagedTextView
+from views import ViewManager
+from instrumentation import QueryInstrumentation
+# catalog_io, report_io, filedialog e PIL são importados só quando usados, para abrir a janela mais rápido
 
 class MarcenariaApp(ctk.CTk):
-    def __init__(self):
+    CATALOG_FILETYPES = [("Planilha CSV", "*.csv"), ("JSON", "*.json"), ("JSON Lines", "*.jsonl")]
+    REPORT_FILETYPES = [("Planilha CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                        ("CSV compactado", "*.csv.gz"), ("JSON Lines compactado", "*.jsonl.gz")]
+    EXPORT_POLL_MS = 200 # Atualização da barra de progresso da exportação
+    PRODUCT_SEARCH_RESULTS = 8 # Resultados mostrados na busca de produtos da encomenda
+    SEARCH_DEBOUNCE_MS = 150
+    NAV_BUTTON_WIDTH = 120
+    BACKGROUND_IMAGE = "picapaupng.png"
+    BACKGROUND_SIZE = (480, 540)
+    DIAGNOSTICS_SHORTCUT = "<Control-Shift-D>" # Abre a tela de diagnóstico (não aparece na barra)
+    PRODUCT_LIST_HEADER = f"{'ID':<5}{'Nome':<30}{'Descrição':<40}{'Preço (R$)':>10}\n" + "-"*85 + "\n"
+    ORDER_STATUSES = ["Pendente", "Em Produção", "Concluído", "Entregue", "Cancelado"]
+    BULK_STATUS_PAGE_SIZE = 200 # Encomendas carregadas por vez na atualização em lote
+    ORDER_SEARCH_PAGE_SIZE = 50 # Encomendas carregadas por vez na busca de encomendas
+    ALL_STATUSES = "Todos os status"
+
+    def __init__(self, started=None):
+        # started: instante (time.perf_counter) em que o programa começou, para o modo de medição
+        self.started = started if started is not None else time.perf_counter()
+        self.startup_timing = os.environ.get("MARCENARIA_TIMING") == "1"
         super().__init__()
-        self.db = DatabaseManager() # Initialize the DatabaseManager
+        self.current_screen = None
+        self.export_cancel = None # threading.Event da exportação em andamento
+        self.period_cancel = None # threading.Event do resumo do período em andamento
+        self.dbq = AsyncDatabase(self, on_busy=self._set_busy, factory=self._remote_factory()) # Banco de dados fora da thread da interface
+        # Abre e migra o banco nas threads do banco enquanto a janela é montada
+        self._startup = {"painted": None, "db_ready": None}
+        self.dbq.warm_up(on_done=lambda: self._startup_step("db_ready"))
+        # Medição das consultas: desligada por padrão (custo zero); MARCENARIA_TRACE=1 liga desde o início
+        self.instrumentation = QueryInstrumentation(
+            slow_threshold_ms=float(os.environ.get("MARCENARIA_SLOW_MS", 100)))
+        if os.environ.get("MARCENARIA_TRACE") == "1":
+            self.dbq.set_instrumentation(self.instrumentation)
         self.title('Marcenaria Pica Pau - Login')
         self.geometry('960x540')
         self.resizable(False, False)
@@ -18,22 +54,131 @@ class MarcenariaApp(ctk.CTk):
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            bg_image_path = os.path.join(script_dir, "picapaupng.png")
-            self.bg_image = ctk.CTkImage(Image.open(bg_image_path), size=(480, 540))
-            self.background_label = ctk.CTkLabel(self, image=self.bg_image, text="")
+            self.bg_image = self._load_background()
+            self.background_label = tkinter.Label(self, image=self.bg_image, borderwidth=0, highlightthickness=0)
             self.background_label.place(x=0, y=0)
         except FileNotFoundError:
             print("Aviso: Imagem 'picapaupng.png' não encontrada.")
 
         self.login_frame = ctk.CTkFrame(self, width=480, height=540, corner_radius=0, fg_color=self._get_appearance_mode_color())
         self.main_content_frame = ctk.CTkFrame(self, fg_color=self._get_appearance_mode_color())
+        self.loading_label = ctk.CTkLabel(self, text="Carregando...", font=ctk.CTkFont(size=12, slant="italic"))
+        self.views = None # Barra de navegação e telas só são montadas depois do login
         self.show_login_widgets()
+        self.after(0, lambda: self._startup_step("painted"))
+
+    def _remote_factory(self):
+        """Com MARCENARIA_SERVER=http://host:porta, usa o server.py em vez de abrir o arquivo do banco."""
+        url = os.environ.get("MARCENARIA_SERVER")
+        if not url:
+            return None
+        from remote_db import RemoteDatabase
+        return lambda: RemoteDatabase(url)
+
+    def _build_main_content(self):
+        self._add_nav_bar()
+        # Telas construídas uma vez e reaproveitadas ao navegar
+        screen_container = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+        screen_container.pack(fill="both", expand=True)
+        self.views = ViewManager(screen_container, {
+            "main": self._build_main_screen,
+            "products": self._build_products_screen,
+            "add_product": self._build_add_product_screen,
+            "edit_product": self._build_edit_product_screen,
+            "delete_product": self._build_delete_product_screen,
+            "create_order": self._build_create_order_screen,
+            "update_order_status": self._build_update_order_status_screen,
+            "bulk_status": self._build_bulk_status_screen,
+            "reports": self._build_reports_screen,
+            "analytics": self._build_analytics_screen,
+            "period_summary": self._build_period_summary_screen,
+            "diagnostics": self._build_diagnostics_screen,
+        })
+        self.bind(self.DIAGNOSTICS_SHORTCUT, lambda event: self._show_screen("diagnostics"))
+
+    def _load_background(self):
+        """Imagem de fundo já no tamanho da janela, com cache em disco.
+
+        Decodificar o PNG e redimensioná-lo com o PIL é a parte lenta da
+        abertura; o resultado fica em .cache/, com a data de modificação do
+        original e o tamanho no nome do arquivo. Nas próximas vezes o Tk lê o
+        PNG pronto direto, sem passar pelo PIL.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        source = os.path.join(script_dir, self.BACKGROUND_IMAGE)
+        mtime = os.stat(source).st_mtime_ns
+        scaling = ctk.ScalingTracker.get_window_scaling(self)
+        width, height = (round(v * scaling) for v in self.BACKGROUND_SIZE)
+        cache_dir = os.path.join(script_dir, ".cache")
+        prefix = os.path.splitext(self.BACKGROUND_IMAGE)[0] + "_"
+        cached = os.path.join(cache_dir, f"{prefix}{width}x{height}_{mtime}.png")
+        if not os.path.exists(cached):
+            from PIL import Image
+            image = Image.open(source).resize((width, height), Image.LANCZOS)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                for old in os.listdir(cache_dir):
+                    if old.startswith(prefix):
+                        os.remove(os.path.join(cache_dir, old))
+                image.save(cached + ".tmp", format="PNG")
+                os.replace(cached + ".tmp", cached)
+            except OSError as e:
+                # Sem permissão de escrita: usa a imagem redimensionada agora mesmo
+                print(f"Aviso: não foi possível gravar o cache da imagem de fundo: {e}")
+                from PIL import ImageTk
+                return ImageTk.PhotoImage(image, master=self)
+        return tkinter.PhotoImage(master=self, file=cached)
+
+    def _startup_step(self, step):
+        """Registra a primeira pintura da janela e o banco pronto (modo MARCENARIA_TIMING=1)."""
+        if not self.startup_timing:
+            return
+        if step == "painted":
+            self.update_idletasks() # Garante que o desenho pendente já foi feito
+        self._startup[step] = time.perf_counter() - self.started
+        if step == "painted":
+            print(f"[timing] primeira pintura em {self._startup['painted'] * 1000:.0f} ms")
+        if None not in self._startup.values():
+            # Login só funciona com o banco pronto: interativo é o último dos dois
+            print(f"[timing] interativo em {max(self._startup.values()) * 1000:.0f} ms "
+                  f"(banco pronto em {self._startup['db_ready'] * 1000:.0f} ms)")
 
     def on_closing(self):
-        self.db.close()
+        if self.export_cancel is not None:
+            self.export_cancel.set() # Não espera a exportação terminar; o arquivo parcial é apagado
+        if self.period_cancel is not None:
+            self.period_cancel.set() # Os processos do resumo param na próxima conferência
+        self.dbq.close()
         self.destroy()
 
+    def _enter_screen(self, name):
+        """Marca a troca de tela: resultados pendentes da tela anterior serão descartados."""
+        if self.current_screen is not None:
+            self.dbq.invalidate(self.current_screen)
+        self.current_screen = name
+
+    def _show_screen(self, name):
+        self._enter_screen(name)
+        self.views.show(name)
+
+    def _db(self, method, *args, on_done=None, on_error=None):
+        """Chama um método do banco em segundo plano, na fila da tela atual."""
+        return self.dbq.call(method, *args, screen=self.current_screen, on_done=on_done,
+                             on_error=on_error or self._show_db_error)
+
+    def _show_db_error(self, error):
+        print(f"DB Error: {error}")
+        messagebox.showerror("Erro", "Erro ao acessar o banco de dados.")
+
+    def _set_busy(self, busy):
+        if busy:
+            self.loading_label.place(relx=1.0, rely=1.0, x=-10, y=-5, anchor="se")
+            self.loading_label.lift()
+            self.configure(cursor="watch")
+        else:
+            self.loading_label.place_forget()
+            self.configure(cursor="")
+
     def _get_appearance_mode_color(self):
         return "#2b2b2b" if ctk.get_appearance_mode() == "Dark" else "#e6e6e6"
 
@@ -42,6 +187,7 @@ class MarcenariaApp(ctk.CTk):
             widget.destroy()
 
     def show_login_widgets(self):
+        self._enter_screen("login")
         self.main_content_frame.place_forget()
         self.login_frame.place(relx=0.75, rely=0.5, anchor='center')
         self.clear_frame(self.login_frame)
@@ -75,76 +221,124 @@ class MarcenariaApp(ctk.CTk):
         if password != password_confirm:
             messagebox.showerror("Erro", "As senhas não coincidem.")
             return
-        if self.db.check_user_exists(username):
-            messagebox.showerror("Erro", "Este nome de usuário já existe.")
-            return
-        if self.db.add_user(username, password):
-            messagebox.showinfo("Sucesso", "Usuário cadastrado com sucesso!")
-            self.show_login_widgets()
-        else:
-            messagebox.showerror("Erro", "Não foi possível cadastrar o usuário.")
+        def on_user_checked(existing_user):
+            if existing_user:
+                messagebox.showerror("Erro", "Este nome de usuário já existe.")
+                return
+            self._db('add_user', username, password, on_done=on_user_added)
+        def on_user_added(added):
+            if added:
+                messagebox.showinfo("Sucesso", "Usuário cadastrado com sucesso!")
+                self.show_login_widgets()
+            else:
+                messagebox.showerror("Erro", "Não foi possível cadastrar o usuário.")
+        self._db('check_user_exists', username, on_done=on_user_checked)
 
     def login(self):
         username = self.user_entry.get()
         password = self.pass_entry.get()
-        user = self.db.verify_user(username, password)
-        if user:
-            self.username = username
-            self.show_main_window()
-        else:
-            messagebox.showerror("Erro", "Usuário ou senha inválidos.")
+        def on_verified(user):
+            if user:
+                self.username = username
+                self.show_main_window()
+            else:
+                messagebox.showerror("Erro", "Usuário ou senha inválidos.")
+        self._db('verify_user', username, password, on_done=on_verified)
 
     def logout(self):
-        self.clear_frame(self.main_content_frame)
+        if self.views is not None:
+            self.views.clear()
         self.show_login_widgets()
 
     def show_main_window(self):
         self.login_frame.place_forget()
         self.main_content_frame.place(relx=0, rely=0, relwidth=1, relheight=1)
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text=f"Bem-vindo(a), {self.username}!", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=20)
-        ctk.CTkLabel(self.main_content_frame, text="Use a barra de navegação para gerenciar o sistema.", font=ctk.CTkFont(size=14)).pack(pady=10)
+        if self.views is None:
+            self._build_main_content()
+        self._show_screen("main")
+
+    def _build_main_screen(self, frame):
+        welcome_label = ctk.CTkLabel(frame, text=f"Bem-vindo(a), {self.username}!", font=ctk.CTkFont(size=18, weight="bold"))
+        welcome_label.pack(pady=20)
+        ctk.CTkLabel(frame, text="Use a barra de navegação para gerenciar o sistema.", font=ctk.CTkFont(size=14)).pack(pady=10)
+        return lambda: welcome_label.configure(text=f"Bem-vindo(a), {self.username}!")
 
     def _add_nav_bar(self):
         nav_bar = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
         nav_bar.pack(pady=10, fill="x", padx=20)
-        ctk.CTkButton(nav_bar, text="Produtos", command=self.show_manage_products).pack(side="left", expand=True, padx=5)
-        ctk.CTkButton(nav_bar, text="Nova Encomenda", command=self.show_create_order).pack(side="left", expand=True, padx=5)
-        ctk.CTkButton(nav_bar, text="Atualizar Encomenda", command=self.show_update_order_status).pack(side="left", expand=True, padx=5)
-        ctk.CTkButton(nav_bar, text="Relatórios", command=self.show_reports).pack(side="left", expand=True, padx=5)
-        ctk.CTkButton(nav_bar, text="Logout", command=self.logout, fg_color="red").pack(side="right", padx=5)
+        ctk.CTkButton(nav_bar, text="Produtos", command=self.show_manage_products, width=self.NAV_BUTTON_WIDTH).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(nav_bar, text="Nova Encomenda", command=self.show_create_order, width=self.NAV_BUTTON_WIDTH).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(nav_bar, text="Atualizar Encomenda", command=self.show_update_order_status, width=self.NAV_BUTTON_WIDTH).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(nav_bar, text="Relatórios", command=self.show_reports, width=self.NAV_BUTTON_WIDTH).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(nav_bar, text="Análises", command=self.show_analytics, width=self.NAV_BUTTON_WIDTH).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(nav_bar, text="Logout", command=self.logout, width=self.NAV_BUTTON_WIDTH, fg_color="red").pack(side="right", padx=5)
 
     def show_manage_products(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Gerenciamento de Produtos", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
-        actions_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+        self._show_screen("products")
+
+    def _build_products_screen(self, frame):
+        ctk.CTkLabel(frame, text="Gerenciamento de Produtos", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        actions_frame = ctk.CTkFrame(frame, fg_color="transparent")
         actions_frame.pack(pady=10)
         ctk.CTkButton(actions_frame, text="Adicionar Novo Produto", command=self._show_add_product_form).pack(side="left", padx=5)
         ctk.CTkButton(actions_frame, text="Editar Produto Existente", command=self._show_edit_product_form).pack(side="left", padx=5)
         ctk.CTkButton(actions_frame, text="Remover Produto", command=self._show_delete_product_form).pack(side="left", padx=5)
-        self.product_list_text = ctk.CTkTextbox(self.main_content_frame, width=780, height=300)
+        ctk.CTkButton(actions_frame, text="Importar Catálogo", command=self._import_catalog).pack(side="left", padx=5)
+        ctk.CTkButton(actions_frame, text="Exportar Catálogo", command=self._export_catalog).pack(side="left", padx=5)
+        self.product_list_text = ctk.CTkTextbox(frame, width=780, height=300)
         self.product_list_text.pack(pady=10)
         self.refresh_product_list(self.product_list_text)
+        return lambda: self.product_list_view.reload()
 
     def refresh_product_list(self, textbox):
-        textbox.delete("1.0", END)
-        products = self.db.get_all_products()
-        if not products:
-            textbox.insert(END, "Nenhum produto cadastrado.")
+        self.product_list_view = PagedTextView(textbox, self._page_fetcher('get_products_page'), self._format_product_rows,
+                                               key_of=lambda p: p.id, header=self.PRODUCT_LIST_HEADER,
+                                               empty_text="Nenhum produto cadastrado.", first_key=0,
+                                               on_error=self._show_db_error)
+
+    def _import_catalog(self):
+        from tkinter import filedialog
+        import catalog_io
+        path = filedialog.askopenfilename(title="Importar Catálogo", filetypes=self.CATALOG_FILETYPES)
+        if not path:
+            return
+        def on_imported(result):
+            message = f"{result.imported} produto(s) importado(s)."
+            if result.errors:
+                shown = "\n".join(f"Linha {line}: {error}" for line, error in result.errors[:10])
+                more = f"\n... e mais {len(result.errors) - 10}" if len(result.errors) > 10 else ""
+                message += f"\n\n{len(result.errors)} linha(s) com erro:\n{shown}{more}"
+                messagebox.showwarning("Importação concluída", message)
+            else:
+                messagebox.showinfo("Sucesso", message)
+            if self.current_screen == "products":
+                self.product_list_view.reload()
+        self._db(catalog_io.import_products, path, on_done=on_imported,
+                 on_error=lambda e: messagebox.showerror("Erro", f"Não foi possível importar o catálogo: {e}"))
+
+    def _export_catalog(self):
+        from tkinter import filedialog
+        import catalog_io
+        path = filedialog.asksaveasfilename(title="Exportar Catálogo", defaultextension=".csv", filetypes=self.CATALOG_FILETYPES)
+        if not path:
             return
-        header = f"{'ID':<5}{'Nome':<30}{'Descrição':<40}{'Preço (R$)':>10}\n" + "-"*85 + "\n"
-        textbox.insert(END, header)
-        for p in products:
-            line = f"{p[0]:<5}{p[1]:<30}{p[2] if p[2] else '':<40}{p[3]:>10.2f}\n"
-            textbox.insert(END, line)
+        self._db(catalog_io.export_products, path,
+                 on_done=lambda count: messagebox.showinfo("Sucesso", f"{count} produto(s) exportado(s)."),
+                 on_error=lambda e: messagebox.showerror("Erro", f"Não foi possível exportar o catálogo: {e}"))
+
+    def _page_fetcher(self, method):
+        return lambda key, limit, on_rows, on_error: self._db(method, key, limit, on_done=on_rows, on_error=on_error)
+
+    @staticmethod
+    def _format_product_rows(products):
+        return "".join(f"{p.id:<5}{p.name:<30}{p.description or '':<40}{p.price:>10.2f}\n" for p in products)
 
     def _show_add_product_form(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Adicionar Novo Produto", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
-        form_frame = ctk.CTkFrame(self.main_content_frame)
+        self._show_screen("add_product")
+
+    def _build_add_product_screen(self, frame):
+        ctk.CTkLabel(frame, text="Adicionar Novo Produto", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
+        form_frame = ctk.CTkFrame(frame)
         form_frame.pack(pady=10)
         ctk.CTkLabel(form_frame, text="Nome:").grid(row=0, column=0, padx=10, pady=5, sticky="w")
         name_entry = ctk.CTkEntry(form_frame, width=250)
@@ -160,19 +354,26 @@ class MarcenariaApp(ctk.CTk):
             if not name or not price:
                 messagebox.showerror("Erro", "Nome e Preço são obrigatórios.")
                 return
-            if self.db.add_product(name, desc, price):
-                messagebox.showinfo("Sucesso", "Produto adicionado.")
-                self.show_manage_products()
-            else:
-                messagebox.showerror("Erro", "Preço inválido ou erro no banco de dados.")
-        ctk.CTkButton(self.main_content_frame, text="Salvar Produto", command=save, width=150, height=40).pack(pady=20)
-        ctk.CTkButton(self.main_content_frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+            def on_saved(added):
+                if added:
+                    messagebox.showinfo("Sucesso", "Produto adicionado.")
+                    self.show_manage_products()
+                else:
+                    messagebox.showerror("Erro", "Preço inválido ou erro no banco de dados.")
+            self._db('add_product', name, desc, price, on_done=on_saved)
+        ctk.CTkButton(frame, text="Salvar Produto", command=save, width=150, height=40).pack(pady=20)
+        ctk.CTkButton(frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+        def reset():
+            for entry in (name_entry, desc_entry, price_entry):
+                entry.delete(0, END)
+        return reset
 
     def _show_edit_product_form(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Editar Produto Existente", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
-        edit_form_frame = ctk.CTkFrame(self.main_content_frame)
+        self._show_screen("edit_product")
+
+    def _build_edit_product_screen(self, frame):
+        ctk.CTkLabel(frame, text="Editar Produto Existente", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
+        edit_form_frame = ctk.CTkFrame(frame)
         edit_form_frame.pack(pady=10)
         ctk.CTkLabel(edit_form_frame, text="ID do Produto:").grid(row=0, column=0, padx=10, pady=5, sticky="w")
         id_entry = ctk.CTkEntry(edit_form_frame, width=250)
@@ -183,54 +384,69 @@ class MarcenariaApp(ctk.CTk):
         def load_product_data():
             try:
                 prod_id = int(id_entry.get())
-                product = self.db.get_product(prod_id)
-                if product:
-                    # Clear and re-pack existing widgets for dynamic update
-                    for widget in [name_entry, desc_entry, price_entry]:
-                        widget.grid_forget() # Hide if already visible
-                    for label_text in ["Novo Nome:", "Nova Descrição:", "Novo Preço:"]:
-                        for child in edit_form_frame.winfo_children():
-                            if isinstance(child, ctk.CTkLabel) and child.cget("text") == label_text:
-                                child.destroy()
-
-                    ctk.CTkLabel(edit_form_frame, text="Novo Nome:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
-                    name_entry.grid(row=1, column=1, padx=10, pady=5)
-                    name_entry.delete(0, END); name_entry.insert(0, product[0])
-                    ctk.CTkLabel(edit_form_frame, text="Nova Descrição:").grid(row=2, column=0, padx=10, pady=5, sticky="w")
-                    desc_entry.grid(row=2, column=1, padx=10, pady=5)
-                    desc_entry.delete(0, END); desc_entry.insert(0, product[1])
-                    ctk.CTkLabel(edit_form_frame, text="Novo Preço:").grid(row=3, column=0, padx=10, pady=5, sticky="w")
-                    price_entry.grid(row=3, column=1, padx=10, pady=5)
-                    price_entry.delete(0, END); price_entry.insert(0, str(product[2]))
-                    
-                    # Ensure "Salvar Alterações" button is present and correctly linked
-                    for widget in edit_form_frame.winfo_children():
-                        if isinstance(widget, ctk.CTkButton) and widget.cget("text") == "Salvar Alterações":
-                            widget.destroy() # Remove old button to prevent duplicates
-                    ctk.CTkButton(edit_form_frame, text="Salvar Alterações", command=save_changes, width=150).grid(row=4, column=0, columnspan=2, pady=10)
-                else:
-                    messagebox.showerror("Erro", "Produto não encontrado.")
             except ValueError:
                 messagebox.showerror("Erro", "ID inválido.")
+                return
+            self._db('get_product', prod_id, on_done=show_product)
+        def show_product(product):
+            if product:
+                # Clear and re-pack existing widgets for dynamic update
+                for widget in [name_entry, desc_entry, price_entry]:
+                    widget.grid_forget() # Hide if already visible
+                for label_text in ["Novo Nome:", "Nova Descrição:", "Novo Preço:"]:
+                    for child in edit_form_frame.winfo_children():
+                        if isinstance(child, ctk.CTkLabel) and child.cget("text") == label_text:
+                            child.destroy()
+
+                ctk.CTkLabel(edit_form_frame, text="Novo Nome:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
+                name_entry.grid(row=1, column=1, padx=10, pady=5)
+                name_entry.delete(0, END); name_entry.insert(0, product.name)
+                ctk.CTkLabel(edit_form_frame, text="Nova Descrição:").grid(row=2, column=0, padx=10, pady=5, sticky="w")
+                desc_entry.grid(row=2, column=1, padx=10, pady=5)
+                desc_entry.delete(0, END); desc_entry.insert(0, product.description)
+                ctk.CTkLabel(edit_form_frame, text="Novo Preço:").grid(row=3, column=0, padx=10, pady=5, sticky="w")
+                price_entry.grid(row=3, column=1, padx=10, pady=5)
+                price_entry.delete(0, END); price_entry.insert(0, f"{product.price:.2f}")
+                    
+                # Ensure "Salvar Alterações" button is present and correctly linked
+                for widget in edit_form_frame.winfo_children():
+                    if isinstance(widget, ctk.CTkButton) and widget.cget("text") == "Salvar Alterações":
+                        widget.destroy() # Remove old button to prevent duplicates
+                ctk.CTkButton(edit_form_frame, text="Salvar Alterações", command=save_changes, width=150).grid(row=4, column=0, columnspan=2, pady=10)
+            else:
+                messagebox.showerror("Erro", "Produto não encontrado.")
         def save_changes():
             try:
                 prod_id = int(id_entry.get())
                 name, desc, price = name_entry.get(), desc_entry.get(), price_entry.get()
-                if self.db.update_product(prod_id, name, desc, price):
+            except ValueError:
+                messagebox.showerror("Erro", "Dados inválidos.")
+                return
+            def on_saved(updated):
+                if updated:
                     messagebox.showinfo("Sucesso", "Produto atualizado.")
                     self.show_manage_products()
                 else:
                     messagebox.showerror("Erro", "Não foi possível salvar.")
-            except ValueError:
-                messagebox.showerror("Erro", "Dados inválidos.")
+            self._db('update_product', prod_id, name, desc, price, on_done=on_saved)
         ctk.CTkButton(edit_form_frame, text="Carregar Produto", command=load_product_data, width=150).grid(row=0, column=2, padx=10, pady=5)
-        ctk.CTkButton(self.main_content_frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+        ctk.CTkButton(frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+        def reset():
+            # Volta ao formulário só com o ID, como na primeira visita
+            id_entry.delete(0, END)
+            for widget in [name_entry, desc_entry, price_entry]:
+                widget.grid_forget()
+            for widget in edit_form_frame.grid_slaves():
+                if int(widget.grid_info()["row"]) > 0:
+                    widget.destroy() # Rótulos e botão "Salvar Alterações" criados por show_product
+        return reset
 
     def _show_delete_product_form(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Remover Produto", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
-        delete_form_frame = ctk.CTkFrame(self.main_content_frame)
+        self._show_screen("delete_product")
+
+    def _build_delete_product_screen(self, frame):
+        ctk.CTkLabel(frame, text="Remover Produto", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=20)
+        delete_form_frame = ctk.CTkFrame(frame)
         delete_form_frame.pack(pady=10)
         ctk.CTkLabel(delete_form_frame, text="ID do Produto para Remover:").grid(row=0, column=0, padx=10, pady=5, sticky="w")
         id_entry = ctk.CTkEntry(delete_form_frame, width=250)
@@ -240,58 +456,138 @@ class MarcenariaApp(ctk.CTk):
                 return
             try:
                 prod_id = int(id_entry.get())
-                if self.db.delete_product(prod_id):
+            except ValueError:
+                messagebox.showerror("Erro", "ID inválido.")
+                return
+            def on_deleted(deleted):
+                if deleted:
                     messagebox.showinfo("Sucesso", "Produto removido.")
                     self.show_manage_products()
                 else:
                     messagebox.showerror("Erro", "Produto não encontrado ou associado a uma encomenda.")
-            except ValueError:
-                messagebox.showerror("Erro", "ID inválido.")
+            self._db('delete_product', prod_id, on_done=on_deleted)
         ctk.CTkButton(delete_form_frame, text="Remover", command=delete, fg_color="red", width=150).grid(row=0, column=2, padx=10, pady=5)
-        ctk.CTkButton(self.main_content_frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+        ctk.CTkButton(frame, text="Voltar", command=self.show_manage_products, fg_color="transparent", border_width=1).pack(pady=5)
+        return lambda: id_entry.delete(0, END)
 
     def show_create_order(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Criar Nova Encomenda", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
-        client_info_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+        self._show_screen("create_order")
+
+    def _build_create_order_screen(self, frame):
+        ctk.CTkLabel(frame, text="Criar Nova Encomenda", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        client_info_frame = ctk.CTkFrame(frame, fg_color="transparent")
         client_info_frame.pack(pady=5)
         ctk.CTkLabel(client_info_frame, text="Nome do Cliente:").pack(side="left", padx=5)
         client_name_entry = ctk.CTkEntry(client_info_frame, width=400)
         client_name_entry.pack(side="left", padx=5)
-        items_display_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+        items_display_frame = ctk.CTkFrame(frame, fg_color="transparent")
         items_display_frame.pack(fill="both", expand=True, padx=20, pady=10)
         self.order_items_display = ctk.CTkTextbox(items_display_frame, width=600, height=200)
         self.order_items_display.pack(pady=5, fill="both", expand=True)
-        self.order_items_display.insert(END, f"{'ID':<5}{'Produto':<30}{'Preço Uni.':<15}{'Qtd':<10}{'Subtotal':>15}\n" + "="*80 + "\n")
-        self.products_in_current_order = []
-        action_buttons_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+        action_buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
         action_buttons_frame.pack(pady=10)
         total_label = ctk.CTkLabel(action_buttons_frame, text="Total: R$ 0.00", font=ctk.CTkFont(size=16, weight="bold"))
         total_label.pack(side="left", padx=10)
         def update_total():
             current_total = sum(item['subtotal'] for item in self.products_in_current_order)
             total_label.configure(text=f"Total: R$ {current_total:.2f}")
+        def show_items():
+            self.order_items_display.delete("1.0", END)
+            self.order_items_display.insert(END, f"{'ID':<5}{'Produto':<30}{'Preço Uni.':<15}{'Qtd':<10}{'Subtotal':>15}\n" + "="*80 + "\n"
+                                            + "".join(f"{item['id']:<5}{item['name']:<30}{item['price']:<15.2f}{item['quantity']:<10}"
+                                                      f"{item['subtotal']:>15.2f}\n" for item in self.products_in_current_order))
+            update_total()
+        def reset_order():
+            # O rascunho sobrevive à troca de telas; só é limpo depois de salvo
+            client_name_entry.delete(0, END)
+            self.products_in_current_order = []
+            show_items()
+        reset_order()
+        catalog = {"generation": None, "by_id": {}}
+        def reprice(result):
+            # O mapa id -> produto só é refeito quando o catálogo mudou desde a última visita
+            generation, products = result
+            if generation != catalog["generation"]:
+                catalog["generation"], catalog["by_id"] = generation, {p.id: p for p in products}
+            by_id, removed = catalog["by_id"], []
+            for item in list(self.products_in_current_order):
+                product = by_id.get(item["id"])
+                if product is None:
+                    removed.append(item["name"])
+                    self.products_in_current_order.remove(item)
+                else:
+                    item.update(name=product.name, price=product.price, subtotal=product.price * item["quantity"])
+            show_items()
+            if removed:
+                messagebox.showwarning("Aviso", "Produtos excluídos do catálogo saíram da encomenda: " + ", ".join(removed))
+        def refresh():
+            # Na volta à tela, o rascunho passa a usar os nomes e preços atuais do catálogo
+            if self.products_in_current_order:
+                self._db('get_product_catalog', on_done=reprice)
         def add_item_to_order_popup():
+            # A busca vazia traz os primeiros produtos e confirma que o catálogo não está vazio
+            self._db('search_products', '', self.PRODUCT_SEARCH_RESULTS, on_done=open_product_popup)
+        def open_product_popup(initial_results):
+            if not initial_results:
+                messagebox.showerror("Erro", "Nenhum produto cadastrado. Cadastre produtos antes de criar uma encomenda.")
+                return
+
             select_prod_win = ctk.CTkToplevel(self)
             select_prod_win.title("Selecionar Produto")
-            select_prod_win.geometry("500x400")
+            select_prod_win.geometry("500x480")
             select_prod_win.transient(self)
             select_prod_win.configure(fg_color=self._get_appearance_mode_color()) # Set background color
 
-            products = self.db.get_all_products() # Get products from the database
-            if not products:
-                messagebox.showerror("Erro", "Nenhum produto cadastrado. Cadastre produtos antes de criar uma encomenda.", parent=select_prod_win)
-                select_prod_win.destroy()
-                return
+            ctk.CTkLabel(select_prod_win, text="Buscar Produto (nome, descrição ou ID):").pack(pady=(10, 5))
+            search_entry = ctk.CTkEntry(select_prod_win, placeholder_text="Digite para buscar...", width=400)
+            search_entry.pack(pady=5)
+            results_frame = ctk.CTkFrame(select_prod_win, fg_color="transparent")
+            results_frame.pack(pady=5)
+            result_buttons = [ctk.CTkButton(results_frame, text="", width=400, height=24, anchor="w",
+                                            fg_color="transparent", border_width=1)
+                              for _ in range(self.PRODUCT_SEARCH_RESULTS)]
+            selected_label = ctk.CTkLabel(select_prod_win, text="", font=ctk.CTkFont(weight="bold"))
+            selected_label.pack(pady=5)
+            selected = {}
+            search_state = {"job": None, "seq": 0}
+
+            def select_product(product):
+                selected["product"] = product
+                selected_label.configure(text=f"Selecionado: {product.id} - {product.name} (R$ {product.price:.2f})")
+
+            def show_results(results):
+                for i, button in enumerate(result_buttons):
+                    if i < len(results):
+                        p = results[i]
+                        button.configure(text=f"{p.id} - {p.name} (R$ {p.price:.2f})", command=lambda p=p: select_product(p))
+                        button.pack(pady=1)
+                    else:
+                        button.pack_forget()
+                search_state["results"] = results
+
+            def run_search():
+                search_state["job"] = None
+                search_state["seq"] += 1
+                seq = search_state["seq"]
+                def receive(results):
+                    # Só a resposta da última tecla interessa
+                    if seq == search_state["seq"] and select_prod_win.winfo_exists():
+                        show_results(results)
+                self._db('search_products', search_entry.get(), self.PRODUCT_SEARCH_RESULTS, on_done=receive)
 
-            product_map = {f"{p[0]} - {p[1]} (R$ {p[3]:.2f})": {"id": p[0], "name": p[1], "price": p[3]} for p in products} # Corrected index for price (p[3])
-            product_options = list(product_map.keys())
+            def on_search_key(event=None):
+                if search_state["job"] is not None:
+                    select_prod_win.after_cancel(search_state["job"])
+                search_state["job"] = select_prod_win.after(self.SEARCH_DEBOUNCE_MS, run_search)
 
-            ctk.CTkLabel(select_prod_win, text="Selecione um Produto:").pack(pady=10)
-            product_combobox = ctk.CTkComboBox(select_prod_win, values=product_options, width=400)
-            product_combobox.pack(pady=10)
-            product_combobox.set(product_options[0] if product_options else "")
+            def select_first(event=None):
+                if search_state.get("results"):
+                    select_product(search_state["results"][0])
+
+            search_entry.bind("<KeyRelease>", on_search_key)
+            search_entry.bind("<Return>", select_first)
+            show_results(initial_results)
+            select_product(initial_results[0])
 
             ctk.CTkLabel(select_prod_win, text="Quantidade:").pack(pady=5)
             quantity_entry = ctk.CTkEntry(select_prod_win, width=100)
@@ -300,17 +596,14 @@ class MarcenariaApp(ctk.CTk):
 
             def confirm_add():
                 try:
-                    selected_prod_text = product_combobox.get()
+                    selected_product = selected.get("product")
                     qty_str = quantity_entry.get()
 
-                    if not selected_prod_text or not qty_str:
+                    if not selected_product or not qty_str:
                         messagebox.showerror("Erro", "Selecione um produto e insira a quantidade.", parent=select_prod_win)
                         return
 
-                    selected_info = product_map[selected_prod_text]
-                    product_id = selected_info["id"]
-                    product_name = selected_info["name"]
-                    product_price = selected_info["price"]
+                    product_id, product_name, product_price = selected_product.id, selected_product.name, selected_product.price
                     quantity = int(qty_str)
 
                     if quantity <= 0:
@@ -322,14 +615,11 @@ class MarcenariaApp(ctk.CTk):
                                                             "price": product_price, "quantity": quantity,
                                                             "subtotal": subtotal})
 
-                    self.order_items_display.insert(END, f"{product_id:<5}{product_name:<30}{product_price:<15.2f}{quantity:<10}{subtotal:>15.2f}\n")
-                    update_total()
+                    show_items()
                     select_prod_win.destroy()
 
                 except ValueError:
                     messagebox.showerror("Erro", "Quantidade inválida.", parent=select_prod_win)
-                except KeyError:
-                    messagebox.showerror("Erro", "Produto selecionado inválido.", parent=select_prod_win)
 
             ctk.CTkButton(select_prod_win, text="Adicionar Produto", command=confirm_add).pack(pady=20)
 
@@ -339,79 +629,545 @@ class MarcenariaApp(ctk.CTk):
                 messagebox.showerror("Erro", "Nome do cliente é obrigatório."); return
             if not self.products_in_current_order:
                 messagebox.showerror("Erro", "Adicione pelo menos um item."); return
-            order_total = sum(item['subtotal'] for item in self.products_in_current_order)
-            order_id = self.db.create_order(client_name, order_total, self.products_in_current_order)
-            if order_id:
-                messagebox.showinfo("Sucesso", f"Encomenda #{order_id} criada com sucesso!")
-                self.show_create_order()
-            else:
-                messagebox.showerror("Erro", "Não foi possível salvar a encomenda.")
+            # O total é calculado pelo banco com os preços atuais; o da tela é só uma prévia
+            def on_created(order_id):
+                if order_id:
+                    messagebox.showinfo("Sucesso", f"Encomenda #{order_id} criada com sucesso!")
+                    reset_order()
+                else:
+                    messagebox.showerror("Erro", "Não foi possível salvar a encomenda.")
+            self._db('create_order', client_name, list(self.products_in_current_order), on_done=on_created)
         ctk.CTkButton(action_buttons_frame, text="Adicionar Item", command=add_item_to_order_popup, width=150).pack(side="left", padx=10)
         ctk.CTkButton(action_buttons_frame, text="Salvar Encomenda", command=save_order, width=150).pack(side="right", padx=10)
+        return refresh # A encomenda em andamento é mantida; só os preços são atualizados
 
     def show_update_order_status(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Atualizar Status da Encomenda", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
-        ctk.CTkLabel(self.main_content_frame, text="ID da Encomenda:").pack(pady=10)
-        order_id_entry = ctk.CTkEntry(self.main_content_frame, width=250)
-        order_id_entry.pack(pady=5)
-        current_status_label = ctk.CTkLabel(self.main_content_frame, text="Status Atual: N/A", font=ctk.CTkFont(size=14, weight="bold"))
+        self._show_screen("update_order_status")
+
+    def _build_update_order_status_screen(self, frame):
+        ctk.CTkLabel(frame, text="Atualizar Status da Encomenda", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        ctk.CTkLabel(frame, text="ID da Encomenda:").pack(pady=10)
+        id_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        id_frame.pack(pady=5)
+        order_id_entry = ctk.CTkEntry(id_frame, width=250)
+        order_id_entry.pack(side="left")
+        def choose_order(order):
+            order_id_entry.delete(0, END)
+            order_id_entry.insert(0, str(order.id))
+            load_order_status()
+        ctk.CTkButton(id_frame, text="Buscar Encomenda...", width=150,
+                      command=lambda: self._open_order_search(choose_order)).pack(side="left", padx=10)
+        current_status_label = ctk.CTkLabel(frame, text="Status Atual: N/A", font=ctk.CTkFont(size=14, weight="bold"))
         current_status_label.pack(pady=5)
-        ctk.CTkLabel(self.main_content_frame, text="Novo Status:").pack(pady=5)
-        status_options = ["Pendente", "Em Produção", "Concluído", "Entregue", "Cancelado"]
-        status_combobox = ctk.CTkComboBox(self.main_content_frame, values=status_options, width=250)
+        history_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=12), justify="left")
+        history_label.pack(pady=5)
+        ctk.CTkLabel(frame, text="Novo Status:").pack(pady=5)
+        status_options = self.ORDER_STATUSES
+        status_combobox = ctk.CTkComboBox(frame, values=status_options, width=250)
         status_combobox.pack(pady=5)
+        def show_history(timeline):
+            lines = [f"{changed_at}  {old_status or '(criação)'} -> {new_status}" for changed_at, old_status, new_status in timeline]
+            history_label.configure(text="\n".join(["Histórico:"] + lines[-6:]) if lines else "")
         def load_order_status():
             try:
                 order_id = int(order_id_entry.get())
-                status = self.db.get_order_status(order_id)
+            except ValueError:
+                messagebox.showerror("Erro", "ID inválido.")
+                return
+            def show_status(status):
                 if status:
                     current_status_label.configure(text=f"Status Atual: {status}")
                     status_combobox.set(status)
+                    self._db('get_status_timeline', order_id, on_done=show_history)
                 else:
                     messagebox.showerror("Erro", "Encomenda não encontrada.")
-            except ValueError:
-                messagebox.showerror("Erro", "ID inválido.")
+            self._db('get_order_status', order_id, on_done=show_status)
         def save_new_status():
             try:
                 order_id = int(order_id_entry.get())
-                new_status = status_combobox.get()
-                if not new_status:
-                    messagebox.showerror("Erro", "Selecione um novo status."); return
-                if self.db.update_order_status(order_id, new_status):
+            except ValueError:
+                messagebox.showerror("Erro", "ID inválido.")
+                return
+            new_status = status_combobox.get()
+            if not new_status:
+                messagebox.showerror("Erro", "Selecione um novo status."); return
+            def on_updated(updated):
+                if updated:
                     messagebox.showinfo("Sucesso", f"Status da Encomenda #{order_id} atualizado.")
-                    self.show_update_order_status()
+                    reset()
                 else:
                     messagebox.showerror("Erro", "Encomenda não encontrada.")
-            except ValueError:
-                messagebox.showerror("Erro", "ID inválido.")
-        button_group_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
+            self._db('update_order_status', order_id, new_status, on_done=on_updated)
+        button_group_frame = ctk.CTkFrame(frame, fg_color="transparent")
         button_group_frame.pack(pady=20)
         ctk.CTkButton(button_group_frame, text="Carregar Status", command=load_order_status, width=150).pack(side="left", padx=10)
         ctk.CTkButton(button_group_frame, text="Salvar Novo Status", command=save_new_status, fg_color="green", width=150).pack(side="left", padx=10)
+        ctk.CTkButton(frame, text="Atualizar Várias Encomendas...", command=lambda: self._show_screen("bulk_status"), width=250).pack(pady=5)
+        def reset():
+            order_id_entry.delete(0, END)
+            current_status_label.configure(text="Status Atual: N/A")
+            history_label.configure(text="")
+            status_combobox.set(status_options[0])
+        return reset
+
+    def _open_order_search(self, on_choose):
+        """Janela de busca de encomendas por cliente, status e período; on_choose(encomenda) ao escolher uma."""
+        search_win = ctk.CTkToplevel(self)
+        search_win.title("Buscar Encomenda")
+        search_win.geometry("900x420")
+        search_win.transient(self)
+        search_win.configure(fg_color=self._get_appearance_mode_color())
+        state = {"filters": {}, "more": False, "seq": 0}
+        orders = []
+        def run(filters, after=None):
+            state["filters"] = filters
+            state["seq"] += 1
+            seq = state["seq"]
+            def receive(rows):
+                # Só a resposta da última busca interessa
+                if seq == state["seq"] and search_win.winfo_exists():
+                    show_page(rows, clear=after is None)
+            self._db('find_orders', filters.get("client_prefix"), filters.get("statuses"), filters.get("date_from"),
+                     filters.get("date_to"), self.ORDER_SEARCH_PAGE_SIZE, after, on_done=receive)
+        self._build_order_search(search_win, run)
+        count_label = ctk.CTkLabel(search_win, text="")
+        count_label.pack()
+        order_list = self._order_listbox(search_win, "browse", 12)
+        def show_page(rows, clear):
+            if clear:
+                order_list.delete(0, END)
+                orders.clear()
+            order_list.insert(END, *[f"#{o.id:<8}{o.client_name[:34]:<36}{o.order_date:<12}{o.status:<13}R$ {o.total:>10.2f}"
+                                     for o in rows])
+            orders.extend(rows)
+            state["more"] = len(rows) == self.ORDER_SEARCH_PAGE_SIZE
+            more = " (há mais: use Carregar Mais)" if state["more"] else ""
+            count_label.configure(text=f"{len(orders)} encomenda(s){more}" if orders else "Nenhuma encomenda encontrada.")
+        def load_more():
+            if state["more"]:
+                last = orders[-1]
+                run(state["filters"], (last.order_date, last.id))
+        def choose(event=None):
+            selection = order_list.curselection()
+            if not selection:
+                return
+            order = orders[selection[0]]
+            search_win.destroy()
+            on_choose(order)
+        order_list.bind("<Double-Button-1>", choose)
+        order_list.bind("<Return>", choose)
+        buttons_frame = ctk.CTkFrame(search_win, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        ctk.CTkButton(buttons_frame, text="Carregar Mais", command=load_more, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Selecionar", command=choose, fg_color="green", width=130).pack(side="left", padx=5)
+        run({})
+
+    def _build_bulk_status_screen(self, frame):
+        ctk.CTkLabel(frame, text="Atualizar Status em Lote", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        filter_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        filter_frame.pack(pady=5)
+        ctk.CTkLabel(filter_frame, text="Encomendas com status:").pack(side="left", padx=5)
+        from_combobox = ctk.CTkComboBox(filter_frame, values=self.ORDER_STATUSES, width=160, command=lambda value: reload())
+        from_combobox.pack(side="left", padx=5)
+        ctk.CTkLabel(filter_frame, text="Mudar para:").pack(side="left", padx=(20, 5))
+        to_combobox = ctk.CTkComboBox(filter_frame, values=self.ORDER_STATUSES, width=160)
+        to_combobox.set(self.ORDER_STATUSES[1])
+        to_combobox.pack(side="left", padx=5)
+        count_label = ctk.CTkLabel(frame, text="")
+        count_label.pack()
+        # Seleção múltipla com Shift/Ctrl
+        order_list = self._order_listbox(frame, "extended", 15)
+        order_ids = []
+        state = {"more": False}
+        def show_page(rows, clear):
+            if clear:
+                order_list.delete(0, END)
+                order_ids.clear()
+            order_list.insert(END, *[f"#{o.id:<8}{o.client_name[:40]:<42}{o.order_date:<12}R$ {o.total:>10.2f}"
+                                     for o in rows])
+            order_ids.extend(o.id for o in rows)
+            state["more"] = len(rows) == self.BULK_STATUS_PAGE_SIZE
+            update_count()
+        def update_count(event=None):
+            more = " (há mais: use Carregar Mais)" if state["more"] else ""
+            count_label.configure(text=f"{len(order_list.curselection())} de {len(order_ids)} encomenda(s) selecionada(s){more}")
+        order_list.bind("<<ListboxSelect>>", update_count)
+        def reload():
+            self._db('get_orders_by_status', from_combobox.get(), None, self.BULK_STATUS_PAGE_SIZE,
+                     on_done=lambda rows: show_page(rows, clear=True))
+        def load_more():
+            if state["more"]:
+                self._db('get_orders_by_status', from_combobox.get(), order_ids[-1], self.BULK_STATUS_PAGE_SIZE,
+                         on_done=lambda rows: show_page(rows, clear=False))
+        def select_all():
+            order_list.selection_set(0, END)
+            update_count()
+        def clear_selection():
+            order_list.selection_clear(0, END)
+            update_count()
+        def apply():
+            selected = [order_ids[index] for index in order_list.curselection()]
+            from_status, new_status = from_combobox.get(), to_combobox.get()
+            if not selected:
+                messagebox.showerror("Erro", "Selecione ao menos uma encomenda."); return
+            if new_status == from_status:
+                messagebox.showerror("Erro", "Escolha um status diferente do atual."); return
+            if not messagebox.askyesno("Confirmar", f"Mudar {len(selected)} encomenda(s) de '{from_status}' para '{new_status}'?"):
+                return
+            def on_updated(changed):
+                if changed is None:
+                    messagebox.showerror("Erro", "Não foi possível atualizar as encomendas.")
+                    return
+                skipped = len(selected) - changed
+                note = f" {skipped} já tinham mudado de status em outro terminal." if skipped else ""
+                messagebox.showinfo("Sucesso", f"{changed} encomenda(s) atualizada(s).{note}")
+                reload()
+            # from_status garante que só muda o que ainda está no status mostrado na lista
+            self._db('bulk_update_order_status', new_status, selected, from_status, on_done=on_updated)
+        buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons_frame.pack(pady=10)
+        ctk.CTkButton(buttons_frame, text="Selecionar Todas", command=select_all, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Limpar Seleção", command=clear_selection, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Carregar Mais", command=load_more, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Aplicar", command=apply, fg_color="green", width=130).pack(side="left", padx=5)
+        ctk.CTkButton(frame, text="Voltar", command=self.show_update_order_status, width=130).pack()
+        from_combobox.set(self.ORDER_STATUSES[0])
+        reload()
+        return reload
+
+    @staticmethod
+    def _order_listbox(parent, selectmode, height):
+        """Listbox do Tk (o customtkinter não tem lista com seleção) nas cores do tema, com barra de rolagem."""
+        list_frame = ctk.CTkFrame(parent)
+        list_frame.pack(pady=5, padx=10)
+        dark = ctk.get_appearance_mode() == "Dark"
+        order_list = tkinter.Listbox(list_frame, selectmode=selectmode, width=90, height=height, font=("Courier", 11),
+                                     activestyle="none", borderwidth=0, highlightthickness=0,
+                                     bg="#2b2b2b" if dark else "#f2f2f2", fg="#dce4ee" if dark else "#1a1a1a",
+                                     selectbackground="#1f6aa5", selectforeground="#ffffff")
+        scrollbar = ctk.CTkScrollbar(list_frame, command=order_list.yview)
+        order_list.configure(yscrollcommand=scrollbar.set)
+        order_list.pack(side="left", padx=(5, 0), pady=5)
+        scrollbar.pack(side="left", fill="y", pady=5)
+        return order_list
+
+    def _build_order_search(self, parent, on_search):
+        """Campos da busca de encomendas; on_search(filtros) recebe os argumentos de find_orders
+        (client_prefix, statuses, date_from, date_to) ao buscar."""
+        search_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        search_frame.pack(pady=5)
+        ctk.CTkLabel(search_frame, text="Cliente").pack(side="left", padx=5)
+        client_entry = ctk.CTkEntry(search_frame, width=170, placeholder_text="Começo do nome")
+        client_entry.pack(side="left")
+        status_combobox = ctk.CTkComboBox(search_frame, values=[self.ALL_STATUSES] + self.ORDER_STATUSES, width=150)
+        status_combobox.set(self.ALL_STATUSES)
+        status_combobox.pack(side="left", padx=10)
+        ctk.CTkLabel(search_frame, text="De").pack(side="left", padx=5)
+        date_from_entry = ctk.CTkEntry(search_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_from_entry.pack(side="left")
+        ctk.CTkLabel(search_frame, text="até").pack(side="left", padx=5)
+        date_to_entry = ctk.CTkEntry(search_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_to_entry.pack(side="left")
+        def search(event=None):
+            try:
+                date_from, date_to = self._read_date(date_from_entry), self._read_date(date_to_entry)
+            except ValueError:
+                messagebox.showerror("Erro", "Data inválida. Use o formato AAAA-MM-DD."); return
+            status = status_combobox.get()
+            on_search({"client_prefix": client_entry.get().strip() or None,
+                       "statuses": None if status == self.ALL_STATUSES else [status],
+                       "date_from": date_from, "date_to": date_to})
+        def clear():
+            for entry in (client_entry, date_from_entry, date_to_entry):
+                entry.delete(0, END)
+            status_combobox.set(self.ALL_STATUSES)
+            search()
+        for entry in (client_entry, date_from_entry, date_to_entry):
+            entry.bind("<Return>", search)
+        ctk.CTkButton(search_frame, text="Buscar", command=search, width=80).pack(side="left", padx=(10, 5))
+        ctk.CTkButton(search_frame, text="Limpar", command=clear, width=80, fg_color="gray").pack(side="left")
+        return search_frame
 
     def show_reports(self):
-        self.clear_frame(self.main_content_frame)
-        self._add_nav_bar()
-        ctk.CTkLabel(self.main_content_frame, text="Relatório de Encomendas", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
-        report_text = ctk.CTkTextbox(self.main_content_frame, width=780, height=400)
+        self._show_screen("reports")
+
+    def _build_reports_screen(self, frame):
+        ctk.CTkLabel(frame, text="Relatório de Encomendas", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        self._build_export_bar(frame)
+        filters = {}
+        def search(new_filters):
+            filters.clear()
+            filters.update(new_filters)
+            self.report_view.reload()
+        self._build_order_search(frame, search)
+        report_text = ctk.CTkTextbox(frame, width=780, height=290) # Cabe com a barra de progresso da exportação
         report_text.pack(pady=10, padx=10)
-        report_data = self.db.get_full_report()
-        if not report_data:
-            report_text.insert(END, "Nenhuma encomenda registrada.")
-            return
-        for data in report_data:
-            order, items = data['order'], data['items']
-            order_id, client, date, status, total = order
-            report_text.insert(END, f"--- Encomenda ID: {order_id} | Cliente: {client} | Data: {date} ---\n")
-            report_text.insert(END, f"    Status: {status}\n    Total: R$ {total:.2f}\n    Itens:\n")
-            if not items:
-                report_text.insert(END, "        (Nenhum item encontrado)\n")
+        def fetch_page(after, limit, on_rows, on_error):
+            # Itens já carregados: a página é formatada aqui, na thread do Tk
+            self._db('find_orders', filters.get("client_prefix"), filters.get("statuses"), filters.get("date_from"),
+                     filters.get("date_to"), limit, after, True, on_done=on_rows, on_error=on_error)
+        self.report_view = PagedTextView(report_text, fetch_page,
+                                         lambda orders: "".join(map(self._format_report_order, orders)),
+                                         key_of=lambda order: (order.order_date, order.id),
+                                         empty_text="Nenhuma encomenda encontrada.", page_size=50,
+                                         on_error=self._show_db_error)
+        return lambda: self.report_view.reload()
+
+    def _build_export_bar(self, frame):
+        """Filtros e botão da exportação das encomendas, com barra de progresso."""
+        filters_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        filters_frame.pack()
+        ctk.CTkLabel(filters_frame, text="Exportar de").pack(side="left", padx=5)
+        date_from_entry = ctk.CTkEntry(filters_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_from_entry.pack(side="left")
+        ctk.CTkLabel(filters_frame, text="até").pack(side="left", padx=5)
+        date_to_entry = ctk.CTkEntry(filters_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_to_entry.pack(side="left")
+        status_combobox = ctk.CTkComboBox(filters_frame, values=[self.ALL_STATUSES] + self.ORDER_STATUSES, width=150)
+        status_combobox.set(self.ALL_STATUSES)
+        status_combobox.pack(side="left", padx=10)
+        archive_checkbox = ctk.CTkCheckBox(filters_frame, text="Incluir arquivo morto")
+        archive_checkbox.pack(side="left", padx=5)
+        gzip_checkbox = ctk.CTkCheckBox(filters_frame, text="Compactar (gzip)")
+        gzip_checkbox.pack(side="left", padx=5)
+        export_button = ctk.CTkButton(filters_frame, text="Exportar...", width=110)
+        export_button.pack(side="left", padx=5)
+        progress_frame = ctk.CTkFrame(frame, fg_color="transparent") # Só aparece durante uma exportação
+        progress_bar = ctk.CTkProgressBar(progress_frame, width=400)
+        progress_bar.pack(side="left", padx=5)
+        progress_label = ctk.CTkLabel(progress_frame, text="", width=220)
+        progress_label.pack(side="left", padx=5)
+        cancel_button = ctk.CTkButton(progress_frame, text="Cancelar", width=100, fg_color="gray")
+        cancel_button.pack(side="left", padx=5)
+
+        def export():
+            import report_io
+            from tkinter import filedialog
+            try:
+                date_from, date_to = self._read_date(date_from_entry), self._read_date(date_to_entry)
+            except ValueError:
+                messagebox.showerror("Erro", "Data inválida. Use o formato AAAA-MM-DD."); return
+            statuses = None if status_combobox.get() == self.ALL_STATUSES else [status_combobox.get()]
+            path = filedialog.asksaveasfilename(title="Exportar Encomendas", defaultextension=".csv",
+                                                filetypes=self.REPORT_FILETYPES)
+            if not path:
+                return
+            if gzip_checkbox.get() and not path.lower().endswith(".gz"):
+                path += ".gz"
+            try:
+                report_io.file_format(path)
+            except ValueError as e:
+                messagebox.showerror("Erro", str(e)); return
+            # on_progress roda na thread do banco: só guarda o resultado, que a tela lê com after()
+            progress = {}
+            cancel = self.export_cancel = threading.Event()
+            def on_progress(result):
+                progress["result"] = result
+            def show_progress():
+                if cancel is not self.export_cancel or not progress_frame.winfo_exists():
+                    return
+                result = progress.get("result")
+                if result is not None and result.total_orders:
+                    progress_bar.set(result.orders / result.total_orders)
+                    progress_label.configure(text=f"{result.orders} de {result.total_orders} encomenda(s)")
+                self.after(self.EXPORT_POLL_MS, show_progress)
+            def finish():
+                self.export_cancel = None
+                progress_frame.pack_forget()
+                export_button.configure(state="normal")
+            def on_done(result):
+                finish()
+                if result.cancelled:
+                    messagebox.showinfo("Exportação cancelada", "A exportação foi cancelada; nenhum arquivo foi gravado.")
+                else:
+                    messagebox.showinfo("Sucesso", f"{result.orders} encomenda(s) ({result.rows} linha(s)) exportada(s) para {path}.")
+            def on_error(error):
+                finish()
+                messagebox.showerror("Erro", f"Não foi possível exportar as encomendas: {error}")
+            cancel_button.configure(command=cancel.set)
+            progress_bar.set(0)
+            progress_label.configure(text="Contando encomendas...")
+            progress_frame.pack(after=filters_frame, pady=5)
+            export_button.configure(state="disabled")
+            # Faixa à parte: o usuário continua usando o sistema durante a exportação
+            self.dbq.call(report_io.export_orders, path, date_from, date_to, statuses, bool(archive_checkbox.get()),
+                          on_progress, cancel, background=True, on_done=on_done, on_error=on_error)
+            show_progress()
+        export_button.configure(command=export)
+
+    @staticmethod
+    def _read_date(entry):
+        """Data AAAA-MM-DD do campo, ou None se vazio (ValueError se inválida)."""
+        text = entry.get().strip()
+        return datetime.date.fromisoformat(text).isoformat() if text else None
+
+    @staticmethod
+    def _format_report_order(order):
+        items = order.items
+        lines = [f"--- Encomenda ID: {order.id} | Cliente: {order.client_name} | Data: {order.order_date} ---\n",
+                 f"    Status: {order.status}\n    Total: R$ {order.total:.2f}\n    Itens:\n"]
+        if not items:
+            lines.append("        (Nenhum item encontrado)\n")
+        else:
+            for item in items:
+                lines.append(f"        - {item.product.name}: {item.quantity} unidade(s)\n")
+        lines.append("-"*60 + "\n\n")
+        return "".join(lines)
+
+    def show_analytics(self):
+        self._show_screen("analytics")
+
+    def _build_analytics_screen(self, frame):
+        ctk.CTkLabel(frame, text="Análise de Vendas", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        analytics_text = ctk.CTkTextbox(frame, width=780, height=350)
+        analytics_text.pack(pady=10, padx=10)
+        ctk.CTkButton(frame, text="Resumo de Período...", command=lambda: self._show_screen("period_summary"), width=250).pack()
+        # Lê só as tabelas de agregados e o índice do histórico: o custo não cresce com o histórico de encomendas
+        def load(db):
+            return (db.get_monthly_revenue(12), db.get_status_summary(12), db.get_top_products(30, 10),
+                    db.get_lead_times("Pendente", "Concluído", 90))
+        def show(data):
+            monthly, by_status, top_products, lead_times = data
+            lines = ["Faturamento por mês (últimos 12 meses, sem canceladas)\n",
+                     f"    {'Mês':<10}{'Encomendas':>12}{'Faturamento (R$)':>20}\n"]
+            lines += [f"    {month:<10}{orders:>12}{revenue:>20.2f}\n" for month, orders, revenue in monthly] or ["    (sem vendas)\n"]
+            lines += ["\nEncomendas por status (últimos 12 meses)\n",
+                      f"    {'Status':<15}{'Encomendas':>12}{'Valor (R$)':>20}\n"]
+            lines += [f"    {status:<15}{orders:>12}{revenue:>20.2f}\n" for status, orders, revenue in by_status] or ["    (sem encomendas)\n"]
+            lines += ["\nProdutos mais vendidos (últimos 30 dias)\n",
+                      f"    {'ID':<6}{'Produto':<40}{'Unidades':>10}\n"]
+            lines += [f"    {prod_id:<6}{name:<40}{units:>10}\n" for prod_id, name, units in top_products] or ["    (sem vendas)\n"]
+            lines.append("\nPrazo de Pendente até Concluído (encomendas concluídas nos últimos 90 dias)\n")
+            if lead_times:
+                lines.append(f"    {lead_times['count']} encomenda(s): média {lead_times['mean'] / 24:.1f} dias, "
+                             f"mediana {lead_times['p50'] / 24:.1f}, 90% até {lead_times['p90'] / 24:.1f}, "
+                             f"maior {lead_times['max'] / 24:.1f}\n")
             else:
-                for item in items:
-                    report_text.insert(END, f"        - {item[0]}: {item[1]} unidade(s)\n")
-            report_text.insert(END, "-"*60 + "\n\n")
+                lines.append("    (sem encomendas concluídas)\n")
+            analytics_text.delete("1.0", END)
+            analytics_text.insert(END, "".join(lines))
+        def refresh():
+            self._db(load, on_done=show)
+        refresh()
+        return refresh
+
+    def _build_period_summary_screen(self, frame):
+        """Resumo de um período longo calculado das encomendas em vários processos (period_report)."""
+        ctk.CTkLabel(frame, text="Resumo do Período", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20)
+        filters_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        filters_frame.pack()
+        ctk.CTkLabel(filters_frame, text="De").pack(side="left", padx=5)
+        date_from_entry = ctk.CTkEntry(filters_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_from_entry.pack(side="left")
+        ctk.CTkLabel(filters_frame, text="até").pack(side="left", padx=5)
+        date_to_entry = ctk.CTkEntry(filters_frame, width=110, placeholder_text="AAAA-MM-DD")
+        date_to_entry.pack(side="left")
+        archive_checkbox = ctk.CTkCheckBox(filters_frame, text="Incluir arquivo morto")
+        archive_checkbox.pack(side="left", padx=10)
+        run_button = ctk.CTkButton(filters_frame, text="Calcular", width=100)
+        run_button.pack(side="left", padx=5)
+        cancel_button = ctk.CTkButton(filters_frame, text="Cancelar", width=100, fg_color="gray", state="disabled")
+        cancel_button.pack(side="left", padx=5)
+        status_label = ctk.CTkLabel(frame, text="Sem datas, o resumo cobre todo o histórico.")
+        status_label.pack()
+        period_text = ctk.CTkTextbox(frame, width=780, height=280, font=ctk.CTkFont(family="Courier", size=12))
+        period_text.pack(pady=5, padx=10)
+        ctk.CTkButton(frame, text="Voltar", command=self.show_analytics, width=130).pack()
+
+        def run():
+            import period_report
+            try:
+                date_from, date_to = self._read_date(date_from_entry), self._read_date(date_to_entry)
+            except ValueError:
+                messagebox.showerror("Erro", "Data inválida. Use o formato AAAA-MM-DD."); return
+            # on_progress roda na thread do banco: só guarda o resumo, que a tela lê com after()
+            progress = {}
+            if self.period_cancel is not None:
+                # Só acontece se a tela foi descartada durante um cálculo: sem ela, o resultado não tem onde aparecer
+                self.period_cancel.set()
+            cancel = self.period_cancel = threading.Event()
+            def on_progress(summary):
+                progress["summary"] = summary
+            def show_progress():
+                if cancel is not self.period_cancel or not status_label.winfo_exists():
+                    return
+                summary = progress.get("summary")
+                if summary is not None:
+                    status_label.configure(text=f"Calculando em {summary.workers or 1} processo(s): "
+                                                f"{summary.shards_done} de {summary.shards} fatia(s)...")
+                self.after(self.EXPORT_POLL_MS, show_progress)
+            def finish():
+                if self.period_cancel is cancel: # Um cálculo mais novo pode já estar com o campo
+                    self.period_cancel = None
+                if not status_label.winfo_exists():
+                    return False # A tela foi descartada durante o cálculo
+                run_button.configure(state="normal")
+                cancel_button.configure(state="disabled")
+                return True
+            def on_done(summary):
+                if not finish():
+                    return
+                state = "cancelado" if summary.cancelled else "calculado"
+                status_label.configure(text=f"Resumo {state} em {summary.seconds:.1f}s "
+                                            f"({summary.shards_done} fatia(s), {summary.workers or 1} processo(s)).")
+                period_text.delete("1.0", END)
+                period_text.insert(END, period_report.format_summary(summary))
+            def on_error(error):
+                if finish():
+                    status_label.configure(text="")
+                messagebox.showerror("Erro", f"Não foi possível calcular o resumo: {error}")
+            cancel_button.configure(command=cancel.set, state="normal")
+            run_button.configure(state="disabled")
+            status_label.configure(text="Preparando o cálculo...")
+            # Faixa à parte: as telas continuam respondendo enquanto os processos somam
+            self.dbq.call(period_report.summarize, date_from, date_to, bool(archive_checkbox.get()), None, cancel, on_progress,
+                          background=True, on_done=on_done, on_error=on_error)
+            show_progress()
+        run_button.configure(command=run)
+
+    def _build_diagnostics_screen(self, frame):
+        ctk.CTkLabel(frame, text="Diagnóstico do Banco de Dados", font=ctk.CTkFont(size=24, weight="bold")).pack(pady=(20, 5))
+        status_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=12))
+        status_label.pack()
+        buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        diagnostics_text = ctk.CTkTextbox(frame, width=900, height=330, font=ctk.CTkFont(family="Courier", size=12))
+        diagnostics_text.pack(pady=5, padx=10)
+        def refresh():
+            enabled = self.dbq.instrumentation is not None
+            toggle_button.configure(text="Desligar Medição" if enabled else "Ligar Medição")
+            snapshot = self.instrumentation.snapshot()
+            status_label.configure(text=f"Medição {'ligada' if enabled else 'desligada'} | desde {snapshot['since']} | "
+                                        f"consultas lentas (>= {snapshot['slow_threshold_ms']:g} ms) em {self.instrumentation.slow_log_path}")
+            lines = [f"{'Método':<28}{'Chamadas':>9}{'Média':>10}{'p95':>10}{'Máx.':>10}{'Total':>11}{'Linhas':>9}  (ms)\n"]
+            lines += [f"{name[:27]:<28}{m['count']:>9}{m['mean_ms']:>10.2f}{m['p95_ms']:>10g}{m['max_ms']:>10.2f}{m['total_ms']:>11.1f}{m['rows']:>9}\n"
+                      for name, m in snapshot['methods'].items()] or ["    (nada medido ainda)\n"]
+            lines += [f"\n{'Comandos SQL (mais tempo total primeiro)':<44}{'Exec.':>8}{'Média':>10}{'Máx.':>10}{'Total':>11}{'Parâm.':>8}\n"]
+            for st in snapshot['statements'][:30]:
+                lines.append(f"{'':<44}{st['count']:>8}{st['mean_ms']:>10.2f}{st['max_ms']:>10.2f}{st['total_ms']:>11.1f}{st['params']:>8}\n"
+                             f"    {st['sql'][:110]}\n    usado por: {', '.join(st['methods'])}\n")
+            diagnostics_text.delete("1.0", END)
+            diagnostics_text.insert(END, "".join(lines))
+        def toggle():
+            enabled = self.dbq.instrumentation is not None
+            self.dbq.set_instrumentation(None if enabled else self.instrumentation)
+            refresh()
+        def reset():
+            self.instrumentation.reset()
+            refresh()
+        def export():
+            from tkinter import filedialog
+            path = filedialog.asksaveasfilename(title="Exportar Diagnóstico", defaultextension=".json", filetypes=[("JSON", "*.json")])
+            if path:
+                self.instrumentation.export(path)
+                messagebox.showinfo("Sucesso", f"Diagnóstico exportado para {path}.")
+        toggle_button = ctk.CTkButton(buttons_frame, text="", command=toggle, width=150)
+        toggle_button.pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Atualizar", command=refresh, width=120).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Zerar", command=reset, width=120).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Exportar...", command=export, width=120).pack(side="left", padx=5)
+        refresh()
+        return refresh
 
 if __name__ == "__main__":
     app = MarcenariaApp()
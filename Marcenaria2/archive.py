@@ -0,0 +1,55 @@
+# archive.py
+"""Arquivo morto das encomendas: move as fechadas (entregues ou canceladas)
+antigas para marcenaria_arquivo.db, deixando as tabelas do dia a dia pequenas.
+
+Uso:
+    python archive.py run [--days 365]     move as fechadas há mais de 365 dias (retoma um lote interrompido)
+    python archive.py status               encomendas no banco principal e no arquivo morto
+"""
+import argparse
+import sys
+import time
+from database import DatabaseManager, ArchiveError
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquivo morto das encomendas.")
+    parser.add_argument('action', choices=['run', 'status'])
+    parser.add_argument('--db', default='marcenaria.db', help="Arquivo do banco de dados")
+    parser.add_argument('--archive', help="Arquivo do arquivo morto (padrão: <banco>_arquivo.db)")
+    parser.add_argument('--days', type=int, default=365, help="Idade mínima (em dias) das encomendas movidas")
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db, archive_name=args.archive)
+    started = time.perf_counter()
+    try:
+        if args.action == 'status':
+            summary = db.get_archive_summary()
+            if summary is None:
+                print(f"Ainda não há arquivo morto ({db.archive_name}).")
+                return 0
+            print(f"{summary['hot']} encomenda(s) no banco principal, {summary['archived']} no arquivo morto "
+                  f"({db.archive_name}).")
+            if summary['pending']:
+                print(f"{summary['pending']} encomenda(s) num lote interrompido: 'python archive.py run' termina o lote.")
+            return 0
+        show_progress = sys.stderr.isatty()
+        def progress(moved):
+            print(f"\r{moved} encomenda(s) movida(s)", end='', file=sys.stderr, flush=True)
+        try:
+            moved = db.archive_orders(args.days, args.batch_size, on_batch=progress if show_progress else None)
+        except ArchiveError as e:
+            print(f"\n{e}. Nada foi apagado deste lote; rode de novo para continuar.", file=sys.stderr)
+            return 1
+        finally:
+            if show_progress:
+                print(file=sys.stderr)
+        print(f"{moved} encomenda(s) movida(s) para {db.archive_name} em {time.perf_counter() - started:.2f}s.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
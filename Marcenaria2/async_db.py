@@ -0,0 +1,157 @@
+# async_db.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Executa os métodos do DatabaseManager fora da thread do Tk.
+
+    Cada chamada vai para uma "faixa" (um executor de uma thread só, com sua
+    própria conexão). Chamadas da mesma tela caem sempre na mesma faixa e,
+    portanto, rodam na ordem em que foram feitas. Os resultados voltam para a
+    thread do Tk por uma fila lida com after(); resultados de uma tela que o
+    usuário já deixou são descartados. Tarefas longas (ex.: exportações) vão
+    para uma faixa à parte, para não atrasar as telas.
+    """
+    POLL_INTERVAL_MS = 15
+
+    def __init__(self, root, db_name='marcenaria.db', workers=2, on_busy=None, factory=None):
+        self.root = root
+        self.db_name = db_name
+        # factory() cria o objeto de banco de cada thread; ex.: lambda: RemoteDatabase(url) para usar o server.py
+        self.factory = factory
+        self.on_busy = on_busy # Chamado com True/False quando começa/termina trabalho pendente
+        self._local = threading.local()
+        self._lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"db-{i}") for i in range(workers)]
+        self._background = None # Faixa das tarefas longas, criada no primeiro uso
+        self._results = queue.SimpleQueue()
+        self._generations = {}
+        self._pending = 0
+        self._closed = False
+        self.instrumentation = None # QueryInstrumentation ligada nas conexões, ou None
+        self._poll()
+
+    def _manager(self):
+        """DatabaseManager da thread atual (sqlite3 não compartilha conexões entre threads)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            if self.factory is not None:
+                db = self._local.db = self.factory()
+            else:
+                from database import DatabaseManager # Importado na thread do banco, fora da abertura da janela
+                db = self._local.db = DatabaseManager(self.db_name)
+            if self.instrumentation is not None:
+                self.instrumentation.attach(db)
+        return db
+
+    def set_instrumentation(self, instrumentation):
+        """Liga a medição de consultas (QueryInstrumentation) em todas as threads; None desliga."""
+        previous, self.instrumentation = self.instrumentation, instrumentation
+        def apply():
+            db = getattr(self._local, 'db', None)
+            if db is None:
+                return # _manager() liga a medição quando a conexão for aberta
+            if previous is not None:
+                previous.detach(db)
+            if instrumentation is not None:
+                instrumentation.attach(db)
+        for lane in self._all_lanes():
+            lane.submit(apply)
+
+    def warm_up(self, on_done=None):
+        """Abre as conexões e aplica as migrações em todas as faixas, sem bloquear.
+
+        Serve para preparar o banco enquanto a janela ainda está sendo montada.
+        on_done() é chamado na thread do Tk quando todas as faixas estiverem
+        prontas. Uma falha aqui só é mostrada no terminal: a primeira chamada
+        de verdade vai encontrá-la de novo e avisar o usuário.
+        """
+        futures = [lane.submit(self._manager) for lane in self._lanes]
+        def check():
+            if self._closed:
+                return
+            if not all(f.done() for f in futures):
+                self.root.after(self.POLL_INTERVAL_MS, check)
+                return
+            for f in futures:
+                if f.exception() is not None:
+                    print(f"DB Error on warm up: {f.exception()}")
+            if on_done:
+                on_done()
+        self.root.after(self.POLL_INTERVAL_MS, check)
+
+    def _lane(self, screen):
+        return self._lanes[hash(screen) % len(self._lanes)]
+
+    def _all_lanes(self):
+        return self._lanes + ([self._background] if self._background is not None else [])
+
+    def invalidate(self, screen):
+        """Descarta os resultados ainda pendentes de uma tela (ex.: o usuário saiu dela)."""
+        self._generations[screen] = self._generations.get(screen, 0) + 1
+
+    def call(self, method, *args, screen=None, on_done=None, on_error=None, background=False):
+        """Agenda db.<method>(*args) e retorna um Future.
+
+        method também pode ser uma função, chamada como method(db, *args).
+        on_done(resultado) ou on_error(exceção) são chamados na thread do Tk.
+        background=True usa a faixa das tarefas longas, com conexão própria, e
+        não liga o indicador de ocupado (a tela mostra o próprio progresso).
+        """
+        generation = self._generations.get(screen, 0)
+        if background:
+            if self._background is None:
+                self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-background")
+            lane = self._background
+        else:
+            self._set_pending(+1)
+            lane = self._lane(screen)
+        def run():
+            db = self._manager()
+            if callable(method):
+                return method(db, *args)
+            return getattr(db, method)(*args)
+        future = lane.submit(run)
+        future.add_done_callback(lambda f: self._results.put((f, screen, generation, not background, on_done, on_error)))
+        return future
+
+    def _set_pending(self, delta):
+        before = self._pending
+        self._pending += delta
+        if self.on_busy and (before == 0) != (self._pending == 0):
+            self.on_busy(self._pending > 0)
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                future, screen, generation, counted, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if counted:
+                self._set_pending(-1)
+            if self._generations.get(screen, 0) != generation:
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"DB Error on async call: {error}")
+            elif on_done:
+                on_done(future.result())
+        self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def close(self):
+        """Espera as chamadas em andamento e fecha as conexões de cada thread."""
+        self._closed = True
+        for lane in self._all_lanes():
+            lane.submit(self._close_thread_manager)
+            lane.shutdown(wait=True)
+
+    def _close_thread_manager(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
@@ -0,0 +1,30 @@
+# benchmarks/__init__.py
+"""Medições de desempenho do banco e das telas da Marcenaria.
+
+datagen gera um banco com volumes realistas (reprodutível pela semente) e
+bench mede cada operação, grava os percentis em JSON e compara com uma
+medição anterior. Rodar a partir da pasta Marcenaria2:
+
+    python -m benchmarks.datagen --db bench.db --products 100000 --orders 1000000
+    python -m benchmarks.bench --db bench.db --output atual.json --compare base.json
+
+export_memory confere que a exportação de encomendas (report_io) usa a mesma
+memória com mil ou com milhões de linhas:
+
+    python -m benchmarks.export_memory --sizes 100,10000,480000 --baseline
+
+write_throughput compara encomendas gravadas por segundo com um commit por
+encomenda, com group commit e com UnitOfWork:
+
+    python -m benchmarks.write_throughput --threads 32 --synchronous FULL
+
+model_memory compara a memória das linhas como modelos (models.py) com as
+tuplas e dicionários de antes:
+
+    python -m benchmarks.model_memory --orders 100000
+
+report_scaling mede o resumo do período (period_report) com 1, 2, 4...
+processos:
+
+    python -m benchmarks.report_scaling --orders 1000000
+"""
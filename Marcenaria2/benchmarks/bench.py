@@ -0,0 +1,232 @@
+# benchmarks/bench.py
+"""Mede as operações do DatabaseManager e o desenho das listas, com percentis em JSON.
+
+Sem --db, gera um banco pequeno temporário (benchmarks.datagen). Com --db, o
+banco é copiado antes das medições, porque algumas operações gravam; assim
+cada execução parte do mesmo estado. --compare aponta regressões em relação
+a um JSON salvo antes (código de saída 1 se houver alguma).
+
+Uso: python -m benchmarks.bench [--db bench.db] [--output atual.json] [--compare base.json]
+                                [--threshold 0.2] [--only nome] [--repeat 1.0] [--seed 42] [--trace]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import datetime
+from database import DatabaseManager
+from instrumentation import QueryInstrumentation
+from benchmarks import datagen, headless
+
+DEFAULT_PRODUCTS = 5000
+DEFAULT_ORDERS = 20000
+STATUSES = ["Pendente", "Em Produção", "Concluído", "Entregue", "Cancelado"]
+MIN_REGRESSION_MS = 0.05 # Diferenças menores que isso são ruído, mesmo que a razão seja grande
+
+
+class Context:
+    """Estado compartilhado pelos casos: banco aberto, sorteios e ids existentes."""
+    def __init__(self, db, seed):
+        self.db = db
+        self.rng = random.Random(seed)
+        self.product_ids = [row[0] for row in db.conn.execute('SELECT id FROM products')]
+        self.max_order_id = db.conn.execute('SELECT MAX(id) FROM orders').fetchone()[0] or 0
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+    def order_id(self):
+        return self.rng.randint(1, self.max_order_id)
+
+
+def _drop_product_cache(ctx):
+    # Mesmo efeito de uma gravação feita por outro terminal
+    ctx.db._product_cache = ctx.db._product_list = None
+
+
+def _verify_random_user(ctx):
+    username = f"bench{ctx.rng.randrange(datagen.BENCH_USERS)}"
+    return ctx.db.verify_user(username, username)
+
+
+def _random_items(ctx):
+    return [{'id': ctx.product_id(), 'quantity': ctx.rng.randint(1, 5)} for _ in range(ctx.rng.randint(1, 20))]
+
+
+def _render_product_list(ctx):
+    from app import MarcenariaApp
+    headless.render(ctx.db.get_products_page, MarcenariaApp._format_product_rows, lambda p: p.id, pages=10,
+                    header=MarcenariaApp.PRODUCT_LIST_HEADER, first_key=0)
+
+
+def _render_reports(ctx):
+    from app import MarcenariaApp
+    headless.render(lambda after, limit: ctx.db.find_orders(limit=limit, after=after, with_items=True),
+                    lambda orders: "".join(map(MarcenariaApp._format_report_order, orders)),
+                    lambda order: (order.order_date, order.id), pages=10, page_size=50)
+
+
+def _client_prefix(ctx):
+    return ctx.rng.choice(datagen.FIRST_NAMES)[:ctx.rng.randint(3, 6)].lower()
+
+
+def _find_orders_in_month(ctx):
+    month = datetime.date.today().replace(day=15) - datetime.timedelta(days=30 * ctx.rng.randrange(12))
+    return ctx.db.find_orders(statuses=ctx.rng.sample(STATUSES, 2), date_from=month.strftime('%Y-%m-01'),
+                              date_to=month.strftime('%Y-%m-31'))
+
+
+def _find_orders_next_page(ctx):
+    status = ctx.rng.choice(STATUSES)
+    first = ctx.db.find_orders(statuses=[status], limit=50)
+    if first:
+        ctx.db.find_orders(statuses=[status], limit=50, after=(first[-1].order_date, first[-1].id))
+
+
+# nome -> (função(ctx), preparação(ctx) fora da medição ou None, repetições)
+CASES = {
+    'verify_user': (lambda ctx: _verify_random_user(ctx), None, 2000),
+    'get_product': (lambda ctx: ctx.db.get_product(ctx.product_id()), None, 2000),
+    'get_order_status': (lambda ctx: ctx.db.get_order_status(ctx.order_id()), None, 2000),
+    'get_all_products': (lambda ctx: ctx.db.get_all_products(), None, 200),
+    'get_all_products (sem cache)': (lambda ctx: ctx.db.get_all_products(), _drop_product_cache, 20),
+    'get_products_page': (lambda ctx: ctx.db.get_products_page(ctx.rng.choice(ctx.product_ids), 100), None, 500),
+    'search_products': (lambda ctx: ctx.db.search_products(ctx.rng.choice(["mesa", "cadeira ced", "ipê", "arm", "12"]), 8), None, 500),
+    'create_order': (lambda ctx: ctx.db.create_order("Cliente Benchmark", _random_items(ctx)), None, 300),
+    'update_order_status': (lambda ctx: ctx.db.update_order_status(ctx.order_id(), ctx.rng.choice(STATUSES)), None, 300),
+    'bulk_update_order_status (100)': (lambda ctx: ctx.db.bulk_update_order_status(
+        ctx.rng.choice(STATUSES), [ctx.order_id() for _ in range(100)]), None, 50),
+    'get_orders_by_status': (lambda ctx: ctx.db.get_orders_by_status(ctx.rng.choice(STATUSES), None, 200), None, 300),
+    'find_orders (cliente)': (lambda ctx: ctx.db.find_orders(client_prefix=_client_prefix(ctx)), None, 500),
+    'find_orders (status e mês)': (_find_orders_in_month, None, 500),
+    'find_orders (duas páginas)': (_find_orders_next_page, None, 300),
+    'get_status_timeline': (lambda ctx: ctx.db.get_status_timeline(ctx.order_id()), None, 2000),
+    'get_lead_times': (lambda ctx: ctx.db.get_lead_times('Pendente', ctx.rng.choice(STATUSES[1:]), 90), None, 50),
+    'get_orders_page': (lambda ctx: ctx.db.get_orders_page(ctx.rng.randint(1, ctx.max_order_id + 1), 50), None, 300),
+    'get_full_report': (lambda ctx: ctx.db.get_full_report(), None, 3),
+    'get_monthly_revenue': (lambda ctx: ctx.db.get_monthly_revenue(12), None, 200),
+    'get_status_summary': (lambda ctx: ctx.db.get_status_summary(12), None, 200),
+    'get_top_products': (lambda ctx: ctx.db.get_top_products(30, 10), None, 100),
+    'render refresh_product_list': (_render_product_list, None, 50),
+    'render show_reports': (_render_reports, None, 20),
+}
+
+
+def percentile(values, fraction):
+    """Percentil por interpolação linear (values já ordenado)."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def summarize(seconds):
+    values = sorted(s * 1000 for s in seconds)
+    return {'n': len(values), 'mean_ms': sum(values) / len(values), 'min_ms': values[0],
+            'p50_ms': percentile(values, 0.50), 'p90_ms': percentile(values, 0.90),
+            'p95_ms': percentile(values, 0.95), 'p99_ms': percentile(values, 0.99), 'max_ms': values[-1]}
+
+
+def run_case(ctx, function, setup, repetitions, warmup=3):
+    for _ in range(min(warmup, repetitions)):
+        if setup:
+            setup(ctx)
+        function(ctx)
+    timings = []
+    for _ in range(repetitions):
+        if setup:
+            setup(ctx)
+        started = time.perf_counter()
+        function(ctx)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def compare(results, baseline, threshold):
+    """Lista (caso, métrica, base, atual) das métricas que pioraram mais que threshold."""
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if (current[metric] > previous[metric] * (1 + threshold)
+                    and current[metric] - previous[metric] > MIN_REGRESSION_MS):
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def _copy_database(source, target):
+    src = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="Banco já gerado (padrão: um banco temporário pequeno)")
+    parser.add_argument('--products', type=int, default=DEFAULT_PRODUCTS, help="Produtos do banco temporário")
+    parser.add_argument('--orders', type=int, default=DEFAULT_ORDERS, help="Encomendas do banco temporário")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', action='append', help="Mede só os casos cujo nome contém este texto")
+    parser.add_argument('--repeat', type=float, default=1.0, help="Multiplica o número de repetições de cada caso")
+    parser.add_argument('--output', help="Arquivo JSON com os resultados")
+    parser.add_argument('--compare', help="JSON de uma medição anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Piora tolerada (0.2 = 20%%)")
+    parser.add_argument('--trace', action='store_true', help="Mede com a QueryInstrumentation ligada (custo da medição)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'bench.db')
+        if args.db:
+            _copy_database(args.db, db_name)
+        else:
+            print(f"Gerando banco temporário ({args.products} produtos, {args.orders} encomendas)...")
+            datagen.generate(db_name, args.products, args.orders, seed=args.seed)
+        db = DatabaseManager(db_name)
+        ctx = Context(db, args.seed)
+        if args.trace:
+            QueryInstrumentation(slow_log_path=os.path.join(tmp, 'slow_queries.log')).attach(db)
+        results = {'meta': {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                            'platform': platform.platform(), 'db': args.db or 'temporário', 'seed': args.seed,
+                            'products': len(ctx.product_ids), 'orders': ctx.max_order_id, 'trace': args.trace},
+                   'results': {}}
+        try:
+            for name, (function, setup, repetitions) in CASES.items():
+                if args.only and not any(text in name for text in args.only):
+                    continue
+                summary = run_case(ctx, function, setup, max(1, int(repetitions * args.repeat)))
+                results['results'][name] = summary
+                print(f"  {name:<30} n={summary['n']:<5} p50 {summary['p50_ms']:9.3f} ms  "
+                      f"p95 {summary['p95_ms']:9.3f} ms  p99 {summary['p99_ms']:9.3f} ms")
+        finally:
+            db.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, previous, current in regressions:
+            print(f"REGRESSÃO {name} {metric}: {previous:.3f} ms -> {current:.3f} ms (+{(current / previous - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.threshold * 100:.0f}% em relação a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/datagen.py
+"""Gera um banco de dados sintético de marcenaria, reprodutível pela semente.
+
+Uso: python -m benchmarks.datagen [--db bench.db] [--products 100000] [--orders 1000000]
+                                  [--max-items 20] [--days 730] [--seed 42]
+"""
+import argparse
+import datetime
+import random
+import time
+from database import DatabaseManager
+
+BATCH_ORDERS = 10000 # Encomendas por transação
+BENCH_USERS = 50 # Usuários bench0..bench49, senha igual ao nome
+
+PIECES = ['Mesa', 'Cadeira', 'Armário', 'Estante', 'Cômoda', 'Banco', 'Rack', 'Escrivaninha', 'Cama',
+          'Criado-mudo', 'Sapateira', 'Prateleira', 'Balcão', 'Guarda-roupa', 'Aparador', 'Painel']
+WOODS = ['Pinus', 'Cedro', 'Imbuia', 'Peroba', 'Jatobá', 'Ipê', 'Carvalho', 'Freijó', 'MDF', 'Eucalipto']
+FINISHES = ['envernizado', 'laqueado branco', 'rústico', 'encerado', 'natural', 'tingido tabaco']
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+               'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago']
+LAST_NAMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Carvalho', 'Ferreira',
+              'Rodrigues', 'Almeida', 'Costa', 'Gomes', 'Ribeiro', 'Martins']
+# Encomendas antigas já foram entregues; as recentes ainda estão em andamento
+OLD_STATUSES = (['Entregue'] * 85 + ['Concluído'] * 5 + ['Cancelado'] * 10)
+RECENT_STATUSES = (['Pendente'] * 40 + ['Em Produção'] * 35 + ['Concluído'] * 15 + ['Entregue'] * 5 + ['Cancelado'] * 5)
+RECENT_DAYS = 30
+MAX_LEAD_HOURS = 24 * 20 # Prazo máximo sorteado entre a criação e o status atual
+
+
+def generate_products(rng, count):
+    """Gera (None, nome, descrição, preço) para upsert_products."""
+    for _ in range(count):
+        piece, wood = rng.choice(PIECES), rng.choice(WOODS)
+        size = rng.choice([60, 80, 90, 120, 140, 160, 180, 200])
+        name = f"{piece} {wood} {size}cm"
+        description = f"{piece} em {wood.lower()} {rng.choice(FINISHES)}, {size} cm"
+        yield (None, name, description, round(rng.uniform(80, 4000), 2))
+
+
+def generate(db_name, products=100000, orders=1000000, max_items=20, days=730, seed=42, on_progress=None):
+    """Preenche db_name com usuários, produtos e encomendas (com 1 a max_items itens cada).
+
+    As encomendas ficam distribuídas pelos últimos 'days' dias, com ids
+    crescendo junto com a data, como acontece no uso real. O histórico de
+    status tem a criação e, se a encomenda já saiu de Pendente, uma mudança
+    direta para o status atual.
+    """
+    rng = random.Random(seed)
+    history_rng = random.Random(seed + 1) # Separado: os dados das encomendas não mudam com o histórico
+    db = DatabaseManager(db_name)
+    try:
+        for i in range(BENCH_USERS):
+            if not db.check_user_exists(f"bench{i}"):
+                db.add_user(f"bench{i}", f"bench{i}")
+
+        first_product = (db.conn.execute('SELECT MAX(id) FROM products').fetchone()[0] or 0) + 1
+        batch = []
+        for row in generate_products(rng, products):
+            batch.append(row)
+            if len(batch) >= BATCH_ORDERS:
+                db.upsert_products(batch)
+                batch = []
+        if batch:
+            db.upsert_products(batch)
+        prices = dict(db.conn.execute('SELECT id, price FROM products WHERE id >= ?', (first_product,)).fetchall()) # Centavos
+        product_ids = list(prices)
+        if orders and not product_ids:
+            raise ValueError("É preciso gerar produtos para gerar encomendas")
+
+        today = datetime.date.today()
+        clients = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+        next_order_id = (db.conn.execute('SELECT MAX(id) FROM orders').fetchone()[0] or 0) + 1
+        created = 0
+        while created < orders:
+            count = min(BATCH_ORDERS, orders - created)
+            order_rows, item_rows, history_rows = [], [], []
+            for i in range(created, created + count):
+                age = days - 1 - i * days // orders
+                day = (today - datetime.timedelta(days=age)).isoformat()
+                status = rng.choice(RECENT_STATUSES if age < RECENT_DAYS else OLD_STATUSES)
+                items = [(next_order_id, prod_id, rng.randint(1, 5), prices[prod_id])
+                         for prod_id in (rng.choice(product_ids) for _ in range(rng.randint(1, max_items)))]
+                total = sum(quantity * unit_price for _, _, quantity, unit_price in items) # Centavos
+                order_rows.append((next_order_id, rng.choice(clients), day, status, total))
+                item_rows.extend(items)
+                created_at = datetime.datetime.combine(today - datetime.timedelta(days=age), datetime.time(8))
+                history_rows.append((next_order_id, None, 'Pendente', created_at.isoformat(' ')))
+                if status != 'Pendente':
+                    changed_at = created_at + datetime.timedelta(hours=history_rng.uniform(1, min(MAX_LEAD_HOURS, 24 * age + 1)))
+                    history_rows.append((next_order_id, 'Pendente', status, changed_at.isoformat(' ', 'seconds')))
+                next_order_id += 1
+
+            def insert_batch(conn):
+                conn.executemany('INSERT INTO orders (id, client_name, order_date, status, total) VALUES (?, ?, ?, ?, ?)', order_rows)
+                conn.executemany('INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)', item_rows)
+                conn.executemany('INSERT INTO order_status_history (order_id, old_status, new_status, changed_at) '
+                                 'VALUES (?, ?, ?, ?)', history_rows)
+            db.connections.run_write(insert_batch)
+            created += count
+            if on_progress:
+                on_progress(created, orders)
+        # Os agregados das análises são recalculados uma vez no fim, em vez de encomenda por encomenda
+        db.rebuild_rollups()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench.db')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--max-items', type=int, default=20)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    def progress(created, total):
+        print(f"\r{created}/{total} encomendas", end='', flush=True)
+    generate(args.db, args.products, args.orders, args.max_items, args.days, args.seed, on_progress=progress)
+    print(f"\n{args.products} produtos e {args.orders} encomendas gerados em {args.db} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
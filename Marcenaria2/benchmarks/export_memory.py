@@ -0,0 +1,112 @@
+# benchmarks/export_memory.py
+"""Mostra que a memória da exportação de encomendas não cresce com o volume.
+
+Para cada tamanho gera um banco (benchmarks.datagen) e exporta num processo
+novo. O pico de memória (RSS) do processo é zerado logo antes da exportação
+(/proc/self/clear_refs, Linux) e lido no fim: a diferença para a memória de
+antes é o que a exportação usou, incluindo a do SQLite. Com
+--baseline mede também o jeito antigo de tirar os dados (o relatório inteiro
+montado como um texto só, como a tela de relatórios fazia), para comparação.
+
+Cerca de 10,5 itens por encomenda: --sizes 100,10000,480000 dá de 1 mil a 5
+milhões de linhas.
+
+Uso: python -m benchmarks.export_memory [--sizes 100,10000,100000] [--format csv|jsonl|csv.gz|jsonl.gz]
+                                        [--baseline] [--max-growth-mb 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks import datagen
+
+BASELINE_MAX_ORDERS = 100000 # Acima disso o jeito antigo pode esgotar a memória da máquina
+
+
+def _rss_mb(field):
+    """VmRSS (atual) ou VmHWM (pico) do processo, em MB."""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} indisponível")
+
+
+def _reset_peak_rss():
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5') # Faz o pico (VmHWM) voltar ao uso atual
+
+
+def _child(db_name, path, mode):
+    """Roda dentro do processo novo: exporta (ou monta o texto) e imprime as medidas em JSON."""
+    import report_io
+    from app import MarcenariaApp
+    from database import DatabaseManager
+    db = DatabaseManager(db_name)
+    db.count_orders() # Abre a conexão de leitura antes de medir
+    _reset_peak_rss()
+    before = _rss_mb('VmRSS')
+    started = time.perf_counter()
+    if mode == 'export':
+        result = report_io.export_orders(db, path)
+        rows, size = result.rows, os.path.getsize(path)
+    else:
+        text = "".join(map(MarcenariaApp._format_report_order, db.get_full_report()))
+        rows, size = text.count("\n"), len(text.encode('utf-8'))
+    elapsed = time.perf_counter() - started
+    peak = _rss_mb('VmHWM')
+    db.close()
+    print(json.dumps({'rows': rows, 'bytes': size, 'seconds': elapsed, 'rss_before_mb': before, 'rss_peak_mb': peak}))
+
+
+def _measure(db_name, path, mode):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.export_memory', '--child', db_name, path, mode],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,10000,100000', help="Encomendas de cada banco, separadas por vírgula")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--format', default='csv', choices=['csv', 'jsonl', 'csv.gz', 'jsonl.gz'])
+    parser.add_argument('--baseline', action='store_true', help="Mede também o relatório montado como texto")
+    parser.add_argument('--max-growth-mb', type=float, default=20,
+                        help="Diferença máxima aceita entre o maior e o menor pico (código de saída 1 se passar)")
+    parser.add_argument('--child', nargs=3, metavar=('DB', 'ARQUIVO', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"{'Encomendas':>10} {'Linhas':>10} {'Modo':<8} {'Arquivo (MB)':>12} {'Tempo (s)':>10} {'Memória usada (MB)':>19}")
+    used = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for orders in sizes:
+            db_name = os.path.join(tmp, f'export_{orders}.db')
+            datagen.generate(db_name, min(args.products, max(orders, 1)), orders)
+            modes = ['export'] + (['texto'] if args.baseline and orders <= BASELINE_MAX_ORDERS else [])
+            for mode in modes:
+                path = os.path.join(tmp, f'export_{orders}.{args.format}')
+                result = _measure(db_name, path, mode)
+                delta = result['rss_peak_mb'] - result['rss_before_mb']
+                if mode == 'export':
+                    used.append(delta)
+                print(f"{orders:>10} {result['rows']:>10} {mode:<8} {result['bytes'] / 1e6:>12.1f} "
+                      f"{result['seconds']:>10.2f} {delta:>19.1f}")
+                if os.path.exists(path):
+                    os.remove(path)
+            os.remove(db_name)
+    growth = max(used) - min(used)
+    print(f"Diferença entre o maior e o menor pico da exportação: {growth:.1f} MB")
+    if growth > args.max_growth_mb:
+        print(f"A memória cresceu mais que {args.max_growth_mb:g} MB com o volume.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# benchmarks/headless.py
+"""Desenho das listas paginadas sem janela, para medir formatação e paginação.
+
+StubTextbox imita o pedaço da API do CTkTextbox que o PagedTextView usa
+(insert, delete, yview, index, after), guardando o texto numa string.
+"""
+from tkinter import END
+from widgets import PagedTextView
+
+
+class StubTextbox:
+    VISIBLE_LINES = 25
+
+    def __init__(self):
+        self.text = ""
+        self.top = 1 # Primeira linha visível
+        self.pending = None # Último callback agendado com after()
+
+    def _offset(self, index):
+        if index in (END, "end-1c"):
+            return len(self.text)
+        line, column = map(int, index.split("."))
+        position = 0
+        for _ in range(line - 1):
+            position = self.text.find("\n", position) + 1
+            if position == 0:
+                return len(self.text)
+        return position + column
+
+    def line_count(self):
+        return self.text.count("\n") + 1
+
+    def insert(self, index, text):
+        position = self._offset(index)
+        self.text = self.text[:position] + text + self.text[position:]
+
+    def delete(self, start, end):
+        self.text = self.text[:self._offset(start)] + self.text[self._offset(end):]
+
+    def yview(self, *args):
+        if args:
+            self.top = int(args[0].split(".")[0])
+            return None
+        lines = self.line_count()
+        return (self.top - 1) / lines, min(1.0, (self.top - 1 + self.VISIBLE_LINES) / lines)
+
+    def index(self, index):
+        return f"{self.top}.0"
+
+    def winfo_exists(self):
+        return True
+
+    def winfo_ismapped(self):
+        return True
+
+    def after(self, ms, callback):
+        self.pending = callback
+
+    def scroll_to_end(self):
+        self.top = max(1, self.line_count() - self.VISIBLE_LINES)
+
+
+def render(fetch_page, format_rows, key_of, pages, **options):
+    """Abre a lista e rola até o fim 'pages' vezes (cada vez carrega uma página nova).
+
+    fetch_page(chave, limite) devolve as linhas na hora. Retorna o StubTextbox.
+    """
+    textbox = StubTextbox()
+    view = PagedTextView(textbox, lambda key, limit, on_rows, on_error: on_rows(fetch_page(key, limit)),
+                         format_rows, key_of, **options)
+    for _ in range(pages):
+        textbox.scroll_to_end()
+        textbox.pending() # Um ciclo do _poll: pede e desenha a próxima página
+    return textbox
@@ -0,0 +1,127 @@
+# benchmarks/model_memory.py
+"""Memória ocupada pelas linhas lidas do banco: modelos (models.py) contra as
+tuplas e dicionários de antes.
+
+Cada caso monta o resultado inteiro e mede (tracemalloc) quanto dele continua
+na memória do Python; a memória do próprio SQLite não entra. Os casos do
+jeito antigo repetem aqui as consultas e o agrupamento que o DatabaseManager
+fazia: produtos em tuplas e o relatório como {'order': tupla, 'items': [(nome,
+quantidade), ...]}, com o nome do produto repetido em cada item.
+
+Uso: python -m benchmarks.model_memory [--db bench.db] [--products 5000] [--orders 100000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from database import DatabaseManager
+from models import Product
+from benchmarks import datagen
+
+PRODUCTS_SQL = 'SELECT id, name, description, price / 100.0 FROM products'
+
+
+def _product_tuples(db):
+    return db.connections.reader().execute(PRODUCTS_SQL).fetchall()
+
+
+def _product_models(db):
+    return db._rows_as(Product).execute(PRODUCTS_SQL).fetchall()
+
+
+def _report_dicts(db):
+    """O relatório como get_full_report montava antes dos modelos."""
+    cursor = db.connections.reader().execute('''
+        SELECT o.id, o.client_name, o.order_date, o.status, o.total / 100.0, p.name, oi.quantity
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN products p ON oi.product_id = p.id
+        ORDER BY o.id DESC, oi.item_id
+    ''')
+    report, order, items = [], None, []
+    for order_id, client, date, status, total, product_name, quantity in cursor:
+        if order is None or order[0] != order_id:
+            if order is not None:
+                report.append({'order': order, 'items': items})
+            order, items = (order_id, client, date, status, total), []
+        if product_name is not None:
+            items.append((product_name, quantity))
+    if order is not None:
+        report.append({'order': order, 'items': items})
+    return report
+
+
+def _report_models(db):
+    return db.get_full_report()
+
+
+def _report_models_loaded(db):
+    report = db.get_full_report()
+    for order in report:
+        order.items
+    return report
+
+
+CASES = [
+    ('produtos', 'tuplas', _product_tuples),
+    ('produtos', 'Product', _product_models),
+    ('relatório', 'tuplas e dicionários', _report_dicts),
+    ('relatório', 'Order, itens não lidos', _report_models),
+    ('relatório', 'Order, itens lidos', _report_models_loaded),
+]
+
+
+def measure(db, build):
+    """(linhas, segundos, bytes que o resultado ocupa) de build(db)."""
+    gc.collect()
+    started = time.perf_counter()
+    rows = len(build(db))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build(db)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        del result
+    finally:
+        tracemalloc.stop()
+    return rows, elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="Banco já gerado (benchmarks.datagen); sem ele, gera um temporário")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = args.db
+        if db_name is None:
+            db_name = os.path.join(tmp, 'models.db')
+            datagen.generate(db_name, args.products, args.orders)
+        db = DatabaseManager(db_name)
+        try:
+            items = db.conn.execute('SELECT COUNT(*) FROM order_items').fetchone()[0]
+            print(f"{'Dados':<10} {'Representação':<24} {'Linhas':>8} {'Tempo (s)':>10} {'Memória (MB)':>13} "
+                  f"{'Bytes/linha':>12} {'Economia':>9}")
+            baseline = {}
+            for data, name, build in CASES:
+                rows, elapsed, retained = measure(db, build)
+                per_row = retained / max(rows, 1)
+                saving = f"{1 - per_row / baseline[data]:>9.0%}" if data in baseline else f"{'-':>9}"
+                baseline.setdefault(data, per_row)
+                print(f"{data:<10} {name:<24} {rows:>8} {elapsed:>10.2f} {retained / 1e6:>13.1f} {per_row:>12.0f} {saving}")
+            print(f"Linhas do relatório são encomendas, com os {items} itens delas incluídos.")
+        finally:
+            db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/report_scaling.py
+"""Tempo do resumo do período (period_report) com 1, 2, 4... processos.
+
+Gera um banco grande (benchmarks.datagen), ou usa --db, e soma o histórico
+inteiro com cada quantidade de processos: "0" é o cálculo neste processo, sem
+ProcessPoolExecutor, e é a base da aceleração. O tempo inclui abrir os
+processos, como no uso real. Confere também que todos os resultados são
+iguais ao da base.
+
+A aceleração depende dos núcleos livres: com um núcleo só, mais processos
+apenas somam o custo de abri-los.
+
+Uso: python -m benchmarks.report_scaling [--db bench.db] [--orders 200000] [--workers 0,1,2,4] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import period_report
+from database import DatabaseManager
+from benchmarks import datagen
+
+
+def _result(summary):
+    return summary.orders, summary.by_status, summary.monthly, summary.top_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="Banco já gerado (benchmarks.datagen); sem ele, gera um temporário")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--workers', help="Quantidades de processos, separadas por vírgula (padrão: 0 e potências de 2 até os núcleos)")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções de cada quantidade (vale a mais rápida)")
+    args = parser.parse_args()
+
+    cores = period_report.default_workers(sys.maxsize)
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(',')]
+    else:
+        counts = [0] + [2 ** power for power in range(cores.bit_length()) if 2 ** power < cores] + [cores]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = args.db
+        if db_name is None:
+            db_name = os.path.join(tmp, 'scaling.db')
+            datagen.generate(db_name, args.products, args.orders)
+        db = DatabaseManager(db_name)
+        try:
+            print(f"{cores} núcleo(s) disponível(is), {db.count_orders()} encomenda(s)")
+            print(f"{'Processos':>9} {'Fatias':>7} {'Tempo (s)':>10} {'Aceleração':>11} {'Eficiência':>11}")
+            base = expected = None
+            for workers in counts:
+                best = None
+                for _ in range(args.repeat):
+                    summary = period_report.summarize(db, workers=workers)
+                    best = summary.seconds if best is None else min(best, summary.seconds)
+                if expected is None:
+                    expected = _result(summary)
+                elif _result(summary) != expected:
+                    raise RuntimeError(f"Resultado com {workers} processo(s) diferente do da base")
+                base = base or best
+                speedup = base / best
+                print(f"{workers:>9} {summary.shards:>7} {best:>10.2f} {speedup:>10.2f}x {speedup / max(workers, 1):>11.0%}")
+        finally:
+            db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
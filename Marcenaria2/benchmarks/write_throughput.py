@@ -0,0 +1,109 @@
+# benchmarks/write_throughput.py
+"""Encomendas gravadas por segundo com e sem juntar as escritas num só commit.
+
+Modos, cada um numa cópia nova do mesmo banco (benchmarks.datagen):
+    individual   várias threads chamando create_order, um commit por encomenda
+    group        as mesmas threads com o group commit do ConnectionManager
+    unit         uma thread gravando as encomendas em UnitOfWork de --batch em --batch
+
+Com --synchronous FULL cada commit espera o fsync, que é onde juntar
+escritas faz mais diferença; em NORMAL (o padrão do sistema) o ganho vem de
+gravar no WAL uma vez só as páginas que todas as encomendas do lote mudam.
+
+Uso: python -m benchmarks.write_throughput [--threads 8] [--orders 4000] [--window-ms 0]
+                                           [--batch 50] [--synchronous NORMAL FULL]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from connection import ConnectionManager
+from database import DatabaseManager, UnitOfWork
+from benchmarks import datagen
+
+
+def _orders(seed, product_ids, count):
+    rng = random.Random(seed)
+    return [[{'id': rng.choice(product_ids), 'quantity': rng.randint(1, 5)} for _ in range(rng.randint(1, 10))]
+            for _ in range(count)]
+
+
+def run_mode(db_name, mode, synchronous, threads, orders, window_ms, batch):
+    """Grava as encomendas no modo dado e retorna (segundos, commits, encomendas gravadas)."""
+    connections = ConnectionManager(db_name, synchronous=synchronous, group_commit_ms=window_ms if mode == 'group' else None)
+    db = DatabaseManager(db_name, connections)
+    product_ids = [product.id for product in db.get_all_products()]
+    if mode == 'unit':
+        threads = 1
+    work = [_orders(seed, product_ids, orders // threads) for seed in range(threads)]
+    saved = [0] * threads
+    commits = [0] * threads
+    def worker(index):
+        if mode == 'unit':
+            uow = UnitOfWork()
+            for items in work[index]:
+                uow.create_order(f"Cliente {index}", items)
+                if len(uow) == batch:
+                    saved[index] += sum(result is not None for result in uow.commit(db))
+                    commits[index] += 1
+            if len(uow):
+                saved[index] += sum(result is not None for result in uow.commit(db))
+                commits[index] += 1
+        else:
+            for items in work[index]:
+                saved[index] += db.create_order(f"Cliente {index}", items) is not None
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if mode == 'group':
+        total_commits = connections.group_commits
+    elif mode == 'unit':
+        total_commits = sum(commits)
+    else:
+        total_commits = sum(saved)
+    problems = db.check_rollups()
+    db.close()
+    if problems:
+        raise RuntimeError(f"Agregados inconsistentes depois do modo {mode}: {problems[:3]}")
+    return elapsed, total_commits, sum(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=4000, help="Encomendas gravadas em cada modo")
+    parser.add_argument('--window-ms', type=float, default=0,
+                        help="Espera do group commit pelas outras escritas (0 = só as que chegaram durante o commit anterior)")
+    parser.add_argument('--batch', type=int, default=50, help="Encomendas por UnitOfWork no modo unit")
+    parser.add_argument('--synchronous', nargs='+', default=['NORMAL', 'FULL'])
+    parser.add_argument('--modes', nargs='+', default=['individual', 'group', 'unit'])
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--base-orders', type=int, default=20000, help="Encomendas já existentes no banco")
+    args = parser.parse_args()
+
+    print(f"{'Modo':<11} {'synchronous':<11} {'Threads':>7} {'Encomendas/s':>13} {'Commits':>8} {'Encomendas/commit':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        datagen.generate(base, args.products, args.base_orders)
+        for synchronous in args.synchronous:
+            for mode in args.modes:
+                db_name = os.path.join(tmp, f'{mode}_{synchronous}.db')
+                shutil.copyfile(base, db_name)
+                elapsed, commits, saved = run_mode(db_name, mode, synchronous, args.threads, args.orders,
+                                                   args.window_ms, args.batch)
+                threads = 1 if mode == 'unit' else args.threads
+                print(f"{mode:<11} {synchronous:<11} {threads:>7} {saved / elapsed:>13.0f} {commits:>8} "
+                      f"{saved / max(commits, 1):>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
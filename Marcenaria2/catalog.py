@@ -0,0 +1,41 @@
+# catalog.py
+"""Importa ou exporta o catálogo de produtos pela linha de comando.
+
+Uso:
+    python catalog.py import produtos.csv      (também .json ou .jsonl)
+    python catalog.py export produtos.csv
+"""
+import argparse
+import sys
+import time
+import catalog_io
+from database import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação/exportação do catálogo de produtos.")
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('path', help="Arquivo .csv, .json ou .jsonl")
+    parser.add_argument('--db', default='marcenaria.db', help="Arquivo do banco de dados")
+    parser.add_argument('--batch-size', type=int, default=catalog_io.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    started = time.perf_counter()
+    try:
+        if args.action == 'import':
+            result = catalog_io.import_products(db, args.path, batch_size=args.batch_size)
+            for line, message in result.errors:
+                print(f"Linha {line}: {message}", file=sys.stderr)
+            print(f"{result.imported} produto(s) importado(s), {len(result.errors)} erro(s) "
+                  f"em {time.perf_counter() - started:.2f}s.")
+            return 1 if result.errors else 0
+        count = catalog_io.export_products(db, args.path)
+        print(f"{count} produto(s) exportado(s) em {time.perf_counter() - started:.2f}s.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
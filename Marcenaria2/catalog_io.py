@@ -0,0 +1,221 @@
+# catalog_io.py
+"""Importação e exportação do catálogo de produtos em CSV, JSON ou JSON Lines.
+
+Os arquivos são lidos e escritos aos poucos (sem carregar tudo na memória) e
+os produtos são gravados em lotes, cada lote numa única transação.
+"""
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+IMPORT_BATCH_SIZE = 5000
+FIELDS = ('id', 'name', 'description', 'price')
+# Cabeçalhos aceitos nas planilhas, além dos nomes das colunas da tabela
+FIELD_ALIASES = {'codigo': 'id', 'código': 'id', 'nome': 'name', 'descricao': 'description',
+                 'descrição': 'description', 'preco': 'price', 'preço': 'price'}
+
+
+class CatalogImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.errors = [] # (linha/registro, mensagem)
+
+    def __repr__(self):
+        return f"CatalogImportResult(imported={self.imported}, errors={len(self.errors)})"
+
+
+def file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext == '.json':
+        return 'json'
+    raise ValueError(f"Formato de arquivo não suportado: {ext or path}")
+
+
+def parse_price(value):
+    """Converte o preço da planilha ("1234.5", "1.234,50", 99) para float; recusa valores inválidos."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        price = Decimal(str(value))
+    else:
+        text = str(value or '').strip().replace('R$', '').strip()
+        if ',' in text:
+            # Formato brasileiro: ponto como milhar e vírgula como decimal
+            text = text.replace('.', '').replace(',', '.')
+        try:
+            price = Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"preço inválido: {value!r}")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"preço inválido: {value!r}")
+    if price != price.quantize(Decimal('0.01')):
+        raise ValueError(f"preço com mais de duas casas decimais: {value!r}")
+    return float(price)
+
+
+def _normalize_record(record):
+    normalized = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        normalized[FIELD_ALIASES.get(key, key)] = value
+    return normalized
+
+
+def _validate(record):
+    record = _normalize_record(record)
+    name = str(record.get('name') or '').strip()
+    if not name:
+        raise ValueError("nome é obrigatório")
+    prod_id = record.get('id')
+    if prod_id in (None, ''):
+        prod_id = None
+    else:
+        try:
+            prod_id = int(prod_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"id inválido: {prod_id!r}")
+        if prod_id <= 0:
+            raise ValueError(f"id inválido: {prod_id!r}")
+    description = record.get('description')
+    description = str(description).strip() if description not in (None, '') else ''
+    return (prod_id, name, description, parse_price(record.get('price')))
+
+
+def _iter_json_array(stream, chunk_size=65536):
+    """Lê os objetos de um array JSON um a um, sem carregar o arquivo inteiro."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if buffer.startswith('['):
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer:
+                raise ValueError("JSON do catálogo deve ser um array de objetos")
+        elif buffer.startswith(']'):
+            return
+        elif buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        elif buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Um número no fim do buffer pode estar cortado: só aceita se houver algo depois
+                if end < len(buffer) or eof:
+                    yield record
+                    buffer = buffer[end:]
+                    continue
+        if eof:
+            raise ValueError("JSON do catálogo deve ser um array de objetos terminado por ']'")
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+
+def iter_catalog_records(path):
+    """Gera (número da linha/registro, dicionário) a partir do arquivo do catálogo."""
+    fmt = file_format(path)
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8-sig') as stream:
+        if fmt == 'csv':
+            sample = stream.read(4096)
+            stream.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(stream, dialect=dialect)
+            for record in reader:
+                yield reader.line_num, record
+        elif fmt == 'jsonl':
+            for line_num, line in enumerate(stream, start=1):
+                if line.strip():
+                    try:
+                        yield line_num, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_num, e
+        else:
+            for index, record in enumerate(_iter_json_array(stream), start=1):
+                yield index, record
+
+
+def import_products(db, path, batch_size=IMPORT_BATCH_SIZE, on_progress=None):
+    """Importa (insere ou atualiza pelo id) os produtos do arquivo.
+
+    Linhas inválidas são registradas em result.errors e não interrompem a carga.
+    """
+    result = CatalogImportResult()
+    batch, batch_lines = [], []
+
+    def flush():
+        try:
+            db.upsert_products(batch)
+            result.imported += len(batch)
+        except Exception:
+            # Isola a(s) linha(s) que o banco recusou sem perder o resto do lote
+            for line, row in zip(batch_lines, batch):
+                try:
+                    db.upsert_products([row])
+                    result.imported += 1
+                except Exception as e:
+                    result.errors.append((line, str(e)))
+        batch.clear()
+        batch_lines.clear()
+        if on_progress:
+            on_progress(result)
+
+    for line, record in iter_catalog_records(path):
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f"JSON inválido: {record}")
+            if not isinstance(record, dict):
+                raise ValueError("registro deve ser um objeto")
+            batch.append(_validate(record))
+            batch_lines.append(line)
+        except ValueError as e:
+            result.errors.append((line, str(e)))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+
+def export_products(db, path):
+    """Exporta todos os produtos para o arquivo, no formato indicado pela extensão."""
+    fmt = file_format(path)
+    count = 0
+    with open(path, 'w', newline='' if fmt == 'csv' else None, encoding='utf-8', buffering=1 << 16) as stream:
+        if fmt == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            for rows in db.iter_products():
+                writer.writerows(rows)
+                count += len(rows)
+        else:
+            if fmt == 'json':
+                stream.write('[\n')
+            for rows in db.iter_products():
+                for row in rows:
+                    prefix = ',\n' if fmt == 'json' and count else ''
+                    stream.write(prefix + json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+                    if fmt == 'jsonl':
+                        stream.write('\n')
+                    count += 1
+            if fmt == 'json':
+                stream.write('\n]\n')
+    return count
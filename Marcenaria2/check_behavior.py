@@ -0,0 +1,77 @@
+# check_behavior.py
+"""Executa cenários de comportamento do DatabaseManager e das listas paginadas
+num banco temporário e confere o resultado de cada um.
+
+Falha (código de saída 1) se algum cenário não der o resultado esperado.
+
+Uso: python check_behavior.py
+"""
+import os
+import sys
+import tempfile
+from connection import TransactionError
+from database import DatabaseManager, UnitOfWork
+from widgets import PagedTextView
+from benchmarks.headless import StubTextbox
+
+
+def check_unit_of_work_rollback(db):
+    """Uma escrita inválida (preço que não é número) desfaz as válidas da mesma unidade."""
+    db.add_product('Mesa', 'Mesa de jantar', '350.00')
+    before = [(p.id, p.name, p.price) for p in db.get_all_products()]
+    uow = UnitOfWork()
+    uow.add_product('Cadeira', '', '120.00')
+    uow.update_product(before[0][0], 'Mesa', 'Mesa de jantar', 'abc,xyz')
+    try:
+        results = uow.commit(db)
+    except TransactionError:
+        pass
+    else:
+        return f"commit devolveu {results} em vez de lançar TransactionError"
+    after = [(p.id, p.name, p.price) for p in db.get_all_products()]
+    if after != before:
+        return f"produtos mudaram: {before} -> {after}"
+    return None
+
+
+def check_paged_view_stops_at_end(db, pages=2, page_size=10):
+    """Com exatamente pages * page_size linhas, a lista rolada até o fim não pede a página vazia de novo."""
+    db.upsert_products([(None, f'Produto {n}', '', 10.0) for n in range(pages * page_size)])
+    keys = []
+    def fetch_page(key, limit, on_rows, on_error):
+        keys.append(key)
+        on_rows(db.get_products_page(key, limit))
+    textbox = StubTextbox()
+    PagedTextView(textbox, fetch_page, lambda products: "".join(f"{p.id}\n" for p in products),
+                  key_of=lambda p: p.id, first_key=0, page_size=page_size)
+    for _ in range(10): # Dez ciclos do _poll parado no fim da lista
+        textbox.scroll_to_end()
+        textbox.pending()
+    if len(keys) != pages + 1 or len(set(keys)) != len(keys):
+        return f"chaves pedidas: {keys} (esperado: uma vez cada página, mais a vazia)"
+    return None
+
+
+CHECKS = [check_unit_of_work_rollback, check_paged_view_stops_at_end]
+
+
+def main():
+    failures = 0
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, 'behavior.db'))
+            try:
+                problem = check(db)
+            finally:
+                db.close()
+        print(f"[{'FALHA' if problem else 'ok'}] {check.__name__}{': ' + problem if problem else ''}")
+        failures += bool(problem)
+    if failures:
+        print(f"\n{failures} cenário(s) com problema.")
+        return 1
+    print("\nTodos os cenários deram o resultado esperado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
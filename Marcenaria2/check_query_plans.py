@@ -0,0 +1,140 @@
+# check_query_plans.py
+"""Executa cada método do DatabaseManager num banco temporário e confere o plano
+(EXPLAIN QUERY PLAN) de todas as consultas que ele dispara.
+
+Falha (código de saída 1) se uma consulta de caminho quente varrer uma tabela
+inteira ou se algum método público ficar sem cobertura.
+
+Uso: python check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+from database import DatabaseManager
+
+# Métodos que listam a tabela inteira de propósito
+FULL_SCAN_ALLOWED = {'get_all_products', 'get_product_catalog', 'iter_products', 'iter_full_report', 'get_full_report',
+                     'rebuild_rollups', 'check_rollups', 'get_archive_summary'}
+# Métodos que não consultam dados do sistema
+NOT_QUERIES = {'close', 'create_tables', 'transaction'}
+
+
+def sample_calls(db):
+    """(nome do método, argumentos) exercitando todas as consultas do DatabaseManager."""
+    return [
+        ('add_user', ('ana', 'senha')),
+        ('check_user_exists', ('ana',)),
+        ('verify_user', ('ana', 'senha')),
+        ('add_product', ('Mesa', 'Mesa de jantar', '350.00')),
+        ('get_all_products', ()),
+        ('get_products_page', (0, 50)),
+        ('upsert_products', ([(None, 'Cadeira', '', 120.0), (1, 'Mesa', 'Mesa de jantar', 360.0)],)),
+        ('iter_products', ()),
+        ('get_product', (1,)),
+        ('get_product_catalog', ()),
+        ('search_products', ('mes', 10)),
+        ('search_products', ('me', 10)),
+        ('search_products', ('1', 10)),
+        ('update_product', (1, 'Mesa', 'Mesa de centro', '300.00')),
+        ('create_order', ('Cliente', [{'id': 1, 'quantity': 1}])),
+        ('get_order_status', (1,)),
+        ('update_order_status', (1, 'Em Produção')),
+        ('bulk_update_order_status', ('Concluído', [1], 'Em Produção')),
+        ('bulk_update_order_status', ('Entregue', None, 'Concluído')),
+        ('get_orders_by_status', ('Entregue', None, 50)),
+        ('find_orders', ('cli', ['Pendente'], '2025-01-01', None, 20, None)),
+        ('find_orders', ('a', ['Pendente', 'Entregue'], None, '2030-12-31', 20, ('2026-01-01', 1000), True)),
+        ('find_orders', (None, None, '2025-01-01', '2025-01-31', 20, ('2025-01-31', 1000))),
+        ('get_status_timeline', (1,)),
+        ('get_status_history', ('Entregue', '2000-01-01', 50)),
+        ('get_lead_times', ('Pendente', 'Entregue', 90)),
+        ('get_orders_page', (None, 50)),
+        ('get_monthly_revenue', (12,)),
+        ('get_status_summary', (12,)),
+        ('get_top_products', (30, 10)),
+        ('rebuild_rollups', ()),
+        ('check_rollups', ()),
+        ('iter_full_report', ()),
+        ('count_orders', ('2000-01-01', None, ['Pendente'])),
+        ('iter_order_rows', (None, '2999-12-31', ['Pendente', 'Entregue'])),
+        ('get_full_report', ()),
+        ('open_archive', ()),
+        ('archive_orders', (-1,)),
+        ('get_archive_summary', ()),
+        ('count_orders', (None, None, ['Entregue'], True)),
+        ('get_order_date_range', (True,)),
+        ('iter_order_rows', ('2000-01-01', None, None, 1000, True)),
+        ('check_rollups', ()),
+        ('run_operations', ([('add_product', ('Banco', '', '80.00')), ('update_order_status', (1, 'Entregue'))],)),
+        ('delete_product', (1,)),
+    ]
+
+
+def full_scans(conn, sql):
+    """Tabelas percorridas por inteiro no plano da consulta (ignora CTEs, subconsultas e tabelas temporárias)."""
+    plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    derived = {m.group(1) for detail in plan for m in [re.match(r'(?:MATERIALIZE|CO-ROUTINE) (\S+)', detail)] if m}
+    for (name,) in conn.execute("SELECT name FROM temp.sqlite_master WHERE type = 'table'"):
+        derived |= {name, f'temp.{name}'} # Tabelas de trabalho do próprio método, lidas por inteiro de propósito
+    scans = []
+    for detail in plan:
+        match = re.match(r'SCAN (\S+)(.*)', detail)
+        if (match and match.group(1) not in derived and detail != 'SCAN CONSTANT ROW' and 'COVERING INDEX' not in match.group(2)
+                and 'VIRTUAL TABLE INDEX' not in match.group(2)):
+            scans.append(detail)
+    return scans
+
+
+def run_checks(db):
+    statements = []
+    connections = [db.conn, db.connections.reader()]
+    for conn in connections:
+        conn.set_trace_callback(statements.append)
+    failures = []
+    calls = sample_calls(db)
+    for method, args in calls:
+        statements.clear()
+        result = getattr(db, method)(*args)
+        if hasattr(result, '__next__'):
+            list(result)
+        for sql in dict.fromkeys(statements):
+            if not re.match(r'\s*(SELECT|UPDATE|DELETE|WITH)', sql, re.IGNORECASE):
+                continue
+            if re.search(r"'main'\.'\w+_(config|data|idx|docsize|content)'", sql):
+                continue # Consultas internas do FTS5 às suas tabelas auxiliares
+            scans = full_scans(db.conn, sql)
+            status = 'ok'
+            if scans and method not in FULL_SCAN_ALLOWED:
+                status = 'FALHA'
+                failures.append((method, sql, scans))
+            print(f"[{status}] {method}: {' '.join(sql.split())[:90]}")
+            for detail in scans:
+                print(f"        {detail}")
+    for conn in connections:
+        conn.set_trace_callback(None)
+
+    public = {name for name in dir(DatabaseManager) if not name.startswith('_') and callable(getattr(DatabaseManager, name))}
+    uncovered = public - NOT_QUERIES - {method for method, _ in calls}
+    for method in sorted(uncovered):
+        failures.append((method, None, None))
+        print(f"[FALHA] {method}: método sem cobertura em check_query_plans.py")
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'plans.db'))
+        try:
+            failures = run_checks(db)
+        finally:
+            db.close()
+    if failures:
+        print(f"\n{len(failures)} problema(s) encontrado(s).")
+        return 1
+    print("\nNenhuma varredura completa em consultas de caminho quente.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
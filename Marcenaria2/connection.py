@@ -0,0 +1,341 @@
+# connection.py
+import contextlib
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+GROUP_COMMIT_MAX = 256 # Escritas por transação no group commit
+
+
+class TransactionError(Exception):
+    """Uma escrita dentro de transaction() falhou, então o bloco inteiro foi desfeito."""
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} escrita(s) falharam na transação; nada foi gravado: {errors[0]}")
+        self.errors = errors
+
+
+class ConnectionManager:
+    """Abre e configura as conexões SQLite de um arquivo de banco.
+
+    Há uma única conexão de escrita, protegida por um lock, e conexões somente
+    leitura (uma por thread) para relatórios e listagens. Em modo WAL os
+    leitores não bloqueiam o escritor e vice-versa, o que permite que vários
+    terminais usem o mesmo marcenaria.db.
+
+    Com group_commit_ms, as escritas de várias threads que chegam juntas são
+    gravadas numa única transação (um commit só): a primeira espera até
+    group_commit_ms pelas outras (0 = junta só as que já estão na fila).
+    """
+    def __init__(self, db_name='marcenaria.db', journal_mode='WAL', synchronous='NORMAL',
+                 busy_timeout_ms=5000, write_retries=5, retry_backoff=0.05, group_commit_ms=None):
+        self.db_name = db_name
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.write_retries = write_retries
+        self.retry_backoff = retry_backoff
+        self.group_commit_ms = group_commit_ms
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._local = threading.local()
+        self._readers = []
+        self._trace_callback = None
+        self._depth = 0 # Níveis abertos na conexão de escrita: dentro de uma transação, cada escrita vira um savepoint
+        self._owner = None # Thread que está com a transação aberta
+        self._failures = [] # Uma lista por bloco transaction() aberto: escritas que falharam dentro dele
+        self._group_queue = queue.Queue()
+        self._group_thread = None
+        self._attachments = {} # apelido -> arquivo, anexados (ATTACH) em todas as conexões
+        self._attached = {} # conexão -> apelidos já anexados nela
+        # Estatísticas de contenção (usadas pelo stress_test.py)
+        self.lock_wait_seconds = 0.0
+        self.write_retries_done = 0
+        self.group_commits = 0
+        self.grouped_writes = 0
+
+    def _configure(self, conn):
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        if self._trace_callback is not None:
+            conn.set_trace_callback(self._trace_callback)
+        return conn
+
+    def writer(self):
+        """Conexão de escrita (criada na primeira chamada)."""
+        with self._write_lock:
+            if self._writer is None:
+                conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+                if self.journal_mode:
+                    conn.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+                self._writer = self._configure(conn)
+            return self._writer
+
+    def reader(self):
+        """Conexão somente leitura da thread atual.
+
+        Dentro de uma transação aberta pela própria thread, é a conexão de
+        escrita: assim as leituras do bloco veem o que ele já gravou.
+        """
+        if self._owner == threading.get_ident():
+            return self._writer
+        conn = getattr(self._local, 'reader', None)
+        if conn is None:
+            if self.db_name == ':memory:':
+                # Banco em memória só existe na conexão que o criou
+                return self.writer()
+            self.writer() # Garante que o arquivo exista antes de abrir em modo somente leitura
+            conn = sqlite3.connect(f'file:{self.db_name}?mode=ro', uri=True,
+                                   timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+            conn = self._local.reader = self._configure(conn)
+            self._readers.append(conn)
+        if len(self._attached.get(conn, ())) != len(self._attachments):
+            self._attach_pending(conn)
+        return conn
+
+    def attach(self, alias, path, synchronous=None, setup=None):
+        """Anexa outro arquivo de banco (ATTACH ... AS alias) a todas as conexões.
+
+        Tudo na conexão de escrita acontece sob o lock de escrita: o anexo (que
+        cria o arquivo, se não existir), o synchronous dele (padrão: o do banco
+        principal) e setup(conn), numa transação de escrita. Só depois o
+        apelido passa a valer para as conexões de leitura, que o anexam na
+        próxima vez que a thread delas pedir a conexão, já que uma conexão não
+        deve ser mexida por outra thread. Se o apelido já estiver anexado, não
+        faz nada.
+        """
+        with self._write_lock:
+            if alias in self._attachments:
+                return
+            conn = self.writer()
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+            try:
+                if self.journal_mode:
+                    conn.execute(f'PRAGMA {alias}.journal_mode = {self.journal_mode}')
+                conn.execute(f'PRAGMA {alias}.synchronous = {synchronous or self.synchronous}')
+                if setup is not None:
+                    self._write(setup)
+            except BaseException:
+                conn.execute(f'DETACH DATABASE {alias}')
+                raise
+            self._attached.setdefault(conn, set()).add(alias)
+            self._attachments[alias] = path
+
+    def attached(self, alias):
+        return alias in self._attachments
+
+    def _attach_pending(self, conn):
+        done = self._attached.setdefault(conn, set())
+        for alias, path in list(self._attachments.items()):
+            if alias not in done:
+                conn.execute(f'ATTACH DATABASE ? AS {alias}', (f'file:{path}?mode=ro',))
+                done.add(alias)
+
+    def run_write(self, work):
+        """Executa work(conn) numa transação de escrita e faz o commit.
+
+        A transação começa com BEGIN IMMEDIATE, reservando a escrita logo no
+        início. Se outro processo estiver segurando o banco além do
+        busy_timeout, tenta de novo com espera exponencial. Dentro de
+        transaction() ou de run_write_batch, vira um savepoint da transação
+        aberta; com group commit, entra na fila do próximo commit.
+        """
+        if self.group_commit_ms is not None and self._owner != threading.get_ident():
+            return self._submit_grouped(work)
+        return self._write(work)
+
+    def _write(self, work):
+        with self._write_lock:
+            conn = self.writer()
+            if self._depth:
+                return self._run_in_savepoint(conn, work)
+            self._begin(conn)
+            self._enter()
+            try:
+                result = work(conn)
+                conn.commit()
+                return result
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._exit()
+
+    def _begin(self, conn):
+        for attempt in range(self.write_retries + 1):
+            started = time.perf_counter()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                self.lock_wait_seconds += time.perf_counter() - started
+                return
+            except sqlite3.OperationalError as e:
+                self.lock_wait_seconds += time.perf_counter() - started
+                if not _is_lock_error(e) or attempt == self.write_retries:
+                    raise
+                self.write_retries_done += 1
+                time.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _enter(self):
+        self._depth += 1
+        self._owner = threading.get_ident()
+
+    def _exit(self):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Junta as escritas feitas dentro do bloco numa única transação, com um só commit.
+
+        Se o bloco lançar uma exceção, ou se alguma escrita dentro dele falhar
+        (mesmo que o método do DatabaseManager só devolva False/None), tudo o
+        que o bloco gravou é desfeito; no segundo caso sai TransactionError.
+        Um bloco dentro de outro vira um savepoint: a falha dele desfaz só o
+        que ele gravou, e quem tratar a exceção pode continuar o bloco de fora.
+        A thread fica com o lock de escrita durante todo o bloco, e as leituras
+        dela (reader()) usam a conexão de escrita, vendo o que o bloco já gravou.
+        """
+        with self._write_lock:
+            conn = self.writer()
+            outermost = not self._depth
+            if outermost:
+                self._begin(conn)
+            else:
+                conn.execute('SAVEPOINT nested_transaction')
+            self._enter()
+            self._failures.append([])
+            try:
+                yield conn
+                if self._failures[-1]:
+                    raise TransactionError(self._failures[-1])
+            except BaseException:
+                if outermost:
+                    conn.rollback()
+                else:
+                    conn.execute('ROLLBACK TO nested_transaction')
+                    conn.execute('RELEASE nested_transaction')
+                raise
+            else:
+                if outermost:
+                    conn.commit()
+                else:
+                    conn.execute('RELEASE nested_transaction')
+            finally:
+                self._failures.pop()
+                self._exit()
+
+    def run_write_batch(self, calls):
+        """Executa várias escritas numa única transação, com um só commit (group commit).
+
+        calls são funções sem argumentos que gravam via run_write (ex.: métodos
+        do DatabaseManager já com os argumentos). Cada uma roda num savepoint
+        próprio, então a falha de uma não desfaz as outras. Retorna, na mesma
+        ordem, (True, resultado) ou (False, exceção).
+        """
+        def work(conn):
+            results = []
+            for call in calls:
+                try:
+                    results.append((True, call()))
+                except Exception as e:
+                    results.append((False, e))
+            return results
+        return self._write(work)
+
+    def _run_in_savepoint(self, conn, work):
+        conn.execute('SAVEPOINT batch_item')
+        self._enter()
+        try:
+            result = work(conn)
+        except BaseException as e:
+            conn.execute('ROLLBACK TO batch_item')
+            conn.execute('RELEASE batch_item')
+            if self._failures:
+                self._failures[-1].append(e)
+            raise
+        finally:
+            self._exit()
+        conn.execute('RELEASE batch_item')
+        return result
+
+    # --- GROUP COMMIT ---
+    def _submit_grouped(self, work):
+        future = Future()
+        with self._write_lock:
+            if self._group_thread is None:
+                self._group_thread = threading.Thread(target=self._group_commit_loop, name='db-group-commit', daemon=True)
+                self._group_thread.start()
+        self._group_queue.put((work, future))
+        return future.result()
+
+    def _group_commit_loop(self):
+        """Thread do group commit: grava as escritas da fila em lotes, um commit por lote."""
+        while True:
+            item = self._group_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.group_commit_ms / 1000
+            while len(batch) < GROUP_COMMIT_MAX:
+                try:
+                    item = self._group_queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._group_queue.put(None) # Termina depois de gravar este lote
+                    break
+                batch.append(item)
+            def work(conn):
+                results = []
+                for write, _ in batch:
+                    try:
+                        results.append((True, self._run_in_savepoint(conn, write)))
+                    except Exception as e:
+                        results.append((False, e))
+                return results
+            try:
+                if len(batch) == 1:
+                    # Sozinha na fila: grava direto, sem o savepoint
+                    try:
+                        results = [(True, self._write(batch[0][0]))]
+                    except Exception as e:
+                        results = [(False, e)]
+                else:
+                    results = self._write(work)
+            except Exception as e:
+                # O commit falhou: nenhuma das escritas do lote foi gravada
+                results = [(False, e)] * len(batch)
+            self.group_commits += 1
+            self.grouped_writes += len(batch)
+            for (_, future), (ok, value) in zip(batch, results):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def set_trace_callback(self, callback):
+        """Instala (ou remove, com None) o trace do sqlite3 em todas as conexões, inclusive nas abertas depois."""
+        self._trace_callback = callback
+        for conn in [self.writer()] + self._readers:
+            conn.set_trace_callback(callback)
+
+    def close(self):
+        if self._group_thread is not None:
+            self._group_queue.put(None)
+            self._group_thread.join()
+            self._group_thread = None
+        for conn in self._readers:
+            conn.close()
+        self._readers.clear()
+        self._attached.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
@@ -1,79 +1,278 @@
 # database.py
 import sqlite3
+import contextlib
 import datetime
+import decimal
+import heapq
+import itertools
+import os
+import re
+import sys
+import migrations
+from connection import ConnectionManager
+from models import Product, Order, OrderItem, ItemLoader
+
+# Gerações do cache de produtos são únicas entre instâncias, para que uma tela
+# nunca confunda o catálogo de uma conexão com o de outra
+_product_generations = itertools.count(1)
+
+# {orders}/{order_items}: as tabelas principais ou, com arquivo morto, a união com as dele
+_SALES_DAILY_RECOMPUTE = '''
+    SELECT order_date AS day, status, COUNT(*) AS orders, SUM(total) AS revenue
+    FROM {orders} GROUP BY order_date, status'''
+_PRODUCT_SALES_RECOMPUTE = '''
+    SELECT o.order_date AS day, o.status AS status, oi.product_id AS product_id, SUM(oi.quantity) AS units
+    FROM {order_items} oi JOIN {orders} o ON o.id = oi.order_id
+    WHERE oi.product_id IS NOT NULL
+    GROUP BY o.order_date, o.status, oi.product_id'''
+_ALL_ORDERS = '''(SELECT id, order_date, status, total FROM main.orders
+                 UNION ALL SELECT id, order_date, status, total FROM archive.orders)'''
+_ALL_ORDER_ITEMS = '''(SELECT order_id, product_id, quantity FROM main.order_items
+                      UNION ALL SELECT order_id, product_id, quantity FROM archive.order_items)'''
+
+
+def _to_cents(value):
+    """Valor em reais (número ou texto, ex. '350.00') em centavos inteiros."""
+    try:
+        cents = decimal.Decimal(str(value).strip()) * 100
+    except decimal.InvalidOperation:
+        raise ValueError(f"Valor inválido: {value!r}") from None
+    if not cents.is_finite():
+        raise ValueError(f"Valor inválido: {value!r}")
+    return int(cents.to_integral_value(decimal.ROUND_HALF_UP))
+
+
+def _now():
+    """Data e hora atuais no formato do histórico de status (AAAA-MM-DD HH:MM:SS)."""
+    return datetime.datetime.now().isoformat(' ', 'seconds')
+
+
+def _archive_name(db_name):
+    """Arquivo do arquivo morto de um banco: marcenaria.db -> marcenaria_arquivo.db."""
+    if db_name == ':memory:':
+        return db_name
+    base, ext = os.path.splitext(db_name)
+    return f'{base}_arquivo{ext or ".db"}'
+
+
+def _months_ago(months):
+    """Primeiro dia (AAAA-MM-DD) do mês que começa 'months' meses atrás, contando o atual."""
+    today = datetime.date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1).isoformat()
+
+
+class ArchiveError(Exception):
+    """A cópia de um lote no arquivo morto não conferiu com as encomendas originais."""
+
 
 class DatabaseManager:
-    def __init__(self, db_name='marcenaria.db'):
-        """Conecta ao banco de dados ao ser instanciada."""
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+    SEARCH_RANK_MIN_CHARS = 3 # Abaixo disso a busca de produtos não ordena por relevância
+    CLIENT_PREFIX_INDEX_MIN_CHARS = 3 # A partir disso a busca de encomendas vai pelo índice de clientes
+    CLIENT_PREFIX_MAX_NAMES = 50 # Com mais clientes no prefixo, a busca vai pelo índice de data
+    CANCELLED_STATUS = 'Cancelado' # Encomendas canceladas não contam como vendas nas análises
+    CLOSED_STATUSES = ('Entregue', 'Cancelado') # Encomendas que podem ir para o arquivo morto
+
+    def __init__(self, db_name='marcenaria.db', connections=None, archive_name=None):
+        """Conecta ao banco de dados ao ser instanciada.
+
+        connections permite passar um ConnectionManager já configurado
+        (modo do journal, busy_timeout, synchronous, tentativas de escrita).
+        archive_name é o arquivo do arquivo morto (padrão: marcenaria_arquivo.db
+        ao lado do banco); ele só é criado no primeiro archive_orders.
+        """
+        self.connections = connections or ConnectionManager(db_name)
+        self.archive_name = archive_name or _archive_name(self.connections.db_name)
+        self.conn = self.connections.writer()
         self.create_tables()
+        self._product_cache = None # id -> Product, na ordem da tabela
+        self._product_list = None
+        self.product_generation = 0
+        self._data_version = None
 
     def create_tables(self):
-        """Cria as tabelas do sistema se elas não existirem."""
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                username TEXT PRIMARY KEY, password TEXT NOT NULL)
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
-                description TEXT, price REAL NOT NULL)
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, client_name TEXT NOT NULL,
-                order_date TEXT NOT NULL, status TEXT NOT NULL, total REAL NOT NULL)
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS order_items (
-                item_id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER,
-                product_id INTEGER, quantity INTEGER NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders(id),
-                FOREIGN KEY (product_id) REFERENCES products(id))
-        ''')
-        self.conn.commit()
+        """Cria as tabelas do sistema e aplica as migrações de esquema pendentes."""
+        migrations.migrate(self.conn)
+
+    def _rows_as(self, model):
+        """Cursor do leitor desta thread que devolve as linhas como model (models.py)."""
+        cursor = self.connections.reader().cursor()
+        cursor.row_factory = model.from_row
+        return cursor
+
+    # --- TRANSAÇÕES ---
+    @contextlib.contextmanager
+    def transaction(self):
+        """Grava todas as escritas do bloco juntas, num só commit, ou nenhuma delas.
+
+            with db.transaction():
+                order_id = db.create_order(cliente, itens)
+                db.update_order_status(order_id, 'Em Produção')
+
+        Se uma escrita falhar, o bloco é desfeito e sai TransactionError; blocos
+        aninhados viram savepoints (veja ConnectionManager.transaction).
+        """
+        try:
+            with self.connections.transaction():
+                yield self
+        except BaseException:
+            # O cache de produtos pode ter recebido alterações que foram desfeitas
+            self._product_cache = self._product_list = None
+            raise
+
+    def run_operations(self, operations):
+        """Executa [(método, argumentos), ...] numa única transação e retorna os resultados, na ordem.
+
+        Só aceita os métodos de escrita de UnitOfWork.METHODS. Se um deles
+        falhar, nada é gravado (TransactionError).
+        """
+        unknown = [name for name, _ in operations if name not in UnitOfWork.METHODS]
+        if unknown:
+            raise ValueError(f"Método não permitido numa unidade de trabalho: {unknown[0]}")
+        with self.transaction():
+            return [getattr(self, name)(*args) for name, args in operations]
 
     # --- MÉTODOS DE USUÁRIO ---
     def check_user_exists(self, username):
-        self.cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-        return self.cursor.fetchone()
+        return self.connections.reader().execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
 
     def add_user(self, username, password):
         try:
-            self.cursor.execute('INSERT INTO users (username, password) VALUES (?, ?)', (username, password))
-            self.conn.commit()
+            self.connections.run_write(lambda conn: conn.execute(
+                'INSERT INTO users (username, password) VALUES (?, ?)', (username, password)))
             return True
         except sqlite3.Error as e:
             print(f"DB Error on add_user: {e}")
             return False
 
     def verify_user(self, username, password):
-        self.cursor.execute('SELECT * FROM users WHERE username = ? AND password = ?', (username, password))
-        return self.cursor.fetchone()
+        return self.connections.reader().execute('SELECT * FROM users WHERE username = ? AND password = ?', (username, password)).fetchone()
 
     # --- MÉTODOS DE PRODUTO ---
     def add_product(self, name, description, price):
         try:
-            self.cursor.execute('INSERT INTO products (name, description, price) VALUES (?, ?, ?)', (name, description, float(price)))
-            self.conn.commit()
+            # Preço convertido dentro da escrita: numa transação, o preço inválido desfaz o bloco todo
+            def insert_product(conn):
+                cents = _to_cents(price)
+                return conn.execute('INSERT INTO products (name, description, price) VALUES (?, ?, ?)',
+                                    (name, description, cents)).lastrowid, cents
+            prod_id, cents = self.connections.run_write(insert_product)
+            self._cache_product_change(prod_id, Product(prod_id, name, description, cents / 100))
             return True
         except (sqlite3.Error, ValueError) as e:
             print(f"DB Error on add_product: {e}")
             return False
 
     def get_all_products(self):
-        self.cursor.execute('SELECT id, name, description, price FROM products')
-        return self.cursor.fetchall()
+        """Todos os produtos, servidos do cache em memória. Não altere a lista retornada."""
+        return self.get_product_catalog()[1]
+
+    def get_product_catalog(self):
+        """(geração, produtos). A geração muda sempre que o catálogo muda, então
+        quem guarda estruturas derivadas (rótulos, mapa id->preço) só precisa
+        reconstruí-las quando ela for diferente da última vista."""
+        self._check_external_changes()
+        if self._product_cache is None:
+            rows = self._rows_as(Product).execute('SELECT id, name, description, price / 100.0 FROM products').fetchall()
+            self._product_cache = {product.id: product for product in rows}
+            self._product_list = rows
+            self.product_generation = next(_product_generations)
+        elif self._product_list is None:
+            self._product_list = list(self._product_cache.values())
+        return self.product_generation, self._product_list
+
+    def _check_external_changes(self):
+        """Descarta o cache se outra conexão (outro processo ou thread) gravou no banco."""
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._product_cache = self._product_list = None
+
+    def _cache_product_change(self, prod_id, product):
+        """Aplica no cache uma alteração feita por esta conexão (product None = removido)."""
+        if self._product_cache is None:
+            return
+        if product is None:
+            self._product_cache.pop(prod_id, None)
+        else:
+            self._product_cache[prod_id] = product
+        self._product_list = None
+        self.product_generation = next(_product_generations)
+
+    def get_products_page(self, after_id=0, limit=100):
+        """Página de produtos com id maior que after_id (paginação por chave, sem OFFSET)."""
+        return self._rows_as(Product).execute(
+            'SELECT id, name, description, price / 100.0 FROM products WHERE id > ? ORDER BY id LIMIT ?', (after_id, limit)).fetchall()
+
+    def iter_products(self, batch_size=1000):
+        """Gera os produtos em lotes (listas de tuplas), ordenados pelo id."""
+        cursor = self.connections.reader().cursor()
+        try:
+            cursor.execute('SELECT id, name, description, price / 100.0 FROM products ORDER BY id')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def upsert_products(self, rows):
+        """Insere ou atualiza (pelo id) vários produtos numa única transação.
+
+        rows: tuplas (id ou None, nome, descrição, preço em reais). Ao contrário
+        dos outros métodos, erros do banco são repassados a quem chamou.
+        """
+        rows = [(prod_id, name, description, _to_cents(price)) for prod_id, name, description, price in rows]
+        self.connections.run_write(lambda conn: conn.executemany('''
+            INSERT INTO products (id, name, description, price) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET name = excluded.name, description = excluded.description, price = excluded.price
+        ''', rows))
+        self._product_cache = self._product_list = None
+        return len(rows)
+
+    def search_products(self, prefix, limit=10):
+        """Busca por prefixo no nome e na descrição (índice FTS5), mais relevantes primeiro.
+
+        Um número também encontra o produto com aquele id. Sem texto, devolve os
+        primeiros produtos do catálogo.
+        """
+        terms = re.findall(r'\w+', prefix or '')
+        cursor = self._rows_as(Product)
+        if not terms:
+            return cursor.execute('SELECT id, name, description, price / 100.0 FROM products ORDER BY id LIMIT ?', (limit,)).fetchall()
+        query = ' '.join(f'"{term}"*' for term in terms)
+        if sum(map(len, terms)) < self.SEARCH_RANK_MIN_CHARS:
+            # Prefixos muito curtos casam com boa parte do catálogo: ordenar tudo
+            # por relevância custaria caro, então pega os primeiros que casarem
+            sql = '''SELECT p.id, p.name, p.description, p.price / 100.0 FROM products_fts
+                     JOIN products p ON p.id = products_fts.rowid
+                     WHERE products_fts MATCH ? LIMIT ?'''
+        else:
+            # bm25 com peso maior para o nome do que para a descrição
+            sql = '''SELECT p.id, p.name, p.description, p.price / 100.0 FROM products_fts
+                     JOIN products p ON p.id = products_fts.rowid
+                     WHERE products_fts MATCH ? ORDER BY bm25(products_fts, 10.0, 1.0) LIMIT ?'''
+        results = cursor.execute(sql, (query, limit)).fetchall()
+        if len(terms) == 1 and terms[0].isdigit():
+            by_id = cursor.execute('SELECT id, name, description, price / 100.0 FROM products WHERE id = ?', (int(terms[0]),)).fetchone()
+            if by_id:
+                results = [by_id] + [product for product in results if product.id != by_id.id][:limit - 1]
+        return results
 
     def get_product(self, prod_id):
-        self.cursor.execute('SELECT name, description, price FROM products WHERE id = ?', (prod_id,))
-        return self.cursor.fetchone()
+        return self._rows_as(Product).execute(
+            'SELECT id, name, description, price / 100.0 FROM products WHERE id = ?', (prod_id,)).fetchone()
 
     def update_product(self, prod_id, name, desc, price):
         try:
-            self.cursor.execute('UPDATE products SET name=?, description=?, price=? WHERE id=?', (name, desc, float(price), prod_id))
-            self.conn.commit()
+            def change_product(conn):
+                cents = _to_cents(price)
+                return conn.execute('UPDATE products SET name=?, description=?, price=? WHERE id=?',
+                                    (name, desc, cents, prod_id)).rowcount, cents
+            updated, cents = self.connections.run_write(change_product)
+            if updated:
+                self._cache_product_change(prod_id, Product(prod_id, name, desc, cents / 100))
             return True
         except (sqlite3.Error, ValueError) as e:
             print(f"DB Error on update_product: {e}")
@@ -81,56 +280,606 @@ class DatabaseManager:
 
     def delete_product(self, prod_id):
         try:
-            self.cursor.execute('DELETE FROM products WHERE id = ?', (prod_id,))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
+            deleted = self.connections.run_write(lambda conn: conn.execute(
+                'DELETE FROM products WHERE id = ?', (prod_id,)).rowcount)
+            if deleted:
+                self._cache_product_change(prod_id, None)
+            return deleted > 0
         except sqlite3.Error as e:
             print(f"DB Error on delete_product: {e}")
             return False
 
     # --- MÉTODOS DE ENCOMENDA ---
-    def create_order(self, client_name, order_total, items):
+    def create_order(self, client_name, items):
+        """Grava a encomenda com os itens ({'id': produto, 'quantity': n}) e retorna o id.
+
+        O preço de cada item é o do produto no banco no momento da gravação,
+        guardado no próprio item; o total é a soma desses preços, calculada no
+        SQL. Se algum produto não existir mais, nada é gravado e retorna None.
+        """
         try:
             current_date = datetime.date.today().isoformat()
-            self.cursor.execute('INSERT INTO orders (client_name, order_date, status, total) VALUES (?, ?, ?, ?)',
-                               (client_name, current_date, 'Pendente', order_total))
-            order_id = self.cursor.lastrowid
-            for item in items:
-                self.cursor.execute('INSERT INTO order_items (order_id, product_id, quantity) VALUES (?, ?, ?)',
-                                   (order_id, item['id'], item['quantity']))
-            self.conn.commit()
-            return order_id
-        except sqlite3.Error as e:
+            def insert_order(conn):
+                order_id = conn.execute('INSERT INTO orders (client_name, order_date, status, total) VALUES (?, ?, ?, 0)',
+                                        (client_name, current_date, 'Pendente')).lastrowid
+                inserted = conn.executemany('''
+                    INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+                    SELECT ?, id, ?, price FROM products WHERE id = ?
+                ''', [(order_id, item['quantity'], item['id']) for item in items]).rowcount
+                if inserted != len(items):
+                    raise ValueError("Produto da encomenda não encontrado")
+                order_total = conn.execute('''
+                    UPDATE orders SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM order_items WHERE order_id = ?)
+                    WHERE id = ? RETURNING total
+                ''', (order_id, order_id)).fetchone()[0]
+                self._apply_order_to_rollups(conn, order_id, current_date, 'Pendente', order_total, +1)
+                conn.execute('INSERT INTO order_status_history (order_id, old_status, new_status, changed_at) VALUES (?, NULL, ?, ?)',
+                             (order_id, 'Pendente', _now()))
+                return order_id
+            return self.connections.run_write(insert_order)
+        except (sqlite3.Error, ValueError) as e:
             print(f"DB Error on create_order: {e}")
             return None
 
     def get_order_status(self, order_id):
-        self.cursor.execute('SELECT status FROM orders WHERE id = ?', (order_id,))
-        result = self.cursor.fetchone()
+        result = self.connections.reader().execute('SELECT status FROM orders WHERE id = ?', (order_id,)).fetchone()
         return result[0] if result else None
 
     def update_order_status(self, order_id, new_status):
-        self.cursor.execute('UPDATE orders SET status = ? WHERE id = ?', (new_status, order_id))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        def change_status(conn):
+            order = conn.execute('SELECT order_date, status, total FROM orders WHERE id = ?', (order_id,)).fetchone()
+            if order is None:
+                return False
+            conn.execute('UPDATE orders SET status = ? WHERE id = ?', (new_status, order_id))
+            day, old_status, total = order
+            if old_status != new_status:
+                self._apply_order_to_rollups(conn, order_id, day, old_status, total, -1)
+                self._apply_order_to_rollups(conn, order_id, day, new_status, total, +1)
+                conn.execute('INSERT INTO order_status_history (order_id, old_status, new_status, changed_at) VALUES (?, ?, ?, ?)',
+                             (order_id, old_status, new_status, _now()))
+            return True
+        return self.connections.run_write(change_status)
+
+    def bulk_update_order_status(self, new_status, order_ids=None, from_status=None):
+        """Muda o status de várias encomendas numa única transação; retorna quantas mudaram.
+
+        order_ids limita às encomendas da lista e from_status às que estão
+        nesse status (ao menos um dos dois é obrigatório). Com os dois, uma
+        encomenda que outro terminal já tirou de from_status fica como está.
+        """
+        if order_ids is None and from_status is None:
+            raise ValueError("Informe order_ids ou from_status")
+        def change_status(conn):
+            # Encomendas afetadas numa tabela temporária: agregados, histórico e status saem dela em SQL
+            conn.execute('''CREATE TEMP TABLE IF NOT EXISTS bulk_status (
+                                order_id INTEGER PRIMARY KEY, day TEXT, old_status TEXT, total INTEGER)''')
+            conn.execute('DELETE FROM temp.bulk_status')
+            if order_ids is not None:
+                changed = conn.executemany('''
+                    INSERT OR IGNORE INTO temp.bulk_status SELECT id, order_date, status, total FROM orders
+                    WHERE id = ? AND status <> ? AND status = COALESCE(?, status)
+                ''', [(order_id, new_status, from_status) for order_id in order_ids]).rowcount
+            else:
+                changed = conn.execute('''
+                    INSERT INTO temp.bulk_status SELECT id, order_date, status, total FROM orders
+                    WHERE status = ? AND status <> ?
+                ''', (from_status, new_status)).rowcount
+            if not changed:
+                return 0
+            # Tira os totais do status antigo e soma no novo (o novo é um só: agrupa só pelo dia)
+            for sign, status_column, group_column, params in ((-1, 'b.old_status', ', b.old_status', ()),
+                                                              (+1, '?', '', (new_status,))):
+                conn.execute(f'''
+                    INSERT INTO sales_daily (day, status, orders, revenue)
+                    SELECT b.day, {status_column}, {sign} * COUNT(*), {sign} * SUM(b.total) FROM temp.bulk_status b
+                    GROUP BY b.day{group_column}
+                    ON CONFLICT (day, status) DO UPDATE SET orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+                ''', params)
+                # CROSS JOIN fixa a ordem: a tabela temporária não tem estatísticas e o
+                # planejador preferiria percorrer order_items inteira
+                conn.execute(f'''
+                    INSERT INTO product_sales_daily (day, status, product_id, units)
+                    SELECT b.day, {status_column}, oi.product_id, {sign} * SUM(oi.quantity)
+                    FROM temp.bulk_status b CROSS JOIN order_items oi ON oi.order_id = b.order_id
+                    WHERE oi.product_id IS NOT NULL GROUP BY b.day{group_column}, oi.product_id
+                    ON CONFLICT (day, status, product_id) DO UPDATE SET units = units + excluded.units
+                ''', params)
+            conn.execute('''DELETE FROM sales_daily WHERE orders = 0
+                            AND (day, status) IN (SELECT DISTINCT day, old_status FROM temp.bulk_status)''')
+            conn.execute('''DELETE FROM product_sales_daily WHERE units = 0
+                            AND (day, status) IN (SELECT DISTINCT day, old_status FROM temp.bulk_status)''')
+            conn.execute('''
+                INSERT INTO order_status_history (order_id, old_status, new_status, changed_at)
+                SELECT order_id, old_status, ?, ? FROM temp.bulk_status ORDER BY order_id
+            ''', (new_status, _now()))
+            conn.execute('UPDATE orders SET status = ? WHERE id IN (SELECT order_id FROM temp.bulk_status)', (new_status,))
+            return changed
+        try:
+            return self.connections.run_write(change_status)
+        except sqlite3.Error as e:
+            print(f"DB Error on bulk_update_order_status: {e}")
+            return None
+
+    def get_orders_by_status(self, status, before_id=None, limit=200):
+        """Encomendas (Order) num status, mais recentes primeiro, paginadas pelo id."""
+        if before_id is None:
+            before_id = sys.maxsize
+        orders = self._rows_as(Order).execute('''
+            SELECT id, client_name, order_date, status, total / 100.0 FROM orders
+            WHERE status = ? AND id < ? ORDER BY id DESC LIMIT ?
+        ''', (status, before_id, limit)).fetchall()
+        self._item_loader(orders)
+        return orders
+
+    def find_orders(self, client_prefix=None, statuses=None, date_from=None, date_to=None, limit=50, after=None,
+                    with_items=False):
+        """Encomendas (Order) do filtro, mais recentes primeiro (por data e id), paginadas por chave.
+
+        client_prefix é o começo do nome do cliente, sem diferenciar maiúsculas
+        de minúsculas (só nas letras sem acento, como o NOCASE do SQLite); as
+        datas são inclusivas. after é a chave (data, id) da última encomenda da
+        página anterior. with_items já devolve os itens carregados, para telas
+        que formatam na thread do Tk. O arquivo morto fica de fora.
+        """
+        prefix = (client_prefix or '').strip()
+        # Prefixo longo, de poucos clientes: o índice (cliente, data) é o mais seletivo. Senão, o índice
+        # de status e data ou o de data, filtrando o nome. Todos já leem na ordem pedida e param no limite.
+        by_client = len(prefix) >= self.CLIENT_PREFIX_INDEX_MIN_CHARS
+        date_to = date_to or '9999-12-31'
+        conditions = ['order_date BETWEEN ? AND ?']
+        params = [date_from or '', date_to]
+        if after is not None:
+            # A faixa de datas termina na chave: a leitura começa nela, sem passar pelas páginas anteriores
+            params[1] = min(date_to, after[0])
+            conditions.append('(order_date, id) < (?, ?)')
+            params += [after[0], after[1]]
+        statuses = list(statuses or [])
+        names = self._client_names(prefix) if by_client else None
+        if names is None and prefix:
+            conditions.append('+client_name COLLATE NOCASE >= ? AND +client_name COLLATE NOCASE < ?')
+            params += [prefix, prefix + '\U0010ffff'] # Maior que qualquer continuação do prefixo
+        if names is not None and statuses:
+            conditions.append(f"+status IN ({', '.join('?' * len(statuses))})")
+            params += statuses
+        # Uma leitura do índice por cliente (ou por status), já na ordem; as páginas são juntadas aqui
+        if names is not None:
+            leading, values = 'client_name = ? COLLATE NOCASE', names
+        elif statuses:
+            leading, values = 'status = ?', statuses
+        else:
+            leading, values = None, [None]
+        sql = f'''SELECT id, client_name, order_date, status, total / 100.0 FROM orders
+                  WHERE {' AND '.join(([leading] if leading else []) + conditions)}
+                  ORDER BY order_date DESC, id DESC LIMIT ?'''
+        pages = [self._rows_as(Order).execute(sql, ([value] if leading else []) + params + [limit]).fetchall()
+                 for value in values]
+        if len(pages) == 1:
+            orders = pages[0]
+        else:
+            orders = list(heapq.merge(*pages, key=lambda order: (order.order_date, order.id), reverse=True))[:limit]
+        loader = self._item_loader(orders)
+        if with_items:
+            loader.load()
+        return orders
+
+    def _client_names(self, prefix):
+        """Nomes de clientes (um por grafia sem diferença de maiúsculas) que começam com prefix,
+        um salto no índice para cada; None se passarem de CLIENT_PREFIX_MAX_NAMES."""
+        names, bound, operator = [], prefix, '>='
+        cursor = self.connections.reader()
+        while len(names) <= self.CLIENT_PREFIX_MAX_NAMES:
+            row = cursor.execute(f'''SELECT client_name FROM orders
+                WHERE client_name COLLATE NOCASE {operator} ? AND client_name COLLATE NOCASE < ?
+                ORDER BY client_name COLLATE NOCASE LIMIT 1''', (bound, prefix + '\U0010ffff')).fetchone()
+            if row is None:
+                return names
+            names.append(row[0])
+            bound, operator = row[0], '>'
+        return None
+
+    def get_status_timeline(self, order_id):
+        """(data e hora, status anterior, novo status) de cada mudança da encomenda, em ordem."""
+        return self.connections.reader().execute('''
+            SELECT changed_at, old_status, new_status FROM order_status_history
+            WHERE order_id = ? ORDER BY id
+        ''', (order_id,)).fetchall()
+
+    def get_status_history(self, status, since=None, limit=100):
+        """(data e hora, encomenda, status anterior) das mudanças para um status, mais recentes primeiro."""
+        return self.connections.reader().execute('''
+            SELECT changed_at, order_id, old_status FROM order_status_history
+            WHERE new_status = ? AND changed_at >= ? ORDER BY changed_at DESC LIMIT ?
+        ''', (status, since or '', limit)).fetchall()
+
+    def get_lead_times(self, from_status='Pendente', to_status='Concluído', days=90):
+        """Tempo (em horas) entre a primeira entrada em from_status e cada chegada a
+        to_status nos últimos dias: {'count', 'mean', 'p50', 'p90', 'max'} (None sem dados).
+
+        Parte das mudanças para to_status no período (índice por status e data)
+        e busca o início de cada encomenda pelo índice por encomenda.
+        """
+        since = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat(' ', 'seconds')
+        hours = [row[0] for row in self.connections.reader().execute('''
+            SELECT (julianday(t.changed_at) - julianday(f.changed_at)) * 24 FROM order_status_history t
+            JOIN order_status_history f ON f.id = (
+                SELECT id FROM order_status_history WHERE order_id = t.order_id AND new_status = ? ORDER BY id LIMIT 1)
+            WHERE t.new_status = ? AND t.changed_at >= ? AND f.id < t.id
+        ''', (from_status, to_status, since))]
+        if not hours:
+            return None
+        hours.sort()
+        return {'count': len(hours), 'mean': sum(hours) / len(hours), 'p50': hours[len(hours) // 2],
+                'p90': hours[min(len(hours) - 1, int(len(hours) * 0.9))], 'max': hours[-1]}
+
+    def get_orders_page(self, before_id=None, limit=50):
+        """Página de encomendas (mais recentes primeiro) com seus itens, paginada pelo id."""
+        if before_id is None:
+            before_id = sys.maxsize
+        orders = self._rows_as(Order).execute('''
+            SELECT id, client_name, order_date, status, total / 100.0 FROM orders
+            WHERE id < ? ORDER BY id DESC LIMIT ?
+        ''', (before_id, limit)).fetchall()
+        # A página é formatada na thread da tela, que não deve ler o banco: os itens já vão carregados
+        self._item_loader(orders).load()
+        return orders
+
+    def iter_full_report(self, batch_size=500):
+        """Gera as encomendas (Order), mais recentes primeiro, lendo em lotes.
+
+        Os itens de um lote são lidos numa consulta só, quando os de alguma
+        encomenda dele forem acessados; um mesmo produto vira um único Product
+        em todo o relatório.
+        """
+        products = {}
+        cursor = self._rows_as(Order)
+        try:
+            cursor.execute('SELECT id, client_name, order_date, status, total / 100.0 FROM orders ORDER BY id DESC')
+            while True:
+                orders = cursor.fetchmany(batch_size)
+                if not orders:
+                    break
+                self._item_loader(orders, products)
+                yield from orders
+        finally:
+            cursor.close()
 
     def get_full_report(self):
-        self.cursor.execute('SELECT id, client_name, order_date, status, total FROM orders ORDER BY id DESC')
-        orders = self.cursor.fetchall()
-        report_data = []
-        for order in orders:
-            order_id = order[0]
-            self.cursor.execute('''
-                SELECT p.name, oi.quantity
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.id
-                WHERE oi.order_id = ?
-            ''', (order_id,))
-            items = self.cursor.fetchall()
-            report_data.append({'order': order, 'items': items})
-        return report_data
+        return list(self.iter_full_report())
+
+    def _item_loader(self, orders, products=None):
+        """Liga as encomendas a um ItemLoader; products (id -> Product) é compartilhado entre os lotes."""
+        products = {} if products is None else products
+        return ItemLoader(lambda order_ids: self._load_order_items(order_ids, products), orders)
+
+    def _load_order_items(self, order_ids, products):
+        """{id da encomenda: [OrderItem]} das encomendas dadas, na ordem dos itens.
+
+        Itens de produtos removidos ficam de fora. Os produtos que ainda não
+        estão em products são lidos numa segunda consulta e guardados lá.
+        """
+        conn = self.connections.reader()
+        rows = conn.execute(f'''
+            SELECT order_id, product_id, quantity, unit_price / 100.0 FROM order_items
+            WHERE order_id IN ({', '.join('?' * len(order_ids))}) AND product_id IS NOT NULL
+            ORDER BY order_id, item_id
+        ''', order_ids).fetchall()
+        missing = list({row[1] for row in rows} - products.keys())
+        if missing:
+            products.update((product.id, product) for product in self._rows_as(Product).execute(
+                f"SELECT id, name, description, price / 100.0 FROM products WHERE id IN ({', '.join('?' * len(missing))})",
+                missing))
+        items = {}
+        for order_id, product_id, quantity, unit_price in rows:
+            product = products.get(product_id)
+            if product is not None:
+                items.setdefault(order_id, []).append(OrderItem(product, quantity, unit_price))
+        return items
+
+    @staticmethod
+    def _order_filter(date_from, date_to, statuses):
+        """(condição SQL, parâmetros) das encomendas entre as datas (inclusive) e nos status dados."""
+        # Sem datas usa o intervalo todo: a busca continua indo pelo índice de order_date
+        where, params = 'o.order_date BETWEEN ? AND ?', [date_from or '', date_to or '9999-12-31']
+        if statuses:
+            # O + impede o uso do índice de status, que obrigaria a ordenar o resultado inteiro
+            where += f" AND +o.status IN ({', '.join('?' * len(statuses))})"
+            params += list(statuses)
+        return where, params
+
+    def count_orders(self, date_from=None, date_to=None, statuses=None, include_archive=False):
+        """Quantidade de encomendas no filtro de iter_order_rows (para mostrar o progresso)."""
+        where, params = self._order_filter(date_from, date_to, statuses)
+        schemas = ['main', 'archive'] if include_archive and self._use_archive() else ['main']
+        sql = ' + '.join(f'(SELECT COUNT(*) FROM {schema}.orders o WHERE {where})' for schema in schemas)
+        return self.connections.reader().execute(f'SELECT {sql}', params * len(schemas)).fetchone()[0]
+
+    def get_order_date_range(self, include_archive=False):
+        """(primeira, última) data de encomenda, ou (None, None) se não houver encomendas."""
+        schemas = ['main', 'archive'] if include_archive and self._use_archive() else ['main']
+        # Um MIN/MAX por subconsulta: assim cada um lê só uma ponta do índice de order_date
+        sql = ' UNION ALL '.join(f'SELECT (SELECT MIN(order_date) FROM {schema}.orders), '
+                                 f'(SELECT MAX(order_date) FROM {schema}.orders)' for schema in schemas)
+        ranges = [row for row in self.connections.reader().execute(sql) if row[0] is not None]
+        if not ranges:
+            return None, None
+        return min(first for first, _ in ranges), max(last for _, last in ranges)
+
+    def iter_order_rows(self, date_from=None, date_to=None, statuses=None, batch_size=1000, include_archive=False):
+        """Gera, em lotes, uma linha por item das encomendas do filtro, por data e id.
+
+        Linha: (id, cliente, data, status, total, id do produto, nome do produto,
+        quantidade, preço unitário). Encomendas sem itens vêm numa linha com os
+        campos do item vazios. A leitura segue a ordem do índice de order_date e
+        do índice de itens, sem ordenar nada na memória; com include_archive as
+        encomendas do arquivo morto entram intercaladas na mesma ordem.
+        """
+        where, params = self._order_filter(date_from, date_to, statuses)
+        def select(schema):
+            return f'''
+                SELECT o.id, o.client_name, o.order_date, o.status, o.total / 100.0,
+                       oi.product_id, p.name, oi.quantity, oi.unit_price / 100.0, oi.item_id
+                FROM {schema}.orders o
+                LEFT JOIN {schema}.order_items oi ON oi.order_id = o.id
+                LEFT JOIN main.products p ON p.id = oi.product_id
+                WHERE {where}'''
+        if include_archive and self._use_archive():
+            # As duas partes já saem ordenadas pelos índices: o SQLite só intercala (MERGE)
+            sql, params = f"{select('main')} UNION ALL {select('archive')} ORDER BY 3, 1, 10", params * 2
+        else:
+            sql = f"{select('main')} ORDER BY o.order_date, o.id, oi.item_id"
+        cursor = self.connections.reader().cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[:-1] for row in rows] # Sem o item_id, que só serve para a ordem
+        finally:
+            cursor.close()
     
+    # --- MÉTODOS DE ANÁLISE (TABELAS DE AGREGADOS) ---
+    def _apply_order_to_rollups(self, conn, order_id, day, status, total, sign):
+        """Soma (sign=+1) ou retira (sign=-1) uma encomenda (total em centavos) dos agregados do dia/status."""
+        conn.execute('''
+            INSERT INTO sales_daily (day, status, orders, revenue) VALUES (?, ?, ?, ?)
+            ON CONFLICT (day, status) DO UPDATE SET orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+        ''', (day, status, sign, sign * total))
+        conn.execute('''
+            INSERT INTO product_sales_daily (day, status, product_id, units)
+            SELECT ?, ?, product_id, ? * SUM(quantity) FROM order_items
+            WHERE order_id = ? AND product_id IS NOT NULL GROUP BY product_id
+            ON CONFLICT (day, status, product_id) DO UPDATE SET units = units + excluded.units
+        ''', (day, status, sign, order_id))
+        if sign < 0:
+            conn.execute('DELETE FROM sales_daily WHERE day = ? AND status = ? AND orders = 0', (day, status))
+            conn.execute('DELETE FROM product_sales_daily WHERE day = ? AND status = ? AND units = 0', (day, status))
+
+    def get_monthly_revenue(self, months=12):
+        """(mês AAAA-MM, encomendas, faturamento) dos últimos meses, sem as canceladas."""
+        return self.connections.reader().execute('''
+            SELECT substr(day, 1, 7), SUM(orders), SUM(revenue) / 100.0 FROM sales_daily
+            WHERE day >= ? AND status <> ? GROUP BY substr(day, 1, 7) ORDER BY 1
+        ''', (_months_ago(months), self.CANCELLED_STATUS)).fetchall()
+
+    def get_status_summary(self, months=12):
+        """(status, encomendas, valor) das encomendas feitas nos últimos meses."""
+        return self.connections.reader().execute('''
+            SELECT status, SUM(orders), SUM(revenue) / 100.0 FROM sales_daily
+            WHERE day >= ? GROUP BY status ORDER BY 2 DESC
+        ''', (_months_ago(months),)).fetchall()
+
+    def get_top_products(self, days=30, limit=10):
+        """(id, nome, unidades) dos produtos mais vendidos nos últimos dias."""
+        since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+        return self.connections.reader().execute('''
+            SELECT ps.product_id, COALESCE(p.name, '(produto removido)'), SUM(ps.units) FROM product_sales_daily ps
+            LEFT JOIN products p ON p.id = ps.product_id
+            WHERE ps.day >= ? AND ps.status <> ? GROUP BY ps.product_id ORDER BY 3 DESC LIMIT ?
+        ''', (since, self.CANCELLED_STATUS, limit)).fetchall()
+
+    def _rollup_sources(self):
+        """Tabelas de onde os agregados são recalculados: as encomendas arquivadas continuam contando."""
+        if self._use_archive():
+            return {'orders': _ALL_ORDERS, 'order_items': _ALL_ORDER_ITEMS}
+        return {'orders': 'orders', 'order_items': 'order_items'}
+
+    def rebuild_rollups(self):
+        """Recalcula os agregados a partir de orders/order_items (bancos antigos ou após correções)."""
+        sources = self._rollup_sources()
+        def rebuild(conn):
+            conn.execute('DELETE FROM sales_daily')
+            conn.execute('DELETE FROM product_sales_daily')
+            conn.execute(f'INSERT INTO sales_daily (day, status, orders, revenue) {_SALES_DAILY_RECOMPUTE.format(**sources)}')
+            conn.execute(f'INSERT INTO product_sales_daily (day, status, product_id, units) '
+                         f'{_PRODUCT_SALES_RECOMPUTE.format(**sources)}')
+        self.connections.run_write(rebuild)
+
+    def check_rollups(self):
+        """Compara os agregados com um recálculo completo; devolve as divergências (vazio = consistente)."""
+        sources = self._rollup_sources()
+        conn = self.connections.reader()
+        differences = []
+        for table, columns, recompute in (
+                ('sales_daily', 'day, status, orders, revenue', _SALES_DAILY_RECOMPUTE),
+                ('product_sales_daily', 'day, status, product_id, units', _PRODUCT_SALES_RECOMPUTE)):
+            expected = f'SELECT {columns} FROM ({recompute.format(**sources)})'
+            stored = f'SELECT {columns} FROM {table}'
+            for row in conn.execute(f'{stored} EXCEPT {expected}'):
+                differences.append((table, 'armazenado', row))
+            for row in conn.execute(f'{expected} EXCEPT {stored}'):
+                differences.append((table, 'esperado', row))
+        return differences
+
+    # --- ARQUIVO MORTO ---
+    def open_archive(self):
+        """Anexa o arquivo morto, se ele já existir; retorna se está anexado.
+
+        Sem isso ele é anexado na primeira consulta que o usar. Quem tem
+        threads de leitura (server.py) chama na abertura, para que o anexo não
+        fique para elas. Um arquivo morto novo só é criado por archive_orders.
+        """
+        return self._use_archive()
+
+    def _use_archive(self, create=False):
+        """Anexa o arquivo morto às conexões (criando-o, com create); retorna se ele está anexado.
+
+        O anexo, o synchronous e as tabelas são feitos juntos, sob o lock de
+        escrita (ConnectionManager.attach): pode ser chamado de qualquer thread,
+        e nenhum leitor vê o arquivo morto antes de ele estar pronto.
+        """
+        if self.connections.attached('archive'):
+            return True
+        if not create and (self.archive_name == ':memory:' or not os.path.exists(self.archive_name)):
+            return False
+        # A cópia de cada lote precisa estar no disco antes de apagar as encomendas originais
+        self.connections.attach('archive', self.archive_name, synchronous='FULL', setup=migrations.create_archive_tables)
+        return True
+
+    def archive_orders(self, older_than_days=365, batch_size=500, on_batch=None, cancel=None):
+        """Move para o arquivo morto as encomendas fechadas (CLOSED_STATUSES) com mais
+        de older_than_days dias; retorna quantas foram movidas.
+
+        Cada lote passa por três transações: a cópia (só o arquivo morto é
+        gravado), a conferência e remoção das originais (só o banco principal) e
+        a baixa do lote pendente. Se o processo parar no meio, a próxima
+        execução retoma o lote pendente. A conferência compara quantidade e
+        totais de encomendas, itens e histórico; se não bater (a encomenda
+        mudou no meio do caminho), as originais ficam onde estão, a cópia é
+        descartada e ArchiveError é lançado. Erros do banco são repassados.
+
+        on_batch(movidas até agora) é chamado a cada lote; cancel (com is_set())
+        interrompe entre um lote e outro. Os agregados de vendas não mudam.
+        """
+        self._use_archive(create=True)
+        moved = self._finish_archive_batch()
+        cutoff = (datetime.date.today() - datetime.timedelta(days=older_than_days)).isoformat()
+        after = ('', 0) # (data, id) do fim do lote anterior: as antigas ainda abertas não são relidas a cada lote
+        while cancel is None or not cancel.is_set():
+            after = self.connections.run_write(lambda conn: self._copy_archive_batch(conn, cutoff, after, batch_size))
+            if after is None:
+                break
+            moved += self._finish_archive_batch()
+            if on_batch:
+                on_batch(moved)
+        return moved
+
+    def _copy_archive_batch(self, conn, cutoff, after, batch_size):
+        """Copia o próximo lote para o arquivo morto e o marca como pendente; retorna a (data, id) do último."""
+        copied = conn.execute(f'''
+            INSERT INTO archive.archive_pending (order_id)
+            SELECT id FROM main.orders
+            WHERE order_date < ? AND (order_date, id) > (?, ?) AND +status IN ({', '.join('?' * len(self.CLOSED_STATUSES))})
+            ORDER BY order_date, id LIMIT ?
+        ''', (cutoff, *after, *self.CLOSED_STATUSES, batch_size)).rowcount
+        if not copied:
+            return None
+        conn.execute('''INSERT OR REPLACE INTO archive.orders (id, client_name, order_date, status, total)
+                        SELECT id, client_name, order_date, status, total FROM main.orders
+                        WHERE id IN (SELECT order_id FROM archive.archive_pending)''')
+        conn.execute('''INSERT OR REPLACE INTO archive.order_items (item_id, order_id, product_id, quantity, unit_price)
+                        SELECT item_id, order_id, product_id, quantity, unit_price FROM main.order_items
+                        WHERE order_id IN (SELECT order_id FROM archive.archive_pending)''')
+        conn.execute('''INSERT OR REPLACE INTO archive.order_status_history (id, order_id, old_status, new_status, changed_at)
+                        SELECT id, order_id, old_status, new_status, changed_at FROM main.order_status_history
+                        WHERE order_id IN (SELECT order_id FROM archive.archive_pending)''')
+        return conn.execute('''SELECT order_date, id FROM main.orders WHERE id IN (SELECT order_id FROM archive.archive_pending)
+                               ORDER BY order_date DESC, id DESC LIMIT 1''').fetchone()
+
+    @staticmethod
+    def _archive_batch_totals(conn, schema):
+        """Quantidades e totais das encomendas do lote pendente em schema (main ou archive)."""
+        batch = 'SELECT order_id FROM temp.archive_batch'
+        return conn.execute(f'''
+            SELECT (SELECT COUNT(*) FROM {schema}.orders WHERE id IN ({batch})),
+                   (SELECT COALESCE(SUM(total), 0) FROM {schema}.orders WHERE id IN ({batch})),
+                   (SELECT COUNT(*) FROM {schema}.order_items WHERE order_id IN ({batch})),
+                   (SELECT COALESCE(SUM(quantity), 0) FROM {schema}.order_items WHERE order_id IN ({batch})),
+                   (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM {schema}.order_items WHERE order_id IN ({batch})),
+                   (SELECT COUNT(*) FROM {schema}.order_status_history WHERE order_id IN ({batch})),
+                   (SELECT COALESCE(MAX(id), 0) FROM {schema}.order_status_history WHERE order_id IN ({batch}))
+        ''').fetchone()
+
+    def _finish_archive_batch(self):
+        """Confere o lote pendente, apaga as originais e dá baixa no lote; retorna quantas foram apagadas."""
+        def verify_and_delete(conn):
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS archive_batch (order_id INTEGER PRIMARY KEY)')
+            conn.execute('DELETE FROM temp.archive_batch')
+            # Só as que ainda estão no banco principal (após uma queda, parte do lote pode já ter sido apagada)
+            pending = conn.execute('''INSERT INTO temp.archive_batch SELECT p.order_id FROM archive.archive_pending p
+                                      CROSS JOIN main.orders o ON o.id = p.order_id''').rowcount
+            if not pending:
+                return 0
+            original = self._archive_batch_totals(conn, 'main')
+            copy = self._archive_batch_totals(conn, 'archive')
+            if original != copy:
+                raise ArchiveError(f"A cópia de {pending} encomenda(s) não confere com as originais: {copy} != {original}")
+            conn.execute('DELETE FROM main.order_status_history WHERE order_id IN (SELECT order_id FROM temp.archive_batch)')
+            conn.execute('DELETE FROM main.order_items WHERE order_id IN (SELECT order_id FROM temp.archive_batch)')
+            conn.execute('DELETE FROM main.orders WHERE id IN (SELECT order_id FROM temp.archive_batch)')
+            return pending
+        try:
+            deleted = self.connections.run_write(verify_and_delete)
+        except ArchiveError:
+            # As originais continuam valendo: descarta a cópia para não contar a encomenda duas vezes
+            self.connections.run_write(self._discard_archive_batch)
+            raise
+        self.connections.run_write(lambda conn: conn.execute('DELETE FROM archive.archive_pending'))
+        return deleted
+
+    @staticmethod
+    def _discard_archive_batch(conn):
+        # Só as cópias de encomendas que continuam no banco principal
+        batch = 'SELECT p.order_id FROM archive.archive_pending p CROSS JOIN main.orders o ON o.id = p.order_id'
+        for table, column in (('order_status_history', 'order_id'), ('order_items', 'order_id'), ('orders', 'id')):
+            conn.execute(f'DELETE FROM archive.{table} WHERE {column} IN ({batch})')
+        conn.execute('DELETE FROM archive.archive_pending')
+
+    def get_archive_summary(self):
+        """{'hot', 'archived', 'pending'}: encomendas no banco principal, no arquivo morto e num lote
+        interrompido (None se ainda não há arquivo morto)."""
+        if not self._use_archive():
+            return None
+        counts = self.connections.reader().execute('''
+            SELECT (SELECT COUNT(*) FROM main.orders), (SELECT COUNT(*) FROM archive.orders),
+                   (SELECT COUNT(*) FROM archive.archive_pending)
+        ''').fetchone()
+        return dict(zip(('hot', 'archived', 'pending'), counts))
+
     def close(self):
-        """Fecha a conexão com o banco de dados."""
-        if self.conn:
-            self.conn.close()
\ No newline at end of file
+        """Fecha as conexões com o banco de dados."""
+        self.connections.close()
+
+
+class UnitOfWork:
+    """Escritas anotadas agora e gravadas todas juntas, numa única transação, em commit.
+
+        uow = UnitOfWork()
+        uow.add_product('Mesa', 'Mesa de jantar', '350.00')
+        uow.update_order_status(42, 'Entregue')
+        results = uow.commit(db) # resultados na ordem das chamadas
+
+    Como só guarda nomes e argumentos, funciona também com o RemoteDatabase
+    (uma transação no servidor) e pode ser montada na thread da tela e
+    gravada pelo AsyncDatabase (dbq.call(uow.commit)). Para passos que
+    dependem do resultado de outros, use db.transaction().
+    """
+    METHODS = frozenset({'add_user', 'add_product', 'update_product', 'delete_product', 'upsert_products',
+                         'create_order', 'update_order_status', 'bulk_update_order_status'})
+
+    def __init__(self):
+        self.operations = []
+
+    def __getattr__(self, name):
+        if name not in self.METHODS:
+            raise AttributeError(name)
+        return lambda *args: self.operations.append((name, args))
+
+    def __len__(self):
+        return len(self.operations)
+
+    def commit(self, db):
+        """Grava as operações em db (DatabaseManager ou RemoteDatabase) e esvazia a unidade."""
+        results = db.run_operations(self.operations)
+        self.operations = []
+        return results
@@ -0,0 +1,215 @@
+# instrumentation.py
+"""Medição opcional das consultas feitas pelo DatabaseManager.
+
+QueryInstrumentation.attach(db) liga a medição numa instância: os métodos
+públicos passam a ser cronometrados e cada comando SQL é registrado pelo
+sqlite3.set_trace_callback das conexões. Sem attach nada muda na instância,
+então com a medição desligada o custo é zero.
+
+O trace do SQLite só avisa quando um comando começa; o tempo de um comando é
+medido até o início do próximo ou até o fim do método que o chamou (inclui a
+leitura das linhas). A SQL vem com os valores já substituídos; ela é guardada
+normalizada (cada valor vira ?), o que agrupa as execuções do mesmo comando e
+evita gravar senhas e nomes no log. O número de parâmetros é o de valores
+encontrados na SQL (constantes escritas no próprio comando também contam).
+"""
+import bisect
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import re
+import threading
+import time
+
+# Limites (em ms) das faixas dos histogramas; a última faixa é "acima de 2500"
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+OUTSIDE_METHOD = '(fora de método)'
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|[xX]'[0-9a-fA-F]*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])|\bNULL\b")
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """(SQL com os valores trocados por ?, quantidade de valores trocados)."""
+    normalized, count = _LITERAL.subn('?', sql)
+    return _SPACES.sub(' ', normalized).strip(), count
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows=0):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Estimativa pelo limite superior da faixa onde o percentil cai."""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'total_ms': round(self.total_ms, 3),
+                'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+                'max_ms': round(self.max_ms, 3), 'p50_ms': self.percentile(0.5), 'p95_ms': self.percentile(0.95),
+                'p99_ms': self.percentile(0.99), 'rows': self.rows,
+                'buckets': {f"<={limit}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}": count
+                            for i, (limit, count) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if count}}
+
+
+def _row_count(result):
+    if result is None or isinstance(result, bool):
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+class QueryInstrumentation:
+    """Histogramas por método e por comando SQL, com log rotativo das consultas lentas.
+
+    Uma instância pode ser ligada a vários DatabaseManager (ex.: um por thread
+    do AsyncDatabase); os números são somados.
+    """
+    def __init__(self, slow_threshold_ms=100, slow_log_path='slow_queries.log', max_bytes=1 << 20, backup_count=3):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_path = slow_log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._slow_log = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started = time.time()
+        self.methods = {} # nome do método -> Histogram
+        self.statements = {} # SQL normalizada -> [Histogram, parâmetros, métodos que a usam]
+
+    # --- LIGAR E DESLIGAR ---
+    def attach(self, db):
+        """Passa a medir os métodos públicos e os comandos SQL de db."""
+        for name, method in inspect.getmembers(type(db), inspect.isfunction):
+            if name.startswith('_') or inspect.isgeneratorfunction(method):
+                continue # Geradores são medidos por quem os consome (ex.: get_full_report)
+            setattr(db, name, self._timed(name, getattr(db, name)))
+        if hasattr(db, 'connections'): # RemoteDatabase não tem conexões: mede só os métodos
+            db.connections.set_trace_callback(self._trace)
+
+    def detach(self, db):
+        """Desfaz attach: a instância volta a não ter custo nenhum de medição."""
+        for name, value in list(vars(db).items()):
+            if hasattr(value, '__wrapped__'):
+                delattr(db, name)
+        if hasattr(db, 'connections'):
+            db.connections.set_trace_callback(None)
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.started = time.time()
+
+    # --- COLETA ---
+    def _timed(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            stack = self._stack()
+            stack.append(name)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            finally:
+                now = time.perf_counter()
+                self._finish_statement(now)
+                stack.pop()
+                self._record_method(name, (now - started) * 1000, _row_count(result))
+        return timed
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _trace(self, sql):
+        if sql.startswith('--'):
+            return # Comandos internos (ex.: do FTS5) contam no tempo do comando que os disparou
+        now = time.perf_counter()
+        current = getattr(self._local, 'statement', None)
+        if current is not None and current[0] == sql:
+            return # Gatilhos repetem o aviso do comando que os disparou
+        self._finish_statement(now)
+        stack = self._stack()
+        self._local.statement = (sql, now, stack[-1] if stack else OUTSIDE_METHOD)
+
+    def _finish_statement(self, now):
+        current = getattr(self._local, 'statement', None)
+        if current is None:
+            return
+        self._local.statement = None
+        sql, started, method = current
+        elapsed_ms = (now - started) * 1000
+        normalized, params = normalize_sql(sql)
+        with self._lock:
+            entry = self.statements.get(normalized)
+            if entry is None:
+                entry = self.statements[normalized] = [Histogram(), params, set()]
+            entry[0].add(elapsed_ms)
+            entry[2].add(method)
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._log_slow('sql', method, elapsed_ms, sql=normalized, params=params)
+
+    def _record_method(self, name, elapsed_ms, rows):
+        with self._lock:
+            histogram = self.methods.get(name)
+            if histogram is None:
+                histogram = self.methods[name] = Histogram()
+            histogram.add(elapsed_ms, rows)
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._log_slow('método', name, elapsed_ms, rows=rows)
+
+    def _log_slow(self, kind, method, elapsed_ms, **details):
+        if self._slow_log is None:
+            with self._lock:
+                if self._slow_log is None:
+                    logger = logging.getLogger(f'marcenaria.slow_queries.{id(self)}')
+                    logger.propagate = False
+                    logger.setLevel(logging.INFO)
+                    handler = logging.handlers.RotatingFileHandler(
+                        self.slow_log_path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                        encoding='utf-8', delay=True)
+                    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+                    logger.addHandler(handler)
+                    self._slow_log = logger
+        self._slow_log.info(json.dumps({'tipo': kind, 'metodo': method, 'ms': round(elapsed_ms, 3), **details},
+                                       ensure_ascii=False))
+
+    # --- CONSULTA ---
+    def snapshot(self):
+        """Cópia dos números atuais (métodos e comandos ordenados pelo tempo total)."""
+        with self._lock:
+            methods = {name: h.to_dict() for name, h in
+                       sorted(self.methods.items(), key=lambda item: -item[1].total_ms)}
+            statements = [{'sql': sql, 'params': params, 'methods': sorted(users), **h.to_dict()}
+                          for sql, (h, params, users) in
+                          sorted(self.statements.items(), key=lambda item: -item[1][0].total_ms)]
+        return {'since': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                'slow_threshold_ms': self.slow_threshold_ms, 'methods': methods, 'statements': statements}
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,158 @@
+# load_test.py
+"""Teste de carga do server.py com centenas de clientes simulados.
+
+Cada cliente é uma tarefa asyncio com sua própria conexão HTTP mantida
+aberta, que repete uma mistura de operações de um terminal (criar e
+atualizar encomendas, consultar produtos, paginar o relatório). Sem --url,
+sobe um servidor em outro processo sobre um banco temporário gerado pelo
+benchmarks.datagen. No fim mostra vazão, latências por operação e o tamanho
+médio dos lotes do group commit.
+
+Uso: python load_test.py [--clients 200] [--seconds 10] [--url http://127.0.0.1:8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+from benchmarks import datagen
+from stress_test import _percentile
+
+STATUSES = ["Pendente", "Em Produção", "Concluído", "Entregue", "Cancelado"]
+# (operação, peso)
+MIX = [('create_order', 30), ('update_order_status', 10), ('get_orders_page', 15), ('get_product', 20),
+       ('search_products', 15), ('get_order_status', 10)]
+
+
+async def _request(reader, writer, method, args):
+    body = json.dumps({'args': args}, ensure_ascii=False).encode('utf-8')
+    writer.write(f"POST /api/{method} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    data = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(data.get('error'))
+    return data['result']
+
+
+def _arguments(operation, rng, product_ids, max_order_id):
+    if operation == 'create_order':
+        items = [{'id': rng.choice(product_ids), 'quantity': rng.randint(1, 5)} for _ in range(rng.randint(1, 10))]
+        return [f"Cliente {rng.randrange(1000)}", items]
+    if operation == 'update_order_status':
+        return [rng.randint(1, max_order_id), rng.choice(STATUSES)]
+    if operation == 'get_orders_page':
+        return [rng.randint(1, max_order_id + 1), 50]
+    if operation == 'get_product':
+        return [rng.choice(product_ids)]
+    if operation == 'search_products':
+        return [rng.choice(["mesa", "cadeira ced", "ipê", "arm", "estante pin"]), 8]
+    return [rng.randint(1, max_order_id)]
+
+
+async def _client(host, port, seed, deadline, product_ids, max_order_id, latencies, errors):
+    rng = random.Random(seed)
+    operations, weights = zip(*MIX)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            args = _arguments(operation, rng, product_ids, max_order_id)
+            started = time.perf_counter()
+            try:
+                await _request(reader, writer, operation, args)
+            except RuntimeError:
+                errors[operation] = errors.get(operation, 0) + 1
+            latencies.setdefault(operation, []).append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def _run(host, port, clients, seconds):
+    reader, writer = await asyncio.open_connection(host, port)
+    # Ids existentes para sortear os argumentos
+    product_ids = [row[0] for row in await _request(reader, writer, 'get_products_page', [0, 1000])]
+    first_page = await _request(reader, writer, 'get_orders_page', [None, 1])
+    max_order_id = first_page[0]['order'][0] if first_page else 1
+    writer.close()
+    latencies, errors = {}, {}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(_client(host, port, seed, deadline, product_ids, max_order_id, latencies, errors)
+                           for seed in range(clients)))
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /stats HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    stats = json.loads((await reader.read()).split(b'\r\n\r\n', 1)[1])
+    writer.close()
+    return latencies, errors, stats
+
+
+def _wait_for_port(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Servidor não respondeu em {host}:{port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--url', help="Servidor já rodando (padrão: sobe um com banco temporário)")
+    parser.add_argument('--products', type=int, default=2000, help="Produtos do banco temporário")
+    parser.add_argument('--orders', type=int, default=20000, help="Encomendas do banco temporário")
+    parser.add_argument('--port', type=int, default=8766, help="Porta do servidor temporário")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port
+        else:
+            host, port = '127.0.0.1', args.port
+            db_name = os.path.join(tmp, 'load.db')
+            datagen.generate(db_name, args.products, args.orders, max_items=10)
+            server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+                                       '--db', db_name, '--host', host, '--port', str(port)], stdout=subprocess.DEVNULL)
+        try:
+            _wait_for_port(host, port)
+            latencies, errors, stats = asyncio.run(_run(host, port, args.clients, args.seconds))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} cliente(s), {args.seconds:.0f}s: {total / args.seconds:.0f} op/s no total")
+    for operation, _ in MIX:
+        values = latencies.get(operation, [])
+        print(f"  {operation:<20} {len(values) / args.seconds:8.1f} op/s  "
+              f"p50 {_percentile(values, 0.50) * 1000:7.2f} ms  p95 {_percentile(values, 0.95) * 1000:7.2f} ms  "
+              f"p99 {_percentile(values, 0.99) * 1000:7.2f} ms  erros {errors.get(operation, 0)}")
+    if stats['commits']:
+        print(f"  group commit: {stats['writes']} escrita(s) em {stats['commits']} commit(s), "
+              f"{stats['writes'] / stats['commits']:.1f} por commit em média (maior lote: {stats['largest_batch']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 # main.py
-from app import MarcenariaApp
+import time
+started = time.perf_counter() # Antes dos imports pesados, para o modo MARCENARIA_TIMING=1
 
 if __name__ == "__main__":
-    app = MarcenariaApp()
-    app.mainloop()
\ No newline at end of file
+    # Import aqui dentro: os processos do resumo do período (spawn) reimportam este
+    # módulo e não precisam da interface
+    from app import MarcenariaApp
+    app = MarcenariaApp(started)
+    app.mainloop()
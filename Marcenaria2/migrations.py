@@ -0,0 +1,233 @@
+# migrations.py
+"""Migrações numeradas do esquema do banco, controladas por PRAGMA user_version."""
+
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY, password TEXT NOT NULL)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            description TEXT, price REAL NOT NULL)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, client_name TEXT NOT NULL,
+            order_date TEXT NOT NULL, status TEXT NOT NULL, total REAL NOT NULL)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            item_id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER,
+            product_id INTEGER, quantity INTEGER NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id),
+            FOREIGN KEY (product_id) REFERENCES products(id))
+    ''')
+
+
+def _add_hot_path_indexes(conn):
+    # Cobre o relatório (itens de cada encomenda já na ordem de inserção) sem tocar na tabela
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id, item_id, product_id, quantity)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_client_name ON orders (client_name)')
+
+
+def _add_product_search_index(conn):
+    # Índice de texto completo sobre o próprio products (content=), mantido pelos gatilhos abaixo
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, description, content='products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3')
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def _add_sales_rollups(conn):
+    # Agregados diários mantidos por create_order/update_order_status na mesma transação
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            day TEXT NOT NULL, status TEXT NOT NULL, orders INTEGER NOT NULL, revenue REAL NOT NULL,
+            PRIMARY KEY (day, status)) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS product_sales_daily (
+            day TEXT NOT NULL, status TEXT NOT NULL, product_id INTEGER NOT NULL, units INTEGER NOT NULL,
+            PRIMARY KEY (day, status, product_id)) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO sales_daily (day, status, orders, revenue)
+        SELECT order_date, status, COUNT(*), SUM(total) FROM orders GROUP BY order_date, status
+    ''')
+    conn.execute('''
+        INSERT INTO product_sales_daily (day, status, product_id, units)
+        SELECT o.order_date, o.status, oi.product_id, SUM(oi.quantity)
+        FROM order_items oi JOIN orders o ON o.id = oi.order_id
+        WHERE oi.product_id IS NOT NULL
+        GROUP BY o.order_date, o.status, oi.product_id
+    ''')
+
+
+def _add_order_status_history(conn):
+    # Uma linha por mudança de status (old_status NULL = criação da encomenda)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_status_history (
+            id INTEGER PRIMARY KEY, order_id INTEGER NOT NULL REFERENCES orders(id),
+            old_status TEXT, new_status TEXT NOT NULL, changed_at TEXT NOT NULL)
+    ''')
+    # Linha do tempo de cada encomenda / primeira entrada num status (o id dá a ordem)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_status_history_order ON order_status_history (order_id, new_status)')
+    # Mudanças para um status num período (linha do tempo por status, prazos)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_status_history_status ON order_status_history (new_status, changed_at)')
+    # O histórico começa agora: das encomendas antigas só se conhece o status atual,
+    # registrado como se fosse o da criação (ficam de fora dos prazos entre status)
+    conn.execute('''
+        INSERT INTO order_status_history (order_id, old_status, new_status, changed_at)
+        SELECT id, NULL, status, order_date || ' 00:00:00' FROM orders ORDER BY id
+    ''')
+
+
+def _rebuild_table(conn, table, create_sql, select_sql):
+    """Recria a tabela com outro esquema (o SQLite não muda o tipo de uma coluna).
+
+    create_sql cria a tabela nova sob o nome {table}_new e select_sql lê as
+    linhas da antiga já no formato novo. Índices e gatilhos da tabela antiga
+    são recriados, e o contador do AUTOINCREMENT é preservado.
+    """
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL", (table,))]
+    sequence = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    conn.execute(create_sql)
+    conn.execute(f'INSERT INTO {table}_new {select_sql}')
+    conn.execute(f'DROP TABLE {table}')
+    conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    for sql in dependents:
+        conn.execute(sql)
+    if sequence is not None:
+        conn.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (sequence[0], table))
+
+
+def _store_money_as_cents(conn):
+    # Valores em centavos inteiros: somas exatas, sem arredondamento de ponto flutuante
+    _rebuild_table(conn, 'products', '''
+        CREATE TABLE products_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            description TEXT, price INTEGER NOT NULL)
+    ''', 'SELECT id, name, description, CAST(ROUND(price * 100) AS INTEGER) FROM products ORDER BY id')
+    _rebuild_table(conn, 'orders', '''
+        CREATE TABLE orders_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, client_name TEXT NOT NULL,
+            order_date TEXT NOT NULL, status TEXT NOT NULL, total INTEGER NOT NULL)
+    ''', 'SELECT id, client_name, order_date, status, CAST(ROUND(total * 100) AS INTEGER) FROM orders ORDER BY id')
+    # Preço unitário do momento da venda; para os itens antigos, o melhor que se tem é o preço atual
+    conn.execute('ALTER TABLE order_items ADD COLUMN unit_price INTEGER')
+    conn.execute('UPDATE order_items SET unit_price = (SELECT price FROM products WHERE products.id = order_items.product_id)')
+    conn.execute('DROP TABLE sales_daily')
+    conn.execute('''
+        CREATE TABLE sales_daily (
+            day TEXT NOT NULL, status TEXT NOT NULL, orders INTEGER NOT NULL, revenue INTEGER NOT NULL,
+            PRIMARY KEY (day, status)) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO sales_daily (day, status, orders, revenue)
+        SELECT order_date, status, COUNT(*), SUM(total) FROM orders GROUP BY order_date, status
+    ''')
+
+
+def _add_order_search_indexes(conn):
+    # Busca de encomendas (find_orders): por cliente, sem diferenciar maiúsculas, e por status, cada um
+    # já na ordem de data (substitui o índice do nome com diferença, que nenhuma consulta usava)
+    conn.execute('DROP INDEX IF EXISTS idx_orders_client_name')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_client_date ON orders (client_name COLLATE NOCASE, order_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders (status, order_date)')
+
+
+# Cada entrada é (versão, função). Nunca altere uma migração já publicada: crie a próxima.
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _add_hot_path_indexes),
+    (3, _add_product_search_index),
+    (4, _add_sales_rollups),
+    (5, _add_order_status_history),
+    (6, _store_money_as_cents),
+    (7, _add_order_search_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn, schema='main'):
+    return conn.execute(f'PRAGMA {schema}.user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação."""
+    if get_version(conn) >= LATEST_VERSION:
+        return get_version(conn)
+    for version, migration in MIGRATIONS:
+        # Relê a versão dentro da transação: outro processo pode ter migrado antes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_version(conn) < version:
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return get_version(conn)
+
+
+# --- ARQUIVO MORTO ---
+ARCHIVE_VERSION = 1
+
+
+def create_archive_tables(conn, schema='archive'):
+    """Cria as tabelas do arquivo morto no banco anexado como schema.
+
+    São as colunas das tabelas originais, para que uma consulta possa juntar
+    as duas partes com UNION ALL, com os índices que as consultas de
+    histórico completo usam.
+    """
+    if get_version(conn, schema) >= ARCHIVE_VERSION:
+        return
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.orders (
+            id INTEGER PRIMARY KEY, client_name TEXT NOT NULL,
+            order_date TEXT NOT NULL, status TEXT NOT NULL, total INTEGER NOT NULL)
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.order_items (
+            item_id INTEGER PRIMARY KEY, order_id INTEGER NOT NULL,
+            product_id INTEGER, quantity INTEGER NOT NULL, unit_price INTEGER)
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.order_status_history (
+            id INTEGER PRIMARY KEY, order_id INTEGER NOT NULL,
+            old_status TEXT, new_status TEXT NOT NULL, changed_at TEXT NOT NULL)
+    ''')
+    # Lote copiado e ainda não apagado das tabelas principais (retomado na próxima execução)
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {schema}.archive_pending (order_id INTEGER PRIMARY KEY)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_orders_order_date ON orders (order_date)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_order_items_order ON order_items (order_id, item_id, product_id, quantity)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_status_history_order ON order_status_history (order_id, new_status)')
+    conn.execute(f'PRAGMA {schema}.user_version = {ARCHIVE_VERSION}')
+
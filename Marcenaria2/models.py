@@ -0,0 +1,124 @@
+# models.py
+"""Linhas do banco como objetos pequenos, com __slots__ (sem __dict__ por objeto).
+
+O DatabaseManager monta os objetos direto do cursor (row_factory = from_row).
+Os itens de uma encomenda só são lidos quando acessados, numa consulta para o
+lote todo (ItemLoader), e os itens que apontam para o mesmo produto dividem o
+mesmo objeto Product.
+"""
+
+
+class Product:
+    __slots__ = ('id', 'name', 'description', 'price')
+
+    def __init__(self, id, name, description, price):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price # Em reais
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+    def to_json(self):
+        return [self.id, self.name, self.description, self.price]
+
+    def __repr__(self):
+        return f"Product({self.id!r}, {self.name!r}, {self.description!r}, {self.price!r})"
+
+
+class OrderItem:
+    __slots__ = ('product', 'quantity', 'unit_price')
+
+    def __init__(self, product, quantity, unit_price):
+        self.product = product
+        self.quantity = quantity
+        self.unit_price = unit_price # Preço do produto quando a encomenda foi feita
+
+    def to_json(self):
+        return [self.product, self.quantity, self.unit_price]
+
+    def __repr__(self):
+        return f"OrderItem({self.product.name!r}, {self.quantity!r}, {self.unit_price!r})"
+
+
+class Order:
+    __slots__ = ('id', 'client_name', 'order_date', 'status', 'total', '_items', '_loader')
+
+    def __init__(self, id, client_name, order_date, status, total, items=None):
+        self.id = id
+        self.client_name = client_name
+        self.order_date = order_date
+        self.status = status
+        self.total = total # Em reais
+        self._items = items
+        self._loader = None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+    @property
+    def items(self):
+        """Lista de OrderItem. Na primeira vez lê os itens de todo o lote da encomenda
+        (na thread que acessar); itens de produtos removidos ficam de fora."""
+        if self._items is None:
+            if self._loader is None:
+                raise ValueError(f"Itens da encomenda {self.id} não foram carregados")
+            self._loader.load()
+        return self._items
+
+    @property
+    def items_loaded(self):
+        return self._items is not None
+
+    def to_json(self):
+        """Formato do servidor. Não lê o banco: os itens só vão junto se já foram carregados."""
+        data = {'order': [self.id, self.client_name, self.order_date, self.status, self.total]}
+        if self._items is not None:
+            data['items'] = self._items
+        return data
+
+    @classmethod
+    def from_json(cls, data, products):
+        """Inverso de to_json; products (id -> Product) mantém um objeto por produto."""
+        items = data.get('items')
+        if items is not None:
+            items = [OrderItem(products.get(product[0]) or products.setdefault(product[0], Product(*product)),
+                               quantity, unit_price)
+                     for product, quantity, unit_price in items]
+        return cls(*data['order'], items=items)
+
+    def __repr__(self):
+        return f"Order({self.id!r}, {self.client_name!r}, {self.order_date!r}, {self.status!r}, {self.total!r})"
+
+
+class ItemLoader:
+    """Carrega, numa só chamada de fetch, os itens de um grupo de encomendas.
+
+    fetch(ids das encomendas) -> {id da encomenda: [OrderItem]}. Quem não
+    aparece no resultado fica com a lista vazia.
+    """
+    __slots__ = ('fetch', 'orders')
+
+    def __init__(self, fetch, orders):
+        self.fetch = fetch
+        self.orders = orders
+        for order in orders:
+            order._loader = self
+
+    def load(self):
+        pending = [order for order in self.orders if order._items is None]
+        items = self.fetch([order.id for order in pending]) if pending else {}
+        for order in pending:
+            order._items = items.get(order.id, [])
+            order._loader = None
+        self.orders = []
+
+
+def to_json(value):
+    """default= do json.dumps: os modelos viram as mesmas listas que as tuplas de antes."""
+    if isinstance(value, (Product, Order, OrderItem)):
+        return value.to_json()
+    raise TypeError(f"{type(value).__name__} não é serializável em JSON")
@@ -0,0 +1,270 @@
+# period_report.py
+"""Resumo de vendas de um período longo (o ano, vários anos) calculado direto de
+orders/order_items, em vários processos.
+
+O período é dividido em fatias de dias consecutivos. Cada fatia é somada num
+processo do ProcessPoolExecutor, com sua própria conexão somente leitura:
+encomendas e valor por mês e status, unidades e faturamento por produto. O
+processo que pediu só junta os parciais. Assim o cálculo usa os outros
+núcleos e não disputa a conexão (nem o GIL) das telas.
+
+As fatias são lidas em momentos diferentes: uma encomenda que muda de status
+durante o cálculo pode aparecer no status antigo ou no novo.
+
+Uso: python period_report.py [--from 2024-01-01] [--to 2025-12-31] [--workers N] [--include-archive]
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+SHARDS_PER_WORKER = 4 # Fatias menores equilibram a carga entre os processos e deixam o cancelamento mais rápido
+MIN_WORKER_ORDERS = 20000 # Abaixo disso por processo, abrir processos custa mais do que divide
+PROGRESS_OPCODES = 100000 # Instruções do SQLite entre as conferências do cancelamento
+TOP_PRODUCTS = 20
+WAIT_SECONDS = 0.1 # Intervalo entre as conferências do cancelamento enquanto espera as fatias
+
+_worker = {} # Conexão e evento de cancelamento de cada processo (preenchido por _init_worker)
+
+
+class PeriodSummary:
+    def __init__(self, date_from, date_to, shards=0, workers=0):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.shards = shards
+        self.shards_done = 0
+        self.workers = workers # 0 = calculado neste processo, sem ProcessPoolExecutor
+        self.cancelled = False
+        self.seconds = 0.0
+        self.orders = 0 # Todas as encomendas do período, inclusive canceladas
+        self.revenue = 0.0 # Sem as canceladas
+        self.by_status = [] # (status, encomendas, valor), mais encomendas primeiro
+        self.monthly = [] # (mês AAAA-MM, encomendas, faturamento), sem as canceladas
+        self.top_products = [] # (id, nome, unidades, faturamento), mais vendidos primeiro
+
+    def __repr__(self):
+        return (f"PeriodSummary({self.date_from}..{self.date_to}, orders={self.orders}, shards={self.shards_done}/"
+                f"{self.shards}, workers={self.workers}, cancelled={self.cancelled})")
+
+
+def default_workers(orders):
+    """Processos para somar orders encomendas: um por núcleo disponível, sem passar de um por MIN_WORKER_ORDERS."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError: # Windows e macOS
+        cores = os.cpu_count() or 1
+    return max(1, min(cores, orders // MIN_WORKER_ORDERS))
+
+
+def plan_shards(date_from, date_to, count):
+    """Divide os dias de date_from a date_to (inclusive) em até count fatias: (primeiro dia, dia seguinte ao último)."""
+    first, last = datetime.date.fromisoformat(date_from), datetime.date.fromisoformat(date_to)
+    days = (last - first).days + 1
+    count = max(1, min(count, days))
+    bounds = [first + datetime.timedelta(days=days * index // count) for index in range(count + 1)]
+    return [(start.isoformat(), end.isoformat()) for start, end in zip(bounds, bounds[1:])]
+
+
+# --- PROCESSOS ---
+def _connect(db_name, archive_name):
+    conn = sqlite3.connect(f'file:{db_name}?mode=ro', uri=True, timeout=5)
+    if archive_name:
+        conn.execute('ATTACH DATABASE ? AS archive', (f'file:{archive_name}?mode=ro',))
+    return conn
+
+
+def _init_worker(db_name, archive_name, cancel):
+    conn = _connect(db_name, archive_name)
+    # Interrompe a consulta em andamento quando o cálculo é cancelado
+    conn.set_progress_handler(cancel.is_set, PROGRESS_OPCODES)
+    _worker.update(conn=conn, cancel=cancel)
+
+
+def _run_shard(shard, cancelled_status):
+    if _worker['cancel'].is_set():
+        return None
+    try:
+        return aggregate_shard(_worker['conn'], shard, cancelled_status)
+    except sqlite3.OperationalError:
+        if _worker['cancel'].is_set():
+            return None # "interrupted": o progress handler parou a consulta
+        raise
+
+
+def aggregate_shard(conn, shard, cancelled_status):
+    """Parciais de uma fatia: ({(mês, status): [encomendas, centavos]}, {produto: [unidades, centavos]})."""
+    start, end = shard
+    schemas = ['main', 'archive'] if conn.execute(
+        "SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone() else ['main']
+    statuses, products = {}, {}
+    for schema in schemas:
+        for month, status, orders, cents in conn.execute(f'''
+                SELECT substr(order_date, 1, 7), status, COUNT(*), SUM(total) FROM {schema}.orders
+                WHERE order_date >= ? AND order_date < ? GROUP BY 1, 2''', (start, end)):
+            partial = statuses.setdefault((month, status), [0, 0])
+            partial[0] += orders
+            partial[1] += cents
+        for product_id, units, cents in conn.execute(f'''
+                SELECT oi.product_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price)
+                FROM {schema}.orders o JOIN {schema}.order_items oi ON oi.order_id = o.id
+                WHERE o.order_date >= ? AND o.order_date < ? AND o.status <> ? AND oi.product_id IS NOT NULL
+                GROUP BY oi.product_id''', (start, end, cancelled_status)):
+            partial = products.setdefault(product_id, [0, 0])
+            partial[0] += units
+            partial[1] += cents or 0
+    return statuses, products
+
+
+# --- PROCESSO PRINCIPAL ---
+def summarize(db, date_from=None, date_to=None, include_archive=False, workers=None,
+              cancel=None, on_progress=None, top=TOP_PRODUCTS):
+    """Resumo das encomendas de date_from a date_to (inclusive; sem datas, todo o histórico).
+
+    db é o DatabaseManager do banco local (os processos abrem o mesmo
+    arquivo). workers=None escolhe pelo tamanho do período e pelos núcleos;
+    workers=0 soma tudo neste processo. cancel (threading.Event) interrompe
+    as fatias em andamento e devolve o resumo com cancelled=True.
+    on_progress(resumo) é chamado, nesta thread, a cada fatia terminada.
+    """
+    db_name = getattr(getattr(db, 'connections', None), 'db_name', None)
+    if db_name is None or db_name == ':memory:':
+        raise ValueError("O resumo do período precisa do arquivo do banco local (não funciona pelo servidor)")
+    started = time.perf_counter()
+    first, last = db.get_order_date_range(include_archive)
+    date_from, date_to = date_from or first, date_to or last
+    if first is None or date_from > date_to:
+        summary = PeriodSummary(date_from, date_to)
+        summary.seconds = time.perf_counter() - started
+        return summary
+    if workers is None:
+        workers = default_workers(db.count_orders(date_from, date_to, None, include_archive))
+        workers = 0 if workers == 1 else workers
+    # count_orders/get_order_date_range já anexaram o arquivo morto, se ele existir
+    archive_name = db.archive_name if include_archive and db.connections.attached('archive') else None
+    shards = plan_shards(date_from, date_to, workers * SHARDS_PER_WORKER if workers else 1)
+    summary = PeriodSummary(date_from, date_to, len(shards), workers)
+    cancelled_status = db.CANCELLED_STATUS
+    statuses, products = {}, {}
+    def merge(partial):
+        for target, values in zip((statuses, products), partial):
+            for key, (count, cents) in values.items():
+                total = target.setdefault(key, [0, 0])
+                total[0] += count
+                total[1] += cents
+        summary.shards_done += 1
+        if on_progress:
+            on_progress(summary)
+
+    if not workers:
+        conn = _connect(db_name, archive_name)
+        if cancel is not None:
+            conn.set_progress_handler(cancel.is_set, PROGRESS_OPCODES)
+        try:
+            for shard in shards:
+                merge(aggregate_shard(conn, shard, cancelled_status))
+        except sqlite3.OperationalError:
+            if cancel is None or not cancel.is_set():
+                raise
+        finally:
+            conn.close()
+    else:
+        # spawn: o app tem threads (Tk, faixas do banco), e fork com threads pode travar o processo filho
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(db_name, archive_name, stop)) as executor:
+            pending = {executor.submit(_run_shard, shard, cancelled_status) for shard in shards}
+            try:
+                while pending:
+                    if cancel is not None and cancel.is_set():
+                        break
+                    done, pending = wait(pending, timeout=WAIT_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        partial = future.result()
+                        if partial is not None:
+                            merge(partial)
+            finally:
+                if pending:
+                    # Cancelado ou uma fatia falhou: as fatias em andamento param na próxima conferência
+                    stop.set()
+                    for future in pending:
+                        future.cancel()
+    summary.cancelled = cancel is not None and cancel.is_set() and summary.shards_done < summary.shards
+    _fill_summary(db, summary, statuses, products, cancelled_status, top)
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def _fill_summary(db, summary, statuses, products, cancelled_status, top):
+    by_status, monthly = {}, {}
+    for (month, status), (orders, cents) in statuses.items():
+        total = by_status.setdefault(status, [0, 0])
+        total[0] += orders
+        total[1] += cents
+        if status != cancelled_status:
+            total = monthly.setdefault(month, [0, 0])
+            total[0] += orders
+            total[1] += cents
+    summary.orders = sum(orders for orders, _ in by_status.values())
+    summary.revenue = sum(cents for orders, cents in monthly.values()) / 100
+    summary.by_status = sorted(((status, orders, cents / 100) for status, (orders, cents) in by_status.items()),
+                               key=lambda row: -row[1])
+    summary.monthly = [(month, orders, cents / 100) for month, (orders, cents) in sorted(monthly.items())]
+    best = sorted(products.items(), key=lambda item: (-item[1][0], item[0]))[:top]
+    summary.top_products = []
+    for product_id, (units, cents) in best:
+        product = db.get_product(product_id)
+        summary.top_products.append((product_id, product.name if product else '(produto removido)', units, cents / 100))
+
+
+def format_summary(summary):
+    """Texto do resumo, como mostrado na tela de análise e no terminal."""
+    if summary.date_from is None:
+        return "Nenhuma encomenda registrada.\n"
+    lines = [f"Resumo de {summary.date_from} a {summary.date_to}: {summary.orders} encomenda(s), "
+             f"faturamento R$ {summary.revenue:.2f} (sem canceladas)\n"]
+    if summary.cancelled:
+        lines.append(f"    Cancelado: só {summary.shards_done} de {summary.shards} fatia(s) foram somadas.\n")
+    lines += ["\nEncomendas por status\n", f"    {'Status':<15}{'Encomendas':>12}{'Valor (R$)':>20}\n"]
+    lines += [f"    {status:<15}{orders:>12}{value:>20.2f}\n" for status, orders, value in summary.by_status] or ["    (sem encomendas)\n"]
+    lines += ["\nFaturamento por mês (sem canceladas)\n", f"    {'Mês':<10}{'Encomendas':>12}{'Faturamento (R$)':>20}\n"]
+    lines += [f"    {month:<10}{orders:>12}{revenue:>20.2f}\n" for month, orders, revenue in summary.monthly] or ["    (sem vendas)\n"]
+    lines += ["\nProdutos mais vendidos\n", f"    {'ID':<6}{'Produto':<40}{'Unidades':>10}{'Faturamento (R$)':>20}\n"]
+    lines += [f"    {prod_id:<6}{name[:39]:<40}{units:>10}{revenue:>20.2f}\n"
+              for prod_id, name, units, revenue in summary.top_products] or ["    (sem vendas)\n"]
+    return "".join(lines)
+
+
+def _date(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {text}")
+
+
+def main():
+    from database import DatabaseManager
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='marcenaria.db', help="Arquivo do banco de dados")
+    parser.add_argument('--from', dest='date_from', type=_date, help="Primeira data (AAAA-MM-DD)")
+    parser.add_argument('--to', dest='date_to', type=_date, help="Última data (AAAA-MM-DD)")
+    parser.add_argument('--workers', type=int, help="Processos (padrão: pelo tamanho do período e os núcleos; 0 = sem processos)")
+    parser.add_argument('--include-archive', action='store_true', help="Inclui as encomendas do arquivo morto")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    try:
+        summary = summarize(db, args.date_from, args.date_to, args.include_archive, args.workers)
+    finally:
+        db.close()
+    print(format_summary(summary), end='')
+    print(f"\n{summary.shards} fatia(s) em {summary.workers or 1} processo(s): {summary.seconds:.2f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
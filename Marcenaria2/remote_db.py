@@ -0,0 +1,126 @@
+# remote_db.py
+"""Cliente do server.py com a mesma interface do DatabaseManager.
+
+Permite que o app (e os scripts) usem o banco de outro processo sem abrir o
+arquivo: cada método vira um POST /api/<método>. As linhas voltam como
+tuplas, como no sqlite3, e produtos e encomendas como os modelos de
+models.py, para que o código que as usa não perceba diferença. As encomendas
+de get_orders_by_status e find_orders (sem with_items) vêm sem os itens.
+"""
+import http.client
+import json
+from urllib.parse import urlsplit, urlencode
+from models import Product, Order
+from server import WRITE_METHODS, WRITER_THREAD_METHODS, READ_METHODS, DEFAULT_PORT
+
+
+class RemoteError(Exception):
+    """Erro devolvido pelo servidor (a mensagem traz o tipo e o texto do erro original)."""
+
+
+def _restore(value, top=True):
+    # Listas dentro de listas eram tuplas (linhas); dicionários valem como topo
+    if isinstance(value, dict):
+        return {key: _restore(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [_restore(item, top=False) for item in value]
+        return items if top else tuple(items)
+    return value
+
+
+def _products(rows):
+    return [Product(*row) for row in rows]
+
+
+def _orders(rows):
+    products = {}
+    return [Order.from_json(data, products) for data in rows]
+
+
+# Resultados que o DatabaseManager devolve como modelos
+RESULT_MODELS = {'get_all_products': _products, 'get_products_page': _products, 'search_products': _products,
+                 'get_product': lambda row: row and Product(*row),
+                 'get_product_catalog': lambda catalog: (catalog[0], _products(catalog[1])),
+                 'get_orders_page': _orders, 'get_orders_by_status': _orders, 'find_orders': _orders}
+
+
+def _remote_method(name):
+    convert = RESULT_MODELS.get(name, lambda value: value)
+    def method(self, *args):
+        return convert(self._call(name, *args))
+    method.__name__ = name
+    method.__qualname__ = f"RemoteDatabase.{name}"
+    return method
+
+
+class RemoteDatabase:
+    def __init__(self, url=f'http://127.0.0.1:{DEFAULT_PORT}', timeout=60):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or DEFAULT_PORT
+        self.timeout = timeout
+        self._conn = None
+
+    def _connection(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _call(self, name, *args):
+        body = json.dumps({'args': args}, ensure_ascii=False).encode('utf-8')
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = self._connection()
+            try:
+                self._conn.request('POST', f'/api/{name}', body, {'Content-Type': 'application/json'})
+                response = self._conn.getresponse()
+                data = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Conexão mantida aberta que o servidor já fechou: tenta uma vez numa nova
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RemoteError(data.get('error', f'HTTP {response.status}'))
+        return _restore(data['result'])
+
+    def _stream(self, path):
+        conn = self._connection() # Conexão própria: o gerador pode ser abandonado no meio
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            if response.status != 200:
+                raise RemoteError(json.loads(response.read()).get('error', f'HTTP {response.status}'))
+            for line in response:
+                yield json.loads(line)
+        finally:
+            conn.close()
+
+    def iter_products(self, batch_size=1000):
+        for rows in self._stream(f'/stream/products?batch={int(batch_size)}'):
+            yield [tuple(row) for row in rows]
+
+    def iter_full_report(self, batch_size=500):
+        products = {}
+        for data in self._stream(f'/stream/report?batch={int(batch_size)}'):
+            yield Order.from_json(data, products)
+
+    def get_full_report(self):
+        return list(self.iter_full_report())
+
+    def iter_order_rows(self, date_from=None, date_to=None, statuses=None, batch_size=1000, include_archive=False):
+        query = [('batch', int(batch_size))] + [(key, value) for key, value in (('from', date_from), ('to', date_to)) if value]
+        query += [('status', status) for status in statuses or ()]
+        if include_archive:
+            query.append(('archive', 1))
+        for rows in self._stream(f'/stream/orders?{urlencode(query)}'):
+            yield [tuple(row) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+for _name in sorted(WRITE_METHODS | WRITER_THREAD_METHODS | READ_METHODS):
+    setattr(RemoteDatabase, _name, _remote_method(_name))
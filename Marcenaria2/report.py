@@ -0,0 +1,53 @@
+# report.py
+"""Exporta as encomendas pela linha de comando.
+
+Uso:
+    python report.py export encomendas.csv          (também .jsonl, .csv.gz ou .jsonl.gz)
+    python report.py export entregues.jsonl.gz --from 2025-01-01 --to 2025-06-30 --status Entregue
+    python report.py export historico.csv.gz --include-archive      (inclui o arquivo morto)
+"""
+import argparse
+import datetime
+import sys
+import time
+import report_io
+from database import DatabaseManager
+
+
+def _date(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportação das encomendas.")
+    parser.add_argument('action', choices=['export'])
+    parser.add_argument('path', help="Arquivo .csv ou .jsonl, com ou sem .gz")
+    parser.add_argument('--db', default='marcenaria.db', help="Arquivo do banco de dados")
+    parser.add_argument('--from', dest='date_from', type=_date, help="Primeira data (AAAA-MM-DD)")
+    parser.add_argument('--to', dest='date_to', type=_date, help="Última data (AAAA-MM-DD)")
+    parser.add_argument('--status', action='append', help="Só encomendas neste status (pode repetir)")
+    parser.add_argument('--include-archive', action='store_true', help="Inclui as encomendas do arquivo morto")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    started = time.perf_counter()
+    show_progress = sys.stderr.isatty()
+    def progress(result):
+        print(f"\r{result.orders}/{result.total_orders} encomendas", end='', file=sys.stderr, flush=True)
+    try:
+        result = report_io.export_orders(db, args.path, args.date_from, args.date_to, args.status, args.include_archive,
+                                         on_progress=progress if show_progress else None)
+        if show_progress:
+            print(file=sys.stderr)
+        print(f"{result.orders} encomenda(s) ({result.rows} linha(s)) exportada(s) "
+              f"em {time.perf_counter() - started:.2f}s.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
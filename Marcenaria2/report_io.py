@@ -0,0 +1,126 @@
+# report_io.py
+"""Exportação das encomendas (com os itens) em CSV ou JSON Lines, opcionalmente
+compactada com gzip (extensão .gz no fim do nome).
+
+As linhas vêm do banco em lotes (fetchmany) e vão direto para o arquivo, então
+a memória usada não depende do tamanho da exportação. O arquivo é escrito com
+um nome temporário e só recebe o nome final quando termina: uma exportação
+cancelada ou com erro não deixa arquivo pela metade.
+"""
+import csv
+import gzip
+import json
+import os
+
+EXPORT_BATCH_SIZE = 2000 # Linhas por fetchmany
+GZIP_LEVEL = 6 # O padrão do gzip (9) é bem mais lento e compacta quase o mesmo
+CSV_FIELDS = ('order_id', 'client_name', 'order_date', 'status', 'order_total',
+              'product_id', 'product_name', 'quantity', 'unit_price')
+
+
+class OrderExportResult:
+    def __init__(self, total_orders=None):
+        self.total_orders = total_orders # Encomendas no filtro (None se não foi contado)
+        self.orders = 0
+        self.rows = 0
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"OrderExportResult(orders={self.orders}, rows={self.rows}, cancelled={self.cancelled})"
+
+
+def file_format(path):
+    """(formato, compactado) pela extensão: .csv, .jsonl/.ndjson, com ou sem .gz."""
+    name = path.lower()
+    compressed = name.endswith('.gz')
+    if compressed:
+        name = name[:-3]
+    ext = os.path.splitext(name)[1]
+    if ext in ('.csv', '.txt'):
+        return 'csv', compressed
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl', compressed
+    raise ValueError(f"Formato de arquivo não suportado: {ext or path} (use .csv ou .jsonl, com ou sem .gz)")
+
+
+def _open(path, compressed):
+    if compressed:
+        return gzip.open(path, 'wt', compresslevel=GZIP_LEVEL, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='', buffering=1 << 16)
+
+
+def _write_csv(stream, batches, result, after_batch):
+    writer = csv.writer(stream)
+    writer.writerow(CSV_FIELDS)
+    last_order = None
+    for rows in batches:
+        writer.writerows(rows)
+        result.rows += len(rows)
+        # As linhas de uma encomenda vêm juntas: conta cada troca de id
+        for row in rows:
+            if row[0] != last_order:
+                last_order = row[0]
+                result.orders += 1
+        if not after_batch():
+            return
+
+
+def _write_jsonl(stream, batches, result, after_batch):
+    # Um objeto por encomenda; os itens de uma encomenda podem atravessar dois lotes
+    order = None
+    def flush():
+        stream.write(json.dumps(order, ensure_ascii=False))
+        stream.write('\n')
+        result.orders += 1
+    for rows in batches:
+        for order_id, client, date, status, total, product_id, product_name, quantity, unit_price in rows:
+            if order is None or order['id'] != order_id:
+                if order is not None:
+                    flush()
+                order = {'id': order_id, 'client_name': client, 'order_date': date, 'status': status,
+                         'total': total, 'items': []}
+            if quantity is not None:
+                order['items'].append({'product_id': product_id, 'product_name': product_name,
+                                       'quantity': quantity, 'unit_price': unit_price})
+        result.rows += len(rows)
+        if not after_batch():
+            return
+    if order is not None:
+        flush()
+
+
+def export_orders(db, path, date_from=None, date_to=None, statuses=None, include_archive=False,
+                  on_progress=None, cancel=None, batch_size=EXPORT_BATCH_SIZE):
+    """Exporta as encomendas do filtro (datas AAAA-MM-DD inclusive, lista de status),
+    com as do arquivo morto se include_archive.
+
+    on_progress(result) é chamado a cada lote, na thread que exporta. cancel
+    é um objeto com is_set() (ex.: threading.Event): quando ligado, a
+    exportação para no fim do lote atual, o arquivo temporário é apagado e o
+    resultado volta com cancelled=True.
+    """
+    fmt, compressed = file_format(path)
+    result = OrderExportResult(db.count_orders(date_from, date_to, statuses, include_archive) if on_progress else None)
+    def after_batch():
+        if on_progress:
+            on_progress(result)
+        if cancel is not None and cancel.is_set():
+            result.cancelled = True
+            return False
+        return True
+    temp_path = path + '.part'
+    batches = db.iter_order_rows(date_from, date_to, statuses, batch_size, include_archive)
+    try:
+        with _open(temp_path, compressed) as stream:
+            (_write_csv if fmt == 'csv' else _write_jsonl)(stream, batches, result, after_batch)
+        if result.cancelled:
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        batches.close() # Libera o cursor mesmo se a escrita parou no meio
+    return result
@@ -0,0 +1,40 @@
+# rollups.py
+"""Manutenção das tabelas de agregados de vendas (sales_daily, product_sales_daily).
+
+Uso:
+    python rollups.py check      confere os agregados contra um recálculo completo
+    python rollups.py rebuild    recalcula os agregados a partir das encomendas
+"""
+import argparse
+import sys
+import time
+from database import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção dos agregados de vendas.")
+    parser.add_argument('action', choices=['check', 'rebuild'])
+    parser.add_argument('--db', default='marcenaria.db', help="Arquivo do banco de dados")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    started = time.perf_counter()
+    try:
+        if args.action == 'rebuild':
+            db.rebuild_rollups()
+            print(f"Agregados recalculados em {time.perf_counter() - started:.2f}s.")
+            return 0
+        differences = db.check_rollups()
+        for table, side, row in differences:
+            print(f"{table} ({side}): {row}")
+        if differences:
+            print(f"{len(differences)} divergência(s). Rode 'python rollups.py rebuild' para corrigir.")
+            return 1
+        print(f"Agregados consistentes ({time.perf_counter() - started:.2f}s).")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# server.py
+"""Servidor HTTP/JSON local que expõe o DatabaseManager para vários terminais.
+
+Só este processo abre o arquivo do banco: uma conexão de escrita (numa thread
+própria) e um grupo de threads de leitura, cada uma com sua conexão. As
+escritas que chegam enquanto outra está sendo gravada são juntadas numa única
+transação (group commit), com um savepoint por pedido. O relatório completo e
+o catálogo são enviados aos poucos (Transfer-Encoding: chunked), uma linha
+JSON por encomenda/lote.
+
+O arquivo morto, se já existir, é anexado na abertura: anexar mexe na conexão
+de escrita, e assim as threads de leitura já o encontram pronto. Um arquivo
+morto criado depois (archive.py, em outro processo) é anexado na primeira
+consulta que o usar, sob o lock de escrita.
+
+Rotas:
+    POST /api/<método>      corpo {"args": [...]}  ->  {"result": ...} ou {"error": "..."}
+    GET  /stream/report     uma encomenda por linha (JSON Lines)
+    GET  /stream/products   um lote de produtos por linha
+    GET  /stream/orders     um lote de iter_order_rows por linha (?from=&to=&status=...&archive=1)
+    GET  /stats             contadores do group commit
+
+Não há autenticação: o servidor escuta em 127.0.0.1 por padrão e deve ficar
+restrito à rede da marcenaria.
+
+Uso: python server.py [--db marcenaria.db] [--host 127.0.0.1] [--port 8765] [--readers 4]
+"""
+import argparse
+import asyncio
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import models
+from database import DatabaseManager
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 256 # Escritas por transação
+MAX_BODY = 64 << 20 # Lotes grandes de importação de catálogo cabem com folga
+STREAM_QUEUE = 8 # Pedaços prontos esperando a rede, por resposta em streaming
+STREAM_CHUNK_BYTES = 64 << 10
+STREAM_BATCH = 500
+
+# Escritas passam pela fila do group commit; o catálogo em cache também fica na
+# thread de escrita, que é a única que mexe nele
+WRITE_METHODS = {'add_user', 'add_product', 'update_product', 'delete_product', 'upsert_products',
+                 'create_order', 'update_order_status', 'bulk_update_order_status', 'run_operations'}
+WRITER_THREAD_METHODS = {'get_all_products', 'get_product_catalog'}
+READ_METHODS = {'check_user_exists', 'verify_user', 'get_products_page', 'search_products', 'get_product',
+                'get_order_status', 'get_orders_page', 'get_monthly_revenue', 'get_status_summary',
+                'get_top_products', 'get_orders_by_status', 'get_status_timeline', 'get_status_history',
+                'get_lead_times', 'count_orders', 'get_archive_summary', 'find_orders'}
+# Não devolve a linha do usuário (com a senha): só se existe/confere
+RESULT_FILTERS = {'check_user_exists': bool, 'verify_user': bool}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class MarcenariaServer:
+    def __init__(self, db_name='marcenaria.db', readers=4, max_batch=MAX_BATCH):
+        self.db = DatabaseManager(db_name)
+        # Já anexado, os métodos de leitura que consultam o arquivo morto não mexem na conexão de escrita
+        self.db.open_archive()
+        self.max_batch = max_batch
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        self._writes = None
+        self._writer_task = None
+        self.stats = {'writes': 0, 'commits': 0, 'largest_batch': 0}
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._group_commit_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        self._writer.submit(self.db.close).result()
+        self._writer.shutdown()
+        self._readers.shutdown()
+
+    # --- BANCO ---
+    async def _group_commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.max_batch and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            calls = [functools.partial(getattr(self.db, method), *args) for method, args, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._writer, self.db.connections.run_write_batch, calls)
+            except Exception as e:
+                # O commit falhou: nenhuma das escritas do lote foi gravada
+                results = [(False, e)] * len(batch)
+            self.stats['writes'] += len(batch)
+            self.stats['commits'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+            for (_, _, future), (ok, value) in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    async def call(self, method, args):
+        loop = asyncio.get_running_loop()
+        if method in WRITE_METHODS:
+            future = loop.create_future()
+            await self._writes.put((method, args, future))
+            result = await future
+        elif method in WRITER_THREAD_METHODS:
+            result = await loop.run_in_executor(self._writer, functools.partial(getattr(self.db, method), *args))
+        else:
+            result = await loop.run_in_executor(self._readers, functools.partial(getattr(self.db, method), *args))
+        return RESULT_FILTERS.get(method, lambda value: value)(result)
+
+    def _full_report(self, batch):
+        for order in self.db.iter_full_report(batch):
+            order.items # Carrega os itens aqui, na thread de leitura: o to_json não lê o banco
+            yield order
+
+    # --- HTTP ---
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                verb, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    await self._send_json(writer, 413, {'error': 'corpo da requisição grande demais'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._dispatch(verb, target, body, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Cliente desconectou ou mandou uma requisição mal formada
+        except Exception as e:
+            # Ex.: erro do banco no meio de um streaming, quando o status 200 já foi enviado
+            print(f"Server Error: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, verb, target, body, writer, keep_alive):
+        url = urlsplit(target)
+        parts = url.path.strip('/').split('/')
+        if parts[0] == 'api' and len(parts) == 2:
+            if verb != 'POST':
+                return await self._send_json(writer, 405, {'error': 'use POST'}, close=not keep_alive)
+            method = parts[1]
+            if method not in WRITE_METHODS | WRITER_THREAD_METHODS | READ_METHODS:
+                return await self._send_json(writer, 404, {'error': f'método desconhecido: {method}'}, close=not keep_alive)
+            try:
+                args = json.loads(body or b'{}').get('args', [])
+                if not isinstance(args, list):
+                    raise ValueError
+            except (ValueError, AttributeError):
+                return await self._send_json(writer, 400, {'error': 'corpo deve ser {"args": [...]}'}, close=not keep_alive)
+            try:
+                result = await self.call(method, args)
+            except Exception as e:
+                return await self._send_json(writer, 500, {'error': f'{type(e).__name__}: {e}'}, close=not keep_alive)
+            return await self._send_json(writer, 200, {'result': result}, close=not keep_alive)
+        if verb == 'GET' and url.path == '/stream/report':
+            batch = int(parse_qs(url.query).get('batch', [STREAM_BATCH])[0])
+            return await self._send_stream(writer, lambda: self._full_report(batch), keep_alive)
+        if verb == 'GET' and url.path == '/stream/products':
+            batch = int(parse_qs(url.query).get('batch', [1000])[0])
+            return await self._send_stream(writer, lambda: self.db.iter_products(batch), keep_alive)
+        if verb == 'GET' and url.path == '/stream/orders':
+            query = parse_qs(url.query)
+            date_from, date_to = query.get('from', [None])[0], query.get('to', [None])[0]
+            statuses, batch = query.get('status'), int(query.get('batch', [1000])[0])
+            include_archive = query.get('archive', ['0'])[0] == '1'
+            return await self._send_stream(
+                writer, lambda: self.db.iter_order_rows(date_from, date_to, statuses, batch, include_archive), keep_alive)
+        if verb == 'GET' and url.path == '/stats':
+            return await self._send_json(writer, 200, self.stats, close=not keep_alive)
+        await self._send_json(writer, 404, {'error': 'rota desconhecida'}, close=not keep_alive)
+
+    async def _send_json(self, writer, status, payload, close=False):
+        body = json.dumps(payload, ensure_ascii=False, default=models.to_json).encode('utf-8')
+        writer.write(self._headers(status, close, f'Content-Length: {len(body)}') + body)
+        await writer.drain()
+
+    def _headers(self, status, close, *extra):
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}', 'Content-Type: application/json; charset=utf-8', *extra]
+        if close:
+            lines.append('Connection: close')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_stream(self, writer, items, keep_alive):
+        """Envia o que items() gerar (numa thread de leitura), uma linha JSON por item.
+
+        As linhas são juntadas em pedaços de ~STREAM_CHUNK_BYTES. A fila
+        limitada segura a thread do banco quando a rede está mais lenta que a
+        leitura, em vez de acumular o relatório inteiro na memória.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE)
+        cancelled = threading.Event()
+        def put(chunk):
+            asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+        def run():
+            try:
+                lines, size = [], 0
+                for item in items():
+                    if cancelled.is_set():
+                        return
+                    line = json.dumps(item, ensure_ascii=False, default=models.to_json) + '\n'
+                    lines.append(line)
+                    size += len(line)
+                    if size >= STREAM_CHUNK_BYTES:
+                        put(''.join(lines).encode('utf-8'))
+                        lines, size = [], 0
+                if lines:
+                    put(''.join(lines).encode('utf-8'))
+            finally:
+                put(None)
+        producer = loop.run_in_executor(self._readers, run)
+        writer.write(self._headers(200, not keep_alive, 'Transfer-Encoding: chunked'))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                await writer.drain()
+        except ConnectionError:
+            cancelled.set()
+            while await queue.get() is not None:
+                pass # Libera a thread do banco, que pode estar esperando espaço na fila
+            raise
+        # Se a leitura falhou no meio, a conexão cai sem o pedaço final e o cliente percebe
+        await producer
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+async def serve(db_name, host, port, readers):
+    server = MarcenariaServer(db_name, readers)
+    await server.start(host, port)
+    print(f"Servindo {db_name} em http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='marcenaria.db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--readers', type=int, default=4, help="Threads (e conexões) de leitura")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.readers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
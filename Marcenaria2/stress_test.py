@@ -0,0 +1,94 @@
+# stress_test.py
+"""Teste de carga com vários processos usando o mesmo arquivo de banco.
+
+Cada processo simula um terminal: alterna create_order e get_full_report
+durante alguns segundos. No fim são mostrados a vazão, as latências e o
+tempo gasto esperando pelo lock de escrita.
+
+Uso: python stress_test.py [--processes 4] [--seconds 10] [--journal WAL|DELETE] [--db arquivo]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from connection import ConnectionManager
+from database import DatabaseManager
+
+REPORT_RATIO = 0.2 # Fração das operações que são relatórios
+
+
+def _worker(db_name, journal_mode, seconds, seed, results):
+    random.seed(seed)
+    db = DatabaseManager(db_name, ConnectionManager(db_name, journal_mode=journal_mode))
+    product_ids = [p.id for p in db.get_all_products()]
+    latencies = {'create_order': [], 'get_full_report': []}
+    failures = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if random.random() < REPORT_RATIO:
+            db.get_full_report()
+            latencies['get_full_report'].append(time.perf_counter() - started)
+        else:
+            items = [{'id': random.choice(product_ids), 'quantity': random.randint(1, 5)} for _ in range(random.randint(1, 5))]
+            if db.create_order(f"Cliente {seed}", items) is None:
+                failures += 1
+            latencies['create_order'].append(time.perf_counter() - started)
+    results.put({'latencies': latencies, 'failures': failures,
+                 'lock_wait': db.connections.lock_wait_seconds, 'retries': db.connections.write_retries_done})
+    db.close()
+
+
+def _seed_database(db_name, journal_mode, products=200, orders=500):
+    db = DatabaseManager(db_name, ConnectionManager(db_name, journal_mode=journal_mode))
+    for i in range(products):
+        db.add_product(f"Produto {i}", "", 10 + i)
+    for i in range(orders):
+        db.create_order(f"Cliente {i}", [{'id': 1 + i % products, 'quantity': 1}])
+    db.close()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--journal', default='WAL', help="Modo do journal (WAL ou DELETE para comparar)")
+    parser.add_argument('--db', help="Arquivo de banco (padrão: um banco temporário com dados de exemplo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = args.db
+        if db_name is None:
+            db_name = os.path.join(tmp, 'stress.db')
+            _seed_database(db_name, args.journal)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_worker, args=(db_name, args.journal, args.seconds, seed, results))
+                   for seed in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        reports = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    print(f"{args.processes} processo(s), {args.seconds:.0f}s, journal {args.journal}")
+    for operation in ('create_order', 'get_full_report'):
+        values = [v for r in reports for v in r['latencies'][operation]]
+        print(f"  {operation:<16} {len(values) / args.seconds:8.1f} op/s  "
+              f"média {statistics.mean(values) * 1000 if values else 0:7.2f} ms  "
+              f"p95 {_percentile(values, 0.95) * 1000:7.2f} ms  p99 {_percentile(values, 0.99) * 1000:7.2f} ms")
+    print(f"  espera pelo lock de escrita: {sum(r['lock_wait'] for r in reports):.2f}s no total, "
+          f"{sum(r['retries'] for r in reports)} nova(s) tentativa(s), {sum(r['failures'] for r in reports)} falha(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# views.py
+import os
+import time
+from collections import OrderedDict
+import customtkinter as ctk
+
+
+class ViewManager:
+    """Mantém as telas já construídas como frames escondidos.
+
+    Cada tela é construída uma única vez, na primeira visita, por
+    builders[nome](frame), que pode retornar uma função refresh(). Ao voltar
+    para uma tela já construída, o frame é apenas mostrado de novo e refresh()
+    atualiza os dados. Guarda no máximo max_alive telas; a usada há mais tempo
+    é destruída quando o limite é passado.
+
+    Com MARCENARIA_TIMING=1 no ambiente, o tempo de cada troca de tela
+    (incluindo o layout) é mostrado no terminal.
+    """
+    def __init__(self, container, builders, max_alive=5):
+        self.container = container
+        self.builders = builders
+        self.max_alive = max_alive
+        self.current = None
+        self._screens = OrderedDict() # nome -> (frame, refresh)
+        self.timing = os.environ.get("MARCENARIA_TIMING") == "1"
+        self.switch_times = [] # (nome, segundos, construída agora?)
+
+    def show(self, name):
+        started = time.perf_counter()
+        screen = self._screens.get(name)
+        built = screen is None
+        if built:
+            frame = ctk.CTkFrame(self.container, fg_color="transparent")
+            screen = self._screens[name] = (frame, self.builders[name](frame))
+        else:
+            self._screens.move_to_end(name)
+        if self.current is not None and self.current != name and self.current in self._screens:
+            self._screens[self.current][0].pack_forget()
+        self.current = name
+        frame, refresh = screen
+        frame.pack(fill="both", expand=True)
+        if refresh is not None and not built:
+            refresh()
+        self._evict()
+        if self.timing:
+            self.container.update_idletasks()
+            elapsed = time.perf_counter() - started
+            self.switch_times.append((name, elapsed, built))
+            print(f"[timing] tela '{name}' em {elapsed * 1000:.1f} ms ({'construída' if built else 'reaproveitada'})")
+
+    def _evict(self):
+        while len(self._screens) > self.max_alive:
+            name = next(iter(self._screens))
+            if name == self.current:
+                break
+            frame, _ = self._screens.pop(name)
+            frame.destroy()
+
+    def clear(self):
+        """Destrói todas as telas (ex.: no logout, para não guardar dados do usuário anterior)."""
+        for frame, _ in self._screens.values():
+            frame.destroy()
+        self._screens.clear()
+        self.current = None
@@ -0,0 +1,134 @@
+# widgets.py
+import time
+from tkinter import END
+
+
+class PagedTextView:
+    """Lista virtualizada sobre um CTkTextbox.
+
+    Mantém carregadas apenas as páginas próximas da área visível (no máximo
+    max_pages). Cada página é buscada com paginação por chave e desenhada com
+    um único insert. fetch_page(chave, limite, on_rows, on_error) pode
+    responder na hora ou mais tarde (ex.: via AsyncDatabase); enquanto uma
+    página está a caminho, nenhuma outra é pedida. Se a busca falhar, o erro
+    vai para on_error(erro) e a lista tenta de novo depois de
+    ERROR_RETRY_SECONDS.
+    """
+    POLL_INTERVAL_MS = 100 # Mesmo esquema do CTkTextbox, que verifica as barras de rolagem periodicamente
+    PREFETCH_MARGIN = 0.15 # Fração da rolagem que dispara a busca da próxima página
+    ERROR_RETRY_SECONDS = 5 # Espera depois de uma busca com erro, para não repetir o aviso sem parar
+
+    def __init__(self, textbox, fetch_page, format_rows, key_of, header="", empty_text="",
+                 first_key=None, page_size=100, max_pages=4, on_error=None):
+        self.textbox = textbox
+        self.fetch_page = fetch_page
+        self.format_rows = format_rows
+        self.key_of = key_of
+        self.header = header
+        self.empty_text = empty_text
+        self.first_key = first_key
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.on_error = on_error
+        self._epoch = 0
+        self._retry_at = 0.0
+        self.reload()
+        self._poll()
+
+    def reload(self):
+        """Volta para o topo da lista e descarta as páginas carregadas."""
+        self._epoch += 1
+        self.start_keys = [self.first_key] # Chave inicial de cada página já visitada
+        self.first_page = 0
+        self.line_counts = [] # Linhas ocupadas por cada página carregada, em ordem
+        self.end_page = None # Primeira página depois do fim da lista, quando já se sabe qual é
+        self.loading = False
+        self._retry_at = 0.0
+        self._fetch(0, self._show_first_page)
+
+    def _fetch(self, page, on_rows):
+        epoch = self._epoch
+        def receive(rows):
+            # Ignora respostas de antes de um reload ou de um widget já destruído
+            if epoch != self._epoch or not self.textbox.winfo_exists():
+                return
+            self.loading = False
+            if page + 1 == len(self.start_keys) and len(rows) == self.page_size:
+                self.start_keys.append(self.key_of(rows[-1]))
+            elif len(rows) < self.page_size:
+                # Fim da lista; uma página vazia (total múltiplo de page_size) também não existe
+                self.end_page = page + 1 if rows else page
+            on_rows(rows)
+        def fail(error):
+            if epoch != self._epoch or not self.textbox.winfo_exists():
+                return
+            # Sem isso a lista ficaria esperando para sempre uma página que não vem
+            self.loading = False
+            self._retry_at = time.monotonic() + self.ERROR_RETRY_SECONDS
+            if self.on_error is not None:
+                self.on_error(error)
+        self.loading = True
+        self.fetch_page(self.start_keys[page], self.page_size, receive, fail)
+
+    def _header_lines(self):
+        return self.header.count("\n")
+
+    def _show_first_page(self, rows):
+        self.textbox.delete("1.0", END)
+        if not rows:
+            self.textbox.insert(END, self.empty_text)
+            return
+        self.textbox.insert(END, self.header)
+        self._append_page(rows)
+
+    def _append_page(self, rows):
+        text = self.format_rows(rows)
+        self.textbox.insert(END, text)
+        self.line_counts.append(text.count("\n"))
+
+    def _poll(self):
+        if not self.textbox.winfo_exists():
+            return
+        # Tela escondida (ViewManager): não busca páginas até voltar a aparecer
+        if not self.loading and self.textbox.winfo_ismapped() and time.monotonic() >= self._retry_at:
+            top, bottom = self.textbox.yview()
+            if bottom >= 1 - self.PREFETCH_MARGIN:
+                self._load_next()
+            elif top <= self.PREFETCH_MARGIN and self.first_page > 0:
+                self._load_previous()
+        self.textbox.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _load_next(self):
+        next_page = self.first_page + len(self.line_counts)
+        if not self.line_counts or next_page >= len(self.start_keys) or next_page == self.end_page:
+            return
+        self._fetch(next_page, self._show_next_page)
+
+    def _show_next_page(self, rows):
+        if not rows:
+            return
+        self._append_page(rows)
+        if len(self.line_counts) > self.max_pages:
+            # Remove a primeira página sem mover o conteúdo que está na tela
+            visible_line = int(self.textbox.index("@0,0").split(".")[0])
+            removed = self.line_counts.pop(0)
+            start = self._header_lines() + 1
+            self.textbox.delete(f"{start}.0", f"{start + removed}.0")
+            self.first_page += 1
+            self.textbox.yview(f"{max(visible_line - removed, 1)}.0")
+
+    def _load_previous(self):
+        self._fetch(self.first_page - 1, self._show_previous_page)
+
+    def _show_previous_page(self, rows):
+        text = self.format_rows(rows)
+        visible_line = int(self.textbox.index("@0,0").split(".")[0])
+        added = text.count("\n")
+        self.textbox.insert(f"{self._header_lines() + 1}.0", text)
+        self.line_counts.insert(0, added)
+        self.first_page -= 1
+        if len(self.line_counts) > self.max_pages:
+            self.line_counts.pop()
+            start = self._header_lines() + 1 + sum(self.line_counts)
+            self.textbox.delete(f"{start}.0", "end-1c")
+        self.textbox.yview(f"{visible_line + added}.0")